@@ -1,10 +1,20 @@
 from django.contrib import admin
-from .models import Category, Product, Order
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    ArchivedOrderPayment,
+    Category,
+    Product,
+    Order,
+    PortoneWebhook,
+    StockReservation,
+    invalidate_product_caches,
+)
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ["pk", "name", "total_amount", "status"]
+    list_display = ["pk", "name", "item_count", "total_amount", "status"]
     actions = ["make_cancel", "update"]
 
     @admin.display(description=f"지정 주문결제를 취소합니다.")
@@ -16,7 +26,7 @@ class OrderAdmin(admin.ModelAdmin):
     @admin.display(description="지정 주문의 결제상황을 업데이트합니다.")
     def update(self, request, queryset):
         for order in queryset:
-            order.update()
+            order.update(force=True)
         self.message_user(request, f"{queryset.count()}개의 결제상황을 업데이트했습니다.")
 
 
@@ -29,7 +39,7 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     search_fields = ["name"]
-    list_display = ["category", "name", "price", "status"]
+    list_display = ["category", "name", "price", "stock", "status"]
     list_display_links = ["name"]
     list_filter = ["category", "status", "created_at", "updated_at"]
     date_hierarchy = "updated_at"
@@ -38,6 +48,72 @@ class ProductAdmin(admin.ModelAdmin):
     @admin.display(description=f"지정 상품을 {Product.Status.ACTIVE.label} 상태로 변경합니다.")
     def make_active(self, request, queryset):
         count = queryset.update(status=Product.Status.ACTIVE)
+        # queryset.update는 signal을 발생시키지 않으므로 직접 갱신합니다.
+        invalidate_product_caches()
         self.message_user(
             request, f"{count}개의 상품을 {Product.Status.ACTIVE.label} 상태로 변경했습니다."
         )
+
+
+@admin.register(PortoneWebhook)
+class PortoneWebhookAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "merchant_uid",
+        "payment_status",
+        "status",
+        "attempts",
+        "created_at",
+        "processed_at",
+        "next_attempt_at",
+    ]
+    list_filter = ["status", "created_at"]
+    search_fields = ["merchant_uid", "imp_uid"]
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ["pk", "order", "product", "quantity", "status", "expires_at"]
+    list_filter = ["status", "expires_at"]
+    raw_id_fields = ["order", "product"]
+
+
+class ReadOnlyAdminMixin:
+    """보관 데이터는 조회만 허용합니다."""
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ArchivedOrderedProductInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = ArchivedOrderedProduct
+    fields = ["product", "name", "price", "quantity"]
+    readonly_fields = fields
+
+
+class ArchivedOrderPaymentInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = ArchivedOrderPayment
+    fields = ["uid", "name", "desired_amount", "pay_status", "is_paid_ok"]
+    readonly_fields = fields
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "name",
+        "item_count",
+        "total_amount",
+        "status",
+        "created_at",
+        "archived_at",
+    ]
+    list_filter = ["status", "archived_at"]
+    search_fields = ["=uid"]
+    inlines = [ArchivedOrderedProductInline, ArchivedOrderPaymentInline]
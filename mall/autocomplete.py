@@ -0,0 +1,152 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+
+from mall.caches import CacheVersion
+from mall.models import Product
+
+
+# 한글 음절 = 초성 * 588 + 중성 * 28 + 종성 + 0xAC00
+CHOSEONG_LIST = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG_LIST = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG_LIST = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# 입력 중인 음절도 매칭되도록 겹모음/겹받침은 낱자로 분리합니다. (ex: "갑" → "값"의 접두어)
+COMPOUND_JAMO = {
+    "ㅘ": "ㅗㅏ",
+    "ㅙ": "ㅗㅐ",
+    "ㅚ": "ㅗㅣ",
+    "ㅝ": "ㅜㅓ",
+    "ㅞ": "ㅜㅔ",
+    "ㅟ": "ㅜㅣ",
+    "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ",
+    "ㄵ": "ㄴㅈ",
+    "ㄶ": "ㄴㅎ",
+    "ㄺ": "ㄹㄱ",
+    "ㄻ": "ㄹㅁ",
+    "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ",
+    "ㄿ": "ㄹㅍ",
+    "ㅀ": "ㄹㅎ",
+    "ㅄ": "ㅂㅅ",
+}
+
+
+def decompose(text: str) -> str:
+    """한글 음절을 자모 단위로 분해하고, 영문은 소문자로 변환합니다."""
+
+    chars = []
+    for char in text.lower():
+        code = ord(char) - 0xAC00
+        if 0 <= code < 11172:
+            jamo = (
+                CHOSEONG_LIST[code // 588]
+                + JUNGSEONG_LIST[(code % 588) // 28]
+                + JONGSEONG_LIST[code % 28].strip()
+            )
+        else:
+            jamo = char
+        chars.append("".join(COMPOUND_JAMO.get(j, j) for j in jamo))
+    return "".join(chars)
+
+
+class ProductNameIndex:
+    """
+    판매중인 상품명에 대한 프로세스 내 접두어 검색 인덱스
+
+    상품명의 각 단어 시작 위치부터의 문자열을 자모 단위로 분해하여 정렬해두고,
+    이진탐색으로 접두어가 일치하는 상품을 찾습니다. 상품이 변경되면 캐시의 버전 값만
+    변경하고(invalidate), 인덱스는 다음 조회 시에 다시 생성합니다.
+
+    캐시가 프로세스 간에 공유되지 않는 경우(LocMemCache 등)에도 다른 프로세스에서의 변경을
+    반영하도록, MALL_AUTOCOMPLETE_CHECK_INTERVAL 간격으로 판매중인 상품의 DB 버전도 확인합니다.
+    """
+
+    version_key = CacheVersion("mall:autocomplete:version")
+
+    def __init__(self):
+        # (정렬된 키 목록, 키별 (상품 pk, 상품명) 목록) : 조회 중 교체되어도 일관되도록 함께 보관합니다.
+        self.data: Tuple[List[str], List[Tuple[int, str]]] = ([], [])
+        # (캐시 버전, DB 버전)
+        self.version: Optional[tuple] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def invalidate(cls):
+        cls.version_key.incr()
+
+    @staticmethod
+    def get_db_version() -> tuple:
+        # 상품 추가/삭제/상태 변경(queryset.update 포함)은 상품 수와 pk 합계로,
+        # 상품명 변경은 수정시각으로 알 수 있습니다.
+        return tuple(
+            Product.objects.filter(status=Product.Status.ACTIVE)
+            .aggregate(
+                count=Count("pk"), pk_sum=Sum("pk"), updated_at=Max("updated_at")
+            )
+            .values()
+        )
+
+    def build(self, version: tuple):
+        rows = []
+        product_qs = Product.objects.filter(status=Product.Status.ACTIVE)
+        for pk, name in product_qs.values_list("pk", "name"):
+            words = name.split()
+            for i in range(len(words)):
+                rows.append((decompose(" ".join(words[i:])), i, pk, name))
+        rows.sort()
+
+        self.data = (
+            [key for key, *__ in rows],
+            [(pk, name) for __, __, pk, name in rows],
+        )
+        self.version = version
+
+    def is_fresh(self, cache_version: int) -> bool:
+        return (
+            self.version is not None
+            and self.version[0] == cache_version
+            and time.monotonic() - self.checked_at
+            < settings.MALL_AUTOCOMPLETE_CHECK_INTERVAL
+        )
+
+    def ensure_fresh(self):
+        cache_version = self.version_key.get()
+        if self.is_fresh(cache_version):
+            return
+
+        with self._lock:
+            if self.is_fresh(cache_version):
+                return
+            version = (cache_version, self.get_db_version())
+            if self.version != version:
+                self.build(version)
+            self.checked_at = time.monotonic()
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+        self.ensure_fresh()
+
+        key_prefix = decompose(" ".join(prefix.split()))
+        if not key_prefix:
+            return []
+
+        keys, entries = self.data
+        results = {}
+        i = bisect_left(keys, key_prefix)
+        while i < len(keys) and keys[i].startswith(key_prefix):
+            pk, name = entries[i]
+            results.setdefault(pk, name)
+            if len(results) >= limit:
+                break
+            i += 1
+        return list(results.items())
+
+
+product_name_index = ProductNameIndex()
@@ -0,0 +1,137 @@
+from hashlib import md5
+from typing import Callable, Optional
+
+from django.core.cache import cache
+
+
+class CacheVersion:
+    """
+    캐시 키에 포함시키는 버전 값. 버전을 올리면 이전 버전의 캐시 항목들은
+    더 이상 조회되지 않으며, 각자의 만료시간이 지나면 정리됩니다.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def get(self) -> int:
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, 1, timeout=None)
+            version = cache.get(self.key, 1)
+        return version
+
+    def incr(self):
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, 2, timeout=None)
+
+
+class CacheStats:
+    """캐시 적중/실패 횟수"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def _incr(self, name: str):
+        key = f"{self.prefix}:{name}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+
+    def hit(self):
+        self._incr("hits")
+
+    def miss(self):
+        self._incr("misses")
+
+    def get(self) -> dict:
+        hits = cache.get(f"{self.prefix}:hits", 0)
+        misses = cache.get(f"{self.prefix}:misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+    def reset(self):
+        cache.delete_many([f"{self.prefix}:hits", f"{self.prefix}:misses"])
+
+
+class ProductListCache:
+    """
+    상품목록 페이지에서 상품 카드/정렬/페이지 이동 영역의 렌더링 결과를 캐싱합니다.
+
+    사용자별 정보(로그인 상태, CSRF 토큰 등)는 포함하지 않으므로 모든 사용자가 공유하며,
+    상품/분류가 변경되면 signals에서 invalidate()를 호출하여 버전을 올립니다.
+    """
+
+    prefix = "mall:product_list"
+
+    def __init__(self):
+        self.version = CacheVersion(f"{self.prefix}:version")
+        self.stats = CacheStats(self.prefix)
+
+    def make_key(self, name: str, *parts) -> str:
+        digest = md5("\0".join(str(part) for part in parts).encode()).hexdigest()
+        return f"{self.prefix}:v{self.version.get()}:{name}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        html = cache.get(key)
+        if html is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return html
+
+    def set(self, key: str, html: str, timeout: int):
+        cache.set(key, html, timeout)
+
+    def invalidate(self):
+        self.version.incr()
+
+
+product_list_cache = ProductListCache()
+
+
+class CartSummaryCache:
+    """
+    장바구니별 요약 (상품 수, 총 수량, 총 금액)
+
+    장바구니를 변경하는 코드에서 invalidate()를 호출해야 합니다.
+    (upsert/bulk_update 등은 모델 시그널이 발생하지 않습니다.)
+    상품의 가격/상태가 바뀌거나 삭제되면 모든 장바구니의 요약이 바뀔 수 있으므로,
+    signals에서 invalidate_all()을 호출하여 버전을 올립니다.
+    """
+
+    prefix = "mall:cart_summary"
+
+    def __init__(self):
+        self.version = CacheVersion(f"{self.prefix}:version")
+        self.stats = CacheStats(self.prefix)
+
+    def make_key(self, cart_key) -> str:
+        return f"{self.prefix}:v{self.version.get()}:{cart_key}"
+
+    def get(self, cart_key, summary_func: Callable[[], dict], timeout: int) -> dict:
+        key = self.make_key(cart_key)
+        summary = cache.get(key)
+        if summary is None:
+            self.stats.miss()
+            summary = summary_func()
+            cache.set(key, summary, timeout)
+        else:
+            self.stats.hit()
+        return summary
+
+    def invalidate(self, cart_key):
+        cache.delete(self.make_key(cart_key))
+
+    def invalidate_all(self):
+        self.version.incr()
+
+
+cart_summary_cache = CartSummaryCache()
@@ -0,0 +1,191 @@
+from typing import Dict, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from mall.caches import cart_summary_cache
+from mall.models import CartProduct, Product
+
+
+class SessionCart:
+    """
+    로그인하지 않은 사용자의 장바구니
+
+    세션에는 장바구니 id만 저장하고, 상품별 수량은 캐시에 저장하므로
+    장바구니를 변경해도 DB에 쓰지 않습니다. 로그인 시에 merge()로 CartProduct에 합칩니다.
+    (로그인 시에 세션 키는 변경되지만, 세션 데이터는 유지됩니다.)
+    """
+
+    session_key = "mall_cart_id"
+
+    def __init__(self, session):
+        self.session = session
+
+    def get_cart_id(self, create: bool = False) -> Optional[str]:
+        cart_id = self.session.get(self.session_key)
+        if cart_id is None and create:
+            cart_id = uuid4().hex
+            self.session[self.session_key] = cart_id
+        return cart_id
+
+    # 동시에 담더라도 수량이 유실되지 않도록, 상품마다 수량 키를 두고 cache.add/incr로만 변경합니다.
+    # 담긴 상품 목록은 "size" 키로 순번을 발급하여 "slot:<순번>" 키에 상품 pk를 기록합니다.
+
+    @staticmethod
+    def make_key(cart_id: str, *parts) -> str:
+        return ":".join(["mall:cart", cart_id, *map(str, parts)])
+
+    def get_product_keys(self, cart_id: str) -> Dict[int, str]:
+        """{상품 pk: 수량 키}"""
+
+        size = cache.get(self.make_key(cart_id, "size"))
+        if not size:
+            return {}
+        slot_keys = [
+            self.make_key(cart_id, "slot", index) for index in range(1, size + 1)
+        ]
+        return {
+            product_id: self.make_key(cart_id, "product", product_id)
+            for product_id in cache.get_many(slot_keys).values()
+        }
+
+    def get_items(self) -> Dict[int, int]:
+        cart_id = self.get_cart_id()
+        if cart_id is None:
+            return {}
+        product_keys = self.get_product_keys(cart_id)
+        quantity_dict = cache.get_many(product_keys.values())
+        return {
+            product_id: quantity_dict[key]
+            for product_id, key in product_keys.items()
+            if key in quantity_dict
+        }
+
+    def add_quantities(self, quantity_dict: Dict[int, int]) -> Dict[int, int]:
+        """CartProductQuerySet.add_quantities와 같이, 상품별 최종 수량을 반환합니다."""
+
+        if not quantity_dict:
+            return {}
+
+        cart_id = self.get_cart_id(create=True)
+        timeout = settings.MALL_SESSION_CART_TIMEOUT
+        cart_quantity_dict = {}
+        for product_id, quantity in quantity_dict.items():
+            key = self.make_key(cart_id, "product", product_id)
+            while True:
+                if cache.add(key, quantity, timeout):
+                    self._add_slot(cart_id, product_id, timeout)
+                    cart_quantity_dict[product_id] = quantity
+                    break
+                try:
+                    cart_quantity_dict[product_id] = cache.incr(key, quantity)
+                    break
+                except ValueError:
+                    # add와 incr 사이에 키가 만료/삭제되었다면 다시 시도합니다.
+                    continue
+
+        cart_summary_cache.invalidate(f"session:{cart_id}")
+        return cart_quantity_dict
+
+    def _add_slot(self, cart_id: str, product_id: int, timeout: int):
+        size_key = self.make_key(cart_id, "size")
+        while True:
+            cache.add(size_key, 0, timeout)
+            try:
+                index = cache.incr(size_key)
+                break
+            except ValueError:
+                continue
+        cache.touch(size_key, timeout)
+        cache.set(self.make_key(cart_id, "slot", index), product_id, timeout)
+
+    def clear(self):
+        cart_id = self.get_cart_id()
+        if cart_id is not None:
+            size = cache.get(self.make_key(cart_id, "size")) or 0
+            cache.delete_many(
+                [
+                    self.make_key(cart_id, "size"),
+                    *self.get_product_keys(cart_id).values(),
+                    *[
+                        self.make_key(cart_id, "slot", index)
+                        for index in range(1, size + 1)
+                    ],
+                ]
+            )
+            cart_summary_cache.invalidate(f"session:{cart_id}")
+            del self.session[self.session_key]
+
+    def get_summary(self) -> Dict[str, int]:
+        cart_id = self.get_cart_id()
+        if cart_id is None:
+            return {"item_count": 0, "quantity": 0, "total_amount": 0}
+        return cart_summary_cache.get(
+            f"session:{cart_id}",
+            self._calculate_summary,
+            settings.MALL_CART_SUMMARY_CACHE_TIMEOUT,
+        )
+
+    def _calculate_summary(self) -> Dict[str, int]:
+        item_dict = self.get_items()
+        price_dict = dict(
+            Product.objects.filter(
+                pk__in=item_dict, status=Product.Status.ACTIVE
+            ).values_list("pk", "price")
+        )
+        item_dict = {
+            product_id: quantity
+            for product_id, quantity in item_dict.items()
+            if product_id in price_dict
+        }
+        return {
+            "item_count": len(item_dict),
+            "quantity": sum(item_dict.values()),
+            "total_amount": sum(
+                price_dict[product_id] * quantity
+                for product_id, quantity in item_dict.items()
+            ),
+        }
+
+    def merge(self, user) -> Dict[int, int]:
+        """판매중인 상품만 사용자의 장바구니에 한번에 더하고, 세션 장바구니를 비웁니다."""
+
+        item_dict = self.get_items()
+        if not item_dict:
+            return {}
+
+        product_pk_set = set(
+            Product.objects.filter(
+                pk__in=item_dict, status=Product.Status.ACTIVE
+            ).values_list("pk", flat=True)
+        )
+        cart_quantity_dict = CartProduct.objects.add_quantities(
+            user,
+            {
+                product_id: quantity
+                for product_id, quantity in item_dict.items()
+                if product_id in product_pk_set
+            },
+        )
+        self.clear()
+        return cart_quantity_dict
+
+
+def add_quantities(request, quantity_dict: Dict[int, int]) -> Dict[int, int]:
+    """로그인 여부에 따라 CartProduct 또는 세션 장바구니에 담습니다."""
+
+    if request.user.is_authenticated:
+        return CartProduct.objects.add_quantities(request.user, quantity_dict)
+    return SessionCart(request.session).add_quantities(quantity_dict)
+
+
+def get_cart_summary(request) -> Dict[str, int]:
+    if request.user.is_authenticated:
+        user = request.user
+        return cart_summary_cache.get(
+            user.pk,
+            lambda: CartProduct.objects.filter(user=user).summary(),
+            settings.MALL_CART_SUMMARY_CACHE_TIMEOUT,
+        )
+    return SessionCart(request.session).get_summary()
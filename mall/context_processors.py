@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
+from mall.carts import get_cart_summary
+
+
+def cart_summary(request):
+    # 템플릿에서 사용할 때에만 조회합니다.
+    return {
+        "cart_summary": SimpleLazyObject(lambda: get_cart_summary(request)),
+    }
@@ -19,7 +19,12 @@ def deny_from_untrusted_hosts(allowed_ip_list):
         @functools.wraps(view_function)
         def _wrapped_view(request, *args, **kwargs):
             ip = get_client_ip(request)
-            if ip not in allowed_ip_list:
+            # 설정 변경(테스트 등)이 반영되도록, 함수가 지정되면 요청마다 호출하여 목록을 얻습니다.
+            if callable(allowed_ip_list):
+                ip_list = allowed_ip_list()
+            else:
+                ip_list = allowed_ip_list
+            if ip not in ip_list:
                 return HttpResponseBadRequest("허용되지 않은 IP에서의 요청입니다.")
             return view_function(request, *args, **kwargs)
 
@@ -0,0 +1,338 @@
+"""
+로컬 부하 테스트/통합 테스트용 포트원 REST API 대역 서버
+
+실제 포트원 API 대신 PORTONE_API_URL에 지정하여 사용합니다. 결제창에서의 결제는
+POST /_fake/pay 요청으로 흉내내며, 결제/취소 시에 webhook_url로 웹훅 알림을 보냅니다.
+(웹훅을 받으려면 PORTONE_WEBHOOK_IPS에 서버 IP를 추가해야 합니다.)
+
+    with FakePortoneServer(latency=0.05, error_rate=0.01) as server:
+        with override_settings(PORTONE_API_URL=server.url):
+            ...
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+import requests
+
+
+logger = logging.getLogger("portone")
+
+
+class FakePortoneHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakePortoneServer"
+
+    routes = [
+        ("POST", re.compile(r"^/users/getToken$"), "get_token"),
+        ("GET", re.compile(r"^/payments/find/(?P<merchant_uid>[^/]+)$"), "find"),
+        ("GET", re.compile(r"^/payments/status/(?P<status>\w+)$"), "find_all"),
+        ("POST", re.compile(r"^/payments/cancel$"), "cancel"),
+        ("GET", re.compile(r"^/payments/(?P<imp_uid>[^/]+)$"), "find"),
+        ("POST", re.compile(r"^/_fake/pay$"), "pay"),
+    ]
+
+    def log_message(self, format, *args):
+        logger.debug("fake portone : " + format, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method: str):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self.send_result(HTTPStatus.NOT_FOUND, -1, "Not Found")
+
+        server = self.server
+        server.incr(name)
+        # 결제창 흉내 요청에는 지연/오류/인증을 적용하지 않습니다.
+        if name != "pay":
+            if server.latency > 0:
+                time.sleep(server.latency)
+            if server.error_rate > 0 and random.random() < server.error_rate:
+                server.incr("errors")
+                return self.send_result(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, -1, "Internal Server Error"
+                )
+            if name != "get_token" and not server.is_valid_token(
+                self.headers.get("Authorization")
+            ):
+                return self.send_result(HTTPStatus.UNAUTHORIZED, -1, "Unauthorized")
+
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return self.send_result(HTTPStatus.BAD_REQUEST, -1, "Invalid JSON")
+        params = {key: value[-1] for key, value in parse_qs(url.query).items()}
+
+        getattr(self, f"handle_{name}")(data=data, params=params, **match.groupdict())
+
+    def send_result(self, status: int, code: int, message=None, response=None):
+        body = json.dumps(
+            {"code": code, "message": message, "response": response}
+        ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_get_token(self, data, params):
+        now = int(time.time())
+        self.send_result(
+            HTTPStatus.OK,
+            0,
+            response={
+                "access_token": self.server.issue_token(),
+                "now": now,
+                "expired_at": now + self.server.token_lifetime,
+            },
+        )
+
+    def handle_find(self, data, params, merchant_uid=None, imp_uid=None):
+        payment = self.server.get_payment(merchant_uid=merchant_uid, imp_uid=imp_uid)
+        if payment is None:
+            return self.send_result(HTTPStatus.NOT_FOUND, -1, "존재하지 않는 결제정보입니다.")
+        self.send_result(HTTPStatus.OK, 0, response=payment)
+
+    def handle_find_all(self, data, params, status):
+        page = int(params.get("page", 1))
+        limit = min(int(params.get("limit", 20)), 100)
+        payment_list = self.server.find_payments(
+            status,
+            since=int(params["from"]) if "from" in params else None,
+            until=int(params["to"]) if "to" in params else None,
+            reverse=params.get("sorting", "-started") == "-started",
+        )
+        offset = (page - 1) * limit
+        self.send_result(
+            HTTPStatus.OK,
+            0,
+            response={
+                "total": len(payment_list),
+                "previous": page - 1,
+                "next": page + 1 if offset + limit < len(payment_list) else 0,
+                "list": payment_list[offset : offset + limit],
+            },
+        )
+
+    def handle_cancel(self, data, params):
+        payment = self.server.get_payment(
+            merchant_uid=data.get("merchant_uid"), imp_uid=data.get("imp_uid")
+        )
+        if payment is None:
+            return self.send_result(HTTPStatus.OK, 1, "취소할 결제건이 존재하지 않습니다.")
+        if payment["status"] != "paid":
+            return self.send_result(HTTPStatus.OK, 1, "이미 전액취소된 주문입니다.")
+        payment = self.server.cancel(payment["merchant_uid"], data.get("reason", ""))
+        self.send_result(HTTPStatus.OK, 0, response=payment)
+
+    def handle_pay(self, data, params):
+        if not data.get("merchant_uid") or "amount" not in data:
+            return self.send_result(
+                HTTPStatus.BAD_REQUEST, -1, "merchant_uid, amount 인자가 필요합니다."
+            )
+        payment = self.server.pay(**data)
+        self.send_result(HTTPStatus.OK, 0, response=payment)
+
+
+class FakePortoneServer(ThreadingHTTPServer):
+    """
+    포트원 REST API 대역 서버. 결제내역은 메모리에만 저장합니다.
+
+    - latency : 요청마다 지연시킬 시간 (초)
+    - error_rate : 500 오류로 응답할 확률 (0 ~ 1)
+    - webhook_url : 결제/취소 시에 웹훅 알림을 보낼 주소
+    - webhook_delay : 웹훅 알림을 보내기 전 지연시킬 시간 (초)
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+        error_rate: float = 0,
+        webhook_url: Optional[str] = None,
+        webhook_delay: float = 0,
+        token_lifetime: int = 60 * 30,
+    ):
+        super().__init__((host, port), FakePortoneHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.webhook_url = webhook_url
+        self.webhook_delay = webhook_delay
+        self.token_lifetime = token_lifetime
+
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._tokens = set()
+        self._payments: Dict[str, dict] = {}
+        self._imp_uids: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._webhook_threads: List[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakePortoneServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.join_webhooks()
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def incr(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def issue_token(self) -> str:
+        token = uuid4().hex
+        with self._lock:
+            self._tokens.add(token)
+        return token
+
+    def is_valid_token(self, token: Optional[str]) -> bool:
+        return token in self._tokens
+
+    def revoke_tokens(self):
+        """발급한 토큰을 모두 폐기합니다. (만료 전 토큰 폐기 상황 테스트용)"""
+        with self._lock:
+            self._tokens.clear()
+
+    def get_payment(self, merchant_uid=None, imp_uid=None) -> Optional[dict]:
+        with self._lock:
+            if merchant_uid is None:
+                merchant_uid = self._imp_uids.get(imp_uid)
+            payment = self._payments.get(merchant_uid)
+            return dict(payment) if payment else None
+
+    def find_payments(self, status: str, since=None, until=None, reverse=True):
+        with self._lock:
+            payment_list = [
+                dict(payment)
+                for payment in self._payments.values()
+                if (status == "all" or payment["status"] == status)
+                and (since is None or payment["started_at"] >= since)
+                and (until is None or payment["started_at"] <= until)
+            ]
+        payment_list.sort(key=lambda payment: payment["started_at"], reverse=reverse)
+        return payment_list
+
+    def pay(
+        self, merchant_uid: str, amount: int, status: str = "paid", **kwargs
+    ) -> dict:
+        """결제창에서의 결제를 흉내냅니다. 결제 후에 웹훅 알림을 보냅니다."""
+
+        now = int(time.time())
+        with self._lock:
+            payment = self._payments.get(merchant_uid)
+            if payment is None:
+                payment = {
+                    "imp_uid": f"imp_{uuid4().hex[:12]}",
+                    "merchant_uid": merchant_uid,
+                    "pay_method": "card",
+                    "cancel_amount": 0,
+                    "started_at": now,
+                    "paid_at": 0,
+                    "failed_at": 0,
+                    "cancelled_at": 0,
+                }
+                self._payments[merchant_uid] = payment
+                self._imp_uids[payment["imp_uid"]] = merchant_uid
+            payment.update(
+                {
+                    key: kwargs[key]
+                    for key in ("name", "buyer_name", "buyer_email")
+                    if key in kwargs
+                }
+            )
+            payment["amount"] = int(amount)
+            payment["status"] = status
+            if status == "paid":
+                payment["paid_at"] = now
+            elif status == "failed":
+                payment["failed_at"] = now
+            payment = dict(payment)
+
+        self.send_webhook(payment)
+        return payment
+
+    def cancel(self, merchant_uid: str, reason: str = "") -> dict:
+        with self._lock:
+            payment = self._payments[merchant_uid]
+            payment["status"] = "cancelled"
+            payment["cancel_amount"] = payment["amount"]
+            payment["cancel_reason"] = reason
+            payment["cancelled_at"] = int(time.time())
+            payment = dict(payment)
+
+        self.send_webhook(payment)
+        return payment
+
+    def send_webhook(self, payment: dict):
+        if not self.webhook_url:
+            return
+
+        def send():
+            if self.webhook_delay > 0:
+                time.sleep(self.webhook_delay)
+            try:
+                requests.post(
+                    self.webhook_url,
+                    json={
+                        "imp_uid": payment["imp_uid"],
+                        "merchant_uid": payment["merchant_uid"],
+                        "status": payment["status"],
+                    },
+                    timeout=10,
+                )
+                self.incr("webhooks")
+            except requests.RequestException as e:
+                self.incr("webhook_errors")
+                logger.warning("fake portone webhook : %s", e)
+
+        thread = threading.Thread(target=send, daemon=True)
+        with self._lock:
+            self._webhook_threads = [t for t in self._webhook_threads if t.is_alive()]
+            self._webhook_threads.append(thread)
+        thread.start()
+
+    def join_webhooks(self, timeout: Optional[float] = None):
+        """보내는 중인 웹훅 알림이 모두 전송될 때까지 기다립니다."""
+        with self._lock:
+            thread_list = list(self._webhook_threads)
+        for thread in thread_list:
+            thread.join(timeout)
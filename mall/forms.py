@@ -1,4 +1,8 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms import BaseModelFormSet
+
 from .models import CartProduct
 
 
@@ -6,3 +10,91 @@ class CartProductForm(forms.ModelForm):
     class Meta:
         model = CartProduct
         fields = ["quantity"]
+
+
+class ExistingObjectChoiceField(forms.ModelChoiceField):
+    """formset에서 조회해둔 객체 목록에서 찾아, 폼마다 pk로 조회하지 않습니다."""
+
+    def __init__(self, formset: "BulkModelFormSet", *args, **kwargs):
+        self.formset = formset
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            pk = self.queryset.model._meta.pk.to_python(value)
+        except ValidationError:
+            pk = None
+        obj = self.formset._existing_object(pk) if pk is not None else None
+        if obj is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return obj
+
+
+class BulkModelFormSet(BaseModelFormSet):
+    """
+    변경된 폼들은 bulk_update 1번, 삭제할 폼들은 DELETE 1번으로 한 트랜잭션에서 저장합니다.
+    폼 수와 무관하게 저장 쿼리 수가 일정하지만, 모델의 save/delete 메서드와
+    pre_save/post_save 등의 시그널은 호출되지 않습니다.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self._pk_field.name
+        field = form.fields[pk_name]
+        if type(field) is forms.ModelChoiceField:
+            form.fields[pk_name] = ExistingObjectChoiceField(
+                self,
+                field.queryset,
+                initial=field.initial,
+                required=False,
+                widget=field.widget,
+            )
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+
+        self.changed_objects = []
+        self.deleted_objects = []
+        self.new_objects = []
+        update_fields = set()
+
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                self.deleted_objects.append(obj)
+            elif form.has_changed():
+                self.changed_objects.append(
+                    (form.save(commit=False), form.changed_data)
+                )
+                update_fields.update(
+                    name for name in form.changed_data if name in form._meta.fields
+                )
+
+        for form in self.extra_forms:
+            if not form.has_changed():
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                continue
+            self.new_objects.append(form.save(commit=False))
+
+        manager = self.model._default_manager
+        with transaction.atomic(using=manager.db):
+            if self.deleted_objects:
+                manager.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+            if self.changed_objects and update_fields:
+                manager.bulk_update(
+                    [obj for obj, __ in self.changed_objects], list(update_fields)
+                )
+            if self.new_objects:
+                manager.bulk_create(self.new_objects)
+
+        return [obj for obj, __ in self.changed_objects] + self.new_objects
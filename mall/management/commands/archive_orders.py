@@ -0,0 +1,116 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from mall.models import ArchivedOrder, Order, OrderedProduct, OrderPayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered/cancelled orders older than N days, with their items and "
+        "payments, into the archive tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.MALL_ORDER_ARCHIVE_DAYS,
+            help="마지막 상태변경 후 지정 일수가 지난 주문을 옮깁니다.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="옮길 주문 수만 출력합니다.")
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="보관 전후의 주문 테이블 조회 시간을 측정합니다.",
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="측정 쿼리별 반복 횟수")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        # 오래된 주문일수록 pk가 작으므로, pk 순으로 조회하면 앞쪽에서 바로 찾아집니다.
+        order_qs = Order.objects.filter(
+            status__in=ArchivedOrder.ARCHIVABLE_STATUSES, updated_at__lt=cutoff
+        ).order_by("pk")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{order_qs.count()}개의 주문을 옮길 수 있습니다.")
+            return
+
+        if options["benchmark"]:
+            query_dict = self.get_benchmark_queries()
+            before = self.run_benchmark(query_dict, options["repeat"])
+
+        total = 0
+        started = time.perf_counter()
+        while True:
+            pk_list = list(
+                order_qs.values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not pk_list:
+                break
+            count = ArchivedOrder.archive(pk_list)
+            if count == 0:
+                break
+            total += count
+            self.stdout.write(f"{total}개의 주문을 옮겼습니다.")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{total}개의 주문을 보관 테이블로 옮겼습니다. ({elapsed:.2f}s)")
+        )
+
+        if options["benchmark"]:
+            after = self.run_benchmark(query_dict, options["repeat"])
+            self.stdout.write(f"{'query':<24} {'before(ms)':>12} {'after(ms)':>12}")
+            for label in query_dict:
+                self.stdout.write(
+                    f"{label:<24} {before[label]:>12.3f} {after[label]:>12.3f}"
+                )
+
+    def get_benchmark_queries(self) -> dict:
+        # 보관 대상이 아닌 최근 주문/결제를 기준으로, 보관 전후에 같은 조회를 수행합니다.
+        query_dict = {
+            "order count": lambda: Order.objects.count(),
+            "ordered product count": lambda: OrderedProduct.objects.count(),
+            "paid order count": lambda: Order.objects.filter(
+                status=Order.Status.PAID
+            ).count(),
+        }
+
+        latest_order = Order.objects.order_by("-pk").first()
+        if latest_order is not None:
+            query_dict["order list page"] = lambda: list(
+                Order.objects.filter(
+                    user=latest_order.user_id, status=latest_order.status
+                ).order_by("-pk")[:21]
+            )
+
+        latest_payment = OrderPayment.objects.order_by("-pk").first()
+        if latest_payment is not None:
+            query_dict["webhook payment lookup"] = lambda: OrderPayment.objects.get(
+                uid=latest_payment.uid
+            )
+
+        return query_dict
+
+    def run_benchmark(self, query_dict: dict, repeat: int) -> dict:
+        self.stdout.write(
+            f"orders={Order.objects.count()} "
+            f"ordered_products={OrderedProduct.objects.count()} "
+            f"payments={OrderPayment.objects.count()}"
+        )
+        result = {}
+        for label, func in query_dict.items():
+            elapsed_list = []
+            for __ in range(repeat):
+                started = time.perf_counter()
+                func()
+                elapsed_list.append((time.perf_counter() - started) * 1000)
+            result[label] = statistics.median(elapsed_list)
+        return result
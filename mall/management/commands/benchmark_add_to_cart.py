@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Sum
+
+from accounts.models import User
+from mall.models import CartProduct, Product
+
+
+def get_or_create_add(user, product_id: int, quantity: int):
+    # 기존 add_to_cart 뷰의 구현 : 조회 후 수량을 더해 저장합니다.
+    cart_product, is_created = CartProduct.objects.get_or_create(
+        user=user,
+        product_id=product_id,
+        defaults={"quantity": quantity},
+    )
+    if not is_created:
+        cart_product.quantity += quantity
+        cart_product.save()
+
+
+def upsert_add(user, product_id: int, quantity: int):
+    CartProduct.objects.add_quantities(user, {product_id: quantity})
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent add-to-cart throughput: get_or_create+save vs. upsert."
+
+    username = "add-to-cart-benchmark"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=100, help="쓰레드별 요청 수")
+        parser.add_argument("--products", type=int, default=3, help="담을 상품 수")
+
+    def handle(self, *args, **options):
+        product_id_list = list(
+            Product.objects.filter(status=Product.Status.ACTIVE).values_list(
+                "pk", flat=True
+            )[: options["products"]]
+        )
+        if not product_id_list:
+            raise CommandError("판매중인 상품이 없습니다.")
+
+        user, __ = User.objects.get_or_create(username=self.username)
+        self.stdout.write(
+            f"vendor={connection.vendor} threads={options['threads']} "
+            f"requests={options['requests']} products={len(product_id_list)}"
+        )
+        try:
+            for label, func in (
+                ("get_or_create", get_or_create_add),
+                ("upsert", upsert_add),
+            ):
+                self.run(label, func, user, product_id_list, options)
+        finally:
+            user.delete()
+
+    def run(self, label, func, user, product_id_list, options):
+        CartProduct.objects.filter(user=user).delete()
+
+        lock = threading.Lock()
+        result = {"ok": 0, "error": 0}
+        start_event = threading.Event()
+
+        def worker():
+            ok = error = 0
+            try:
+                start_event.wait()
+                for __ in range(options["requests"]):
+                    try:
+                        func(user, random.choice(product_id_list), 1)
+                        ok += 1
+                    except DatabaseError:
+                        # 동시 INSERT로 인한 IntegrityError, SQLite의 database is locked 등
+                        error += 1
+            finally:
+                close_old_connections()
+                with lock:
+                    result["ok"] += ok
+                    result["error"] += error
+
+        thread_list = [
+            threading.Thread(target=worker) for __ in range(options["threads"])
+        ]
+        for thread in thread_list:
+            thread.start()
+        started = time.perf_counter()
+        start_event.set()
+        for thread in thread_list:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = (
+            CartProduct.objects.filter(user=user).aggregate(total=Sum("quantity"))[
+                "total"
+            ]
+            or 0
+        )
+        lost = result["ok"] - total
+        self.stdout.write(
+            f"{label:>14} : {result['ok'] / elapsed:8.1f} req/s "
+            f"ok={result['ok']} error={result['error']} "
+            f"quantity={total} lost={lost}"
+        )
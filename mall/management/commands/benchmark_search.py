@@ -0,0 +1,52 @@
+import time
+from statistics import median
+
+from django.core.management import BaseCommand
+
+from mall.models import Product
+from mall.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Compare product search latency: name__icontains vs. the search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("query", nargs="+")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=20, help="조회할 상품 수")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        qs = Product.objects.filter(status=Product.Status.ACTIVE)
+        self.stdout.write(
+            f"backend={backend.__class__.__name__} products={qs.count()} "
+            f"repeat={options['repeat']}"
+        )
+
+        for query in options["query"]:
+            icontains_qs = qs.filter(name__icontains=query).order_by("-pk")
+            search_qs = backend.search(qs, query).order_by("-search_rank", "-pk")
+
+            for label, target_qs in (
+                ("icontains", icontains_qs),
+                ("search", search_qs),
+            ):
+                timings, size = self.measure(
+                    target_qs, options["repeat"], options["limit"]
+                )
+                self.stdout.write(
+                    f"{query!r:>20} {label:>10} : "
+                    f"median {median(timings) * 1000:8.3f}ms "
+                    f"max {max(timings) * 1000:8.3f}ms "
+                    f"({size} hits)"
+                )
+
+    @staticmethod
+    def measure(qs, repeat: int, limit: int):
+        timings = []
+        size = 0
+        for __ in range(repeat):
+            started = time.perf_counter()
+            size = len(list(qs.values_list("pk", flat=True)[:limit]))
+            timings.append(time.perf_counter() - started)
+        return timings, size
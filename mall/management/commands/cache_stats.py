@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from mall.caches import cart_summary_cache, product_list_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the mall caches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true")
+
+    def get_caches(self) -> dict:
+        return {
+            "product_list": product_list_cache.stats,
+            "cart_summary": cart_summary_cache.stats,
+        }
+
+    def handle(self, *args, **options):
+        for name, stats in self.get_caches().items():
+            self.stdout.write(
+                "{name:>20} : hits={hits} misses={misses} hit_ratio={hit_ratio:.1%}".format(
+                    name=name, **stats.get()
+                )
+            )
+            if options["reset"]:
+                stats.reset()
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from django.core.management import BaseCommand
+from django.db import OperationalError, close_old_connections
+from django.db.models import Sum
+
+from accounts.models import User
+from mall.models import (
+    CartProduct,
+    Category,
+    EmptyCartError,
+    Order,
+    OutOfStockError,
+    Product,
+    StockReservation,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a flash sale: concurrent checkouts of a product with limited stock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=300)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--quantity", type=int, default=1, help="구매자별 주문 수량")
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=30,
+            help="SQLite의 database is locked 등 일시적인 오류 시의 재시도 횟수",
+        )
+        parser.add_argument("--keep", action="store_true", help="생성한 데이터를 남겨둡니다.")
+
+    def handle(self, *args, **options):
+        prefix = f"flash-sale-{uuid4().hex[:8]}"
+        category = Category.objects.create(name=prefix)
+        product = Product.objects.create(
+            category=category,
+            name=prefix,
+            price=1000,
+            status=Product.Status.ACTIVE,
+            stock=options["stock"],
+        )
+        User.objects.bulk_create(
+            [User(username=f"{prefix}-{i}") for i in range(options["buyers"])]
+        )
+        user_list = list(User.objects.filter(username__startswith=f"{prefix}-"))
+        CartProduct.objects.bulk_create(
+            [
+                CartProduct(user=user, product=product, quantity=options["quantity"])
+                for user in user_list
+            ]
+        )
+
+        lock = threading.Lock()
+        result = {"created": 0, "out_of_stock": 0, "error": 0, "retried": 0}
+
+        def buy(user):
+            try:
+                for attempt in range(options["retries"] + 1):
+                    try:
+                        Order.create_from_cart(
+                            user, CartProduct.objects.filter(user=user)
+                        )
+                        key = "created"
+                    except (OutOfStockError, EmptyCartError):
+                        key = "out_of_stock"
+                    except OperationalError:
+                        if attempt < options["retries"]:
+                            with lock:
+                                result["retried"] += 1
+                            time.sleep(random.uniform(0, 0.01 * (attempt + 1)))
+                            continue
+                        key = "error"
+                    with lock:
+                        result[key] += 1
+                    return
+            finally:
+                close_old_connections()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            list(executor.map(buy, user_list))
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        reserved = (
+            StockReservation.objects.filter(product=product).aggregate(
+                total=Sum("quantity")
+            )["total"]
+            or 0
+        )
+        sold = result["created"] * options["quantity"]
+        oversold = max(sold - options["stock"], 0)
+
+        self.stdout.write(
+            f"buyers={len(user_list)} stock={options['stock']} "
+            f"threads={options['threads']} elapsed={elapsed:.2f}s "
+            f"({len(user_list) / elapsed:.1f} checkouts/s)"
+        )
+        self.stdout.write(
+            f"created={result['created']} out_of_stock={result['out_of_stock']} "
+            f"error={result['error']} retried={result['retried']}"
+        )
+        self.stdout.write(
+            f"sold={sold} reserved={reserved} remaining_stock={product.stock} "
+            f"status={product.get_status_display()}"
+        )
+        style = self.style.SUCCESS if oversold == 0 else self.style.ERROR
+        self.stdout.write(style(f"oversold={oversold}"))
+
+        if not options["keep"]:
+            Order.objects.filter(user__in=user_list).delete()
+            User.objects.filter(pk__in=[user.pk for user in user_list]).delete()
+            product.delete()
+            category.delete()
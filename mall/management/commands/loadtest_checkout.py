@@ -0,0 +1,393 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from importlib import import_module
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+from uuid import uuid4
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from accounts.models import User
+from mall.fake_portone import FakePortoneServer
+from mall.models import Category, Order, Product
+
+
+STEPS = ["add_to_cart", "order_new", "order_pay", "order_check", "portone_webhook"]
+
+
+class StepFailed(Exception):
+    pass
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(sorted_list: List[float], p: float) -> Optional[float]:
+    if not sorted_list:
+        return None
+    index = max(math.ceil(p / 100 * len(sorted_list)) - 1, 0)
+    return sorted_list[index]
+
+
+class StepRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.elapsed = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, step: str, elapsed: float, query_count: Optional[str], ok: bool):
+        with self._lock:
+            self.elapsed[step].append(elapsed * 1000)
+            if query_count is not None:
+                self.queries[step].append(int(query_count))
+            if not ok:
+                self.errors[step] += 1
+
+    def get_stats(self) -> Dict[str, dict]:
+        stats = {}
+        for step in STEPS:
+            elapsed_list = sorted(self.elapsed[step])
+            query_list = self.queries[step]
+            stats[step] = {
+                "count": len(elapsed_list),
+                "errors": self.errors[step],
+                "p50": percentile(elapsed_list, 50),
+                "p95": percentile(elapsed_list, 95),
+                "p99": percentile(elapsed_list, 99),
+                "mean": sum(elapsed_list) / len(elapsed_list) if elapsed_list else None,
+                "max": elapsed_list[-1] if elapsed_list else None,
+                "queries_mean": (
+                    sum(query_list) / len(query_list) if query_list else None
+                ),
+                "queries_max": max(query_list) if query_list else None,
+            }
+        return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the checkout flow (add_to_cart -> order_new -> order_pay -> "
+        "order_check -> portone_webhook) with concurrent synthetic users and "
+        "report latency percentiles and query counts per step."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="동시 사용자 수")
+        parser.add_argument("--checkouts", type=int, default=5, help="사용자별 주문 횟수")
+        parser.add_argument("--items", type=int, default=3, help="주문별 상품 수")
+        parser.add_argument(
+            "--base-url",
+            help=(
+                "부하를 줄 쇼핑몰 서버 주소 (ex: http://127.0.0.1:8000/). "
+                "지정하지 않으면 이 프로세스에서 쇼핑몰 서버와 포트원 대역 서버를 실행합니다."
+            ),
+        )
+        parser.add_argument(
+            "--portone-url",
+            help="--base-url 지정 시, 쇼핑몰 서버가 사용하는 포트원 대역 서버 주소 (run_fake_portone)",
+        )
+        parser.add_argument(
+            "--portone-latency", type=float, default=0, help="포트원 대역 서버의 응답 지연시간 (초)"
+        )
+        parser.add_argument("--output", help="결과를 저장할 JSON 파일 경로")
+        parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일 경로")
+        parser.add_argument("--keep", action="store_true", help="생성한 데이터를 남겨둡니다.")
+
+    def handle(self, *args, **options):
+        if options["base_url"] and not options["portone_url"]:
+            raise CommandError("--base-url 지정 시에는 --portone-url도 지정해주세요.")
+
+        prefix = f"loadtest-{uuid4().hex[:8]}"
+        category = Category.objects.create(name=prefix)
+        product_list = Product.objects.bulk_create(
+            [
+                Product(
+                    category=category,
+                    name=f"{prefix}-{i}",
+                    price=1000 * (i + 1),
+                    status=Product.Status.ACTIVE,
+                )
+                for i in range(options["items"])
+            ]
+        )
+        User.objects.bulk_create(
+            [User(username=f"{prefix}-{i}") for i in range(options["users"])]
+        )
+        user_list = list(User.objects.filter(username__startswith=f"{prefix}-"))
+        session_key_list = [self.create_session(user) for user in user_list]
+
+        try:
+            with ExitStack() as stack:
+                if options["base_url"]:
+                    base_url = options["base_url"]
+                    portone_url = options["portone_url"]
+                    self.stdout.write(
+                        "쇼핑몰 서버를 MALL_QUERY_COUNT_HEADER=1 환경변수로 실행하고, "
+                        "PORTONE_WEBHOOK_IPS에 이 호스트의 IP를 추가해주세요."
+                    )
+                else:
+                    base_url, portone_url = self.start_servers(stack, options)
+
+                recorder = StepRecorder()
+                result = {"checkouts": 0, "failed": 0}
+                lock = threading.Lock()
+
+                def run_user(session_key):
+                    checkouts, failed = self.run_user(
+                        base_url,
+                        portone_url,
+                        session_key,
+                        product_list,
+                        recorder,
+                        options,
+                    )
+                    with lock:
+                        result["checkouts"] += checkouts
+                        result["failed"] += failed
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["users"]) as executor:
+                    list(executor.map(run_user, session_key_list))
+                elapsed = time.perf_counter() - started
+
+            paid_count = Order.objects.filter(
+                user__in=user_list, status=Order.Status.PAID
+            ).count()
+        finally:
+            if not options["keep"]:
+                self.cleanup(user_list, session_key_list, product_list, category)
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "config": {
+                key: options[key]
+                for key in ("users", "checkouts", "items", "portone_latency")
+            },
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "elapsed": elapsed,
+            "checkouts": result["checkouts"],
+            "failed": result["failed"],
+            "paid_orders": paid_count,
+            "checkouts_per_sec": result["checkouts"] / elapsed if elapsed else 0,
+            "steps": recorder.get_stats(),
+        }
+        self.print_report(report)
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                self.print_comparison(json.load(f), report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"결과를 {options['output']}에 저장했습니다.")
+
+    def create_session(self, user: User) -> str:
+        # 로그인 요청 없이, 로그인된 세션을 직접 생성합니다. (Client.force_login과 같은 방식)
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def start_servers(self, stack: ExitStack, options) -> tuple:
+        fake_server = stack.enter_context(
+            FakePortoneServer(latency=options["portone_latency"])
+        )
+
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietWSGIRequestHandler)
+        server.daemon_threads = True
+        server.set_app(WSGIHandler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stack.callback(server.server_close)
+        stack.callback(server.shutdown)
+
+        host, port = server.server_address[:2]
+        stack.enter_context(
+            override_settings(
+                DEBUG=False,
+                ALLOWED_HOSTS=[host],
+                PORTONE_API_URL=fake_server.url,
+                PORTONE_WEBHOOK_IPS=[host],
+                MALL_QUERY_COUNT_HEADER=True,
+            )
+        )
+        return f"http://{host}:{port}/", fake_server.url
+
+    def run_user(
+        self,
+        base_url: str,
+        portone_url: str,
+        session_key: str,
+        product_list: List[Product],
+        recorder: StepRecorder,
+        options,
+    ) -> tuple:
+        csrf_token = get_random_string(32)
+        session = requests.Session()
+        session.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+        session.cookies.set(settings.CSRF_COOKIE_NAME, csrf_token)
+        session.headers["X-CSRFToken"] = csrf_token
+        # 포트원 결제창과 포트원 웹훅 요청은 쇼핑몰 세션 없이 보냅니다.
+        portone_session = requests.Session()
+
+        def request(
+            step: str, method: str, path: str, expected_url_name: str = "", **kwargs
+        ):
+            started = time.perf_counter()
+            try:
+                response = portone_session if step == "portone_webhook" else session
+                response = response.request(
+                    method,
+                    urljoin(base_url, path),
+                    allow_redirects=False,
+                    timeout=30,
+                    **kwargs,
+                )
+            except requests.RequestException as e:
+                recorder.record(step, time.perf_counter() - started, None, ok=False)
+                raise StepFailed(f"{step} : {e}")
+
+            if expected_url_name:
+                location = response.headers.get("Location", "")
+                ok = (
+                    response.status_code == 302
+                    and resolve(urlparse(location).path).url_name == expected_url_name
+                )
+            else:
+                ok = response.status_code == 200
+            recorder.record(
+                step,
+                time.perf_counter() - started,
+                response.headers.get("X-Query-Count"),
+                ok=ok,
+            )
+            if not ok:
+                raise StepFailed(f"{step} : {response.status_code}")
+            return response
+
+        checkouts = failed = 0
+        for __ in range(options["checkouts"]):
+            try:
+                for product in product_list:
+                    request(
+                        "add_to_cart", "POST", reverse("add_to_cart", args=[product.pk])
+                    )
+
+                response = request(
+                    "order_new",
+                    "GET",
+                    reverse("order_new"),
+                    expected_url_name="order_pay",
+                )
+                response = request("order_pay", "GET", response.headers["Location"])
+                match = re.search(
+                    r'<script id="payment-props" type="application/json">(.*?)</script>',
+                    response.text,
+                )
+                if match is None:
+                    raise StepFailed("order_pay : 결제정보를 찾을 수 없습니다.")
+                payment_props = json.loads(match.group(1))
+
+                # 결제창에서의 결제
+                response = portone_session.post(
+                    urljoin(portone_url, "_fake/pay"),
+                    json={
+                        "merchant_uid": payment_props["merchant_uid"],
+                        "amount": payment_props["amount"],
+                        "name": payment_props["name"],
+                    },
+                    timeout=30,
+                )
+                response.raise_for_status()
+                imp_uid = response.json()["response"]["imp_uid"]
+
+                request(
+                    "order_check",
+                    "GET",
+                    urlparse(payment_props["m_redirect_url"]).path,
+                    expected_url_name="order_detail",
+                )
+                request(
+                    "portone_webhook",
+                    "POST",
+                    reverse("webhook"),
+                    json={
+                        "imp_uid": imp_uid,
+                        "merchant_uid": payment_props["merchant_uid"],
+                        "status": "paid",
+                    },
+                )
+                checkouts += 1
+            except (StepFailed, requests.RequestException) as e:
+                self.stderr.write(str(e))
+                failed += 1
+        return checkouts, failed
+
+    def cleanup(self, user_list, session_key_list, product_list, category):
+        engine = import_module(settings.SESSION_ENGINE)
+        for session_key in session_key_list:
+            engine.SessionStore(session_key).delete()
+        Order.objects.filter(user__in=user_list).delete()
+        User.objects.filter(pk__in=[user.pk for user in user_list]).delete()
+        Product.objects.filter(pk__in=[product.pk for product in product_list]).delete()
+        category.delete()
+
+    def print_report(self, report: dict):
+        self.stdout.write(
+            f"checkouts={report['checkouts']} failed={report['failed']} "
+            f"paid_orders={report['paid_orders']} elapsed={report['elapsed']:.2f}s "
+            f"({report['checkouts_per_sec']:.1f} checkouts/s)"
+        )
+        self.stdout.write(
+            f"{'step':<16} {'count':>6} {'errors':>6} {'p50(ms)':>9} {'p95(ms)':>9} "
+            f"{'p99(ms)':>9} {'queries':>8}"
+        )
+        for step, stats in report["steps"].items():
+            if not stats["count"]:
+                continue
+            queries = (
+                f"{stats['queries_mean']:.1f}"
+                if stats["queries_mean"] is not None
+                else "-"
+            )
+            self.stdout.write(
+                f"{step:<16} {stats['count']:>6} {stats['errors']:>6} "
+                f"{stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} "
+                f"{queries:>8}"
+            )
+
+    def print_comparison(self, baseline: dict, report: dict):
+        self.stdout.write(
+            f"throughput: {baseline['checkouts_per_sec']:.1f} -> "
+            f"{report['checkouts_per_sec']:.1f} checkouts/s"
+        )
+        for step, stats in report["steps"].items():
+            before = baseline["steps"].get(step) or {}
+            if not stats["count"] or not before.get("count"):
+                continue
+            self.stdout.write(
+                f"{step:<16} p95 {before['p95']:>9.1f} -> {stats['p95']:>9.1f} ms "
+                f"({(stats['p95'] - before['p95']) / before['p95']:+.0%}), "
+                f"queries {before['queries_mean']} -> {stats['queries_mean']}"
+            )
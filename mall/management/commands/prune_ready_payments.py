@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+from iamport import Iamport
+
+from mall.models import OrderPayment
+from mall.portone import get_portone_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete abandoned READY payments that were never verified, in batches, "
+        "after checking that PortOne does not know them or reports them as ready."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--age",
+            type=int,
+            default=settings.MALL_PAYMENT_PRUNE_AGE,
+            help="생성 후 지정 시간(초)이 지난 결제준비 건을 삭제합니다.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="삭제할 결제 수만 출력합니다.")
+
+    def handle(self, *args, **options):
+        # 결제확인 요청과 웹훅이 모두 유실된 결제도 verified_at이 비어 있으므로,
+        # 삭제하기 전에 포트원에서 조회하여 결제창을 열지 않았거나 결제준비 상태인 결제만 삭제합니다.
+        payment_qs = OrderPayment.objects.filter(
+            pay_status=OrderPayment.PayStatus.READY,
+            verified_at__isnull=True,
+            created_at__lt=timezone.now() - timedelta(seconds=options["age"]),
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{payment_qs.count()}개의 결제를 포트원에서 확인 후 삭제할 수 있습니다.")
+            return
+
+        api = get_portone_client()
+        total = reconciled = skipped = 0
+        last_pk = 0
+        while True:
+            payment_list = list(
+                payment_qs.filter(pk__gt=last_pk).order_by("pk")[
+                    : options["batch_size"]
+                ]
+            )
+            if not payment_list:
+                break
+            last_pk = payment_list[-1].pk
+
+            prune_pk_list = []
+            meta_list = []
+            fetched_at = timezone.now()
+            for payment in payment_list:
+                try:
+                    meta = api.find(merchant_uid=payment.merchant_uid)
+                except Iamport.HttpError as e:
+                    # 포트원에 없는 결제만 삭제하고, 일시적인 오류라면 다음 실행에서 다시 확인합니다.
+                    if e.code == 404:
+                        prune_pk_list.append(payment.pk)
+                    else:
+                        skipped += 1
+                    continue
+                except Iamport.ResponseError:
+                    skipped += 1
+                    continue
+
+                if meta["status"] == OrderPayment.PayStatus.READY:
+                    prune_pk_list.append(payment.pk)
+                else:
+                    meta_list.append(meta)
+
+            # 포트원에서 결제/취소/실패된 결제는 삭제하지 않고 결제상태를 반영합니다.
+            if meta_list:
+                reconciled += OrderPayment.reconcile(meta_list, fetched_at)[1]
+
+            # 조회 이후에 웹훅 등으로 확인된 결제는 제외하고 삭제합니다.
+            count, __ = payment_qs.filter(pk__in=prune_pk_list).delete()
+            total += count
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total}개의 결제준비 건을 삭제했습니다. "
+                f"(결제상태 반영 {reconciled}건, 조회 실패 {skipped}건)"
+            )
+        )
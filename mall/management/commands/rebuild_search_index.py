@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+
+from mall.models import Product
+from mall.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild(Product.objects.all(), batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{backend.__class__.__name__} : {count}개의 상품을 색인했습니다.")
+        )
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from mall.models import OrderPayment
+from mall.portone import get_portone_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile local payments with PortOne in bulk, paging through the "
+        "payment list API by status and time range."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[
+                OrderPayment.PayStatus.PAID,
+                OrderPayment.PayStatus.CANCELLED,
+                OrderPayment.PayStatus.FAILED,
+            ],
+            help="조회할 결제상태 (여러 번 지정 가능, 디폴트: 결제완료/취소/실패)",
+        )
+        parser.add_argument(
+            "--since",
+            type=int,
+            default=60 * 60 * 24,
+            help="지정 시간(초) 전부터의 결제내역을 조회합니다.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=100, help="페이지당 결제내역 수 (최대 100)"
+        )
+
+    def handle(self, *args, **options):
+        status_list = options["status"] or [
+            OrderPayment.PayStatus.PAID,
+            OrderPayment.PayStatus.CANCELLED,
+            OrderPayment.PayStatus.FAILED,
+        ]
+        until = time.time()
+        since = until - options["since"]
+        client = get_portone_client()
+
+        total = {"pages": 0, "fetched": 0, "matched": 0, "updated": 0}
+        started = time.perf_counter()
+        for status in status_list:
+            counts = dict.fromkeys(total, 0)
+            page_iter = client.find_all_by_status(
+                status, since=since, until=until, limit=options["limit"]
+            )
+            while True:
+                # 페이지를 조회하는 동안 다른 요청에서 더 나중에 확인한 결제는 덮어쓰지 않습니다.
+                fetched_at = timezone.now()
+                meta_list = next(page_iter, None)
+                if meta_list is None:
+                    break
+                matched, updated = OrderPayment.reconcile(meta_list, fetched_at)
+                counts["pages"] += 1
+                counts["fetched"] += len(meta_list)
+                counts["matched"] += matched
+                counts["updated"] += updated
+            self.stdout.write(
+                f"{status}: pages={counts['pages']} fetched={counts['fetched']} "
+                f"matched={counts['matched']} updated={counts['updated']}"
+            )
+            for key, value in counts.items():
+                total[key] += value
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total['updated']}개의 결제를 갱신했습니다. "
+                f"elapsed={elapsed:.2f}s "
+                f"({total['fetched'] / elapsed if elapsed else 0:.1f} payments/s)"
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from mall.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = "Release stock reservations of unpaid orders that have expired."
+
+    def handle(self, *args, **options):
+        reservation_qs = StockReservation.objects.filter(
+            status=StockReservation.Status.RESERVED,
+            expires_at__lt=timezone.now(),
+        )
+        count = reservation_qs.release()
+        self.stdout.write(self.style.SUCCESS(f"{count}개의 재고 예약을 해제했습니다."))
@@ -0,0 +1,47 @@
+from django.core.management import BaseCommand
+
+from mall.fake_portone import FakePortoneServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in of the PortOne REST API for load and integration tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency", type=float, default=0, help="응답 지연시간 (초)")
+        parser.add_argument(
+            "--error-rate", type=float, default=0, help="500 오류로 응답할 확률 (0 ~ 1)"
+        )
+        parser.add_argument(
+            "--webhook-url",
+            help="결제/취소 시에 웹훅 알림을 보낼 주소 (ex: http://127.0.0.1:8000/mall/webhook/)",
+        )
+        parser.add_argument(
+            "--webhook-delay", type=float, default=0, help="웹훅 알림 지연시간 (초)"
+        )
+
+    def handle(self, *args, **options):
+        server = FakePortoneServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            webhook_url=options["webhook_url"],
+            webhook_delay=options["webhook_delay"],
+        )
+        self.stdout.write(
+            f"Fake PortOne server is running at {server.url}\n"
+            f"쇼핑몰 서버를 PORTONE_API_URL={server.url} 환경변수로 실행해주세요. "
+            f"웹훅을 받으려면 PORTONE_WEBHOOK_IPS에 {options['host']}를 추가해주세요."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stdout.write(f"stats: {dict(server.stats)}")
+            server.join_webhooks(timeout=5)
+            server.server_close()
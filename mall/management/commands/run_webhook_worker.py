@@ -0,0 +1,71 @@
+import signal
+import threading
+
+from django.core.management import BaseCommand
+
+from mall.webhooks import WebhookWorker
+
+
+class Command(BaseCommand):
+    help = "Process queued PortOne webhook notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="대기 알림이 없을 때의 polling 간격 (초)",
+        )
+        parser.add_argument(
+            "--stats-interval",
+            type=float,
+            default=30.0,
+            help="적체 현황 출력 간격 (초)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="적체된 알림을 모두 처리하고 종료합니다.",
+        )
+
+    def handle(self, *args, **options):
+        worker = WebhookWorker(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+        )
+
+        if options["once"]:
+            while worker.run_once():
+                pass
+            worker.shutdown()
+            self.print_stats(worker)
+            return
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop_event.set())
+
+        thread = threading.Thread(
+            target=worker.run_forever,
+            kwargs={"interval": options["interval"], "stop_event": stop_event},
+        )
+        thread.start()
+
+        self.stdout.write(f"webhook worker started (workers={options['workers']})")
+        while thread.is_alive():
+            thread.join(options["stats_interval"])
+            self.print_stats(worker)
+
+        worker.shutdown()
+
+    def print_stats(self, worker: WebhookWorker):
+        stats = worker.get_stats()
+        self.stdout.write(
+            "pending={pending} processing={processing} failed={failed} "
+            "oldest_pending_age={oldest_pending_age:.1f}s "
+            "processed={worker_processed} retried={worker_retried} "
+            "coalesced={worker_coalesced} "
+            "throughput={worker_throughput:.1f}/s".format(**stats)
+        )
@@ -0,0 +1,72 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management import BaseCommand
+from django.db import connections
+
+from mall.models import Product
+from mall.thumbnails import warm_product_thumbnails
+
+
+def init_worker():
+    # spawn 방식의 자식 프로세스에서는 장고 설정을 다시 로딩해야 합니다.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Pre-generate thumbnails and WebP/AVIF photo variants in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="썸네일을 생성할 프로세스 수 (기본: CPU 코어 수)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=20)
+        parser.add_argument("--all", action="store_true", help="판매중이 아닌 상품도 포함합니다.")
+        parser.add_argument(
+            "--force-variants",
+            action="store_true",
+            help="이미 생성된 WebP/AVIF 변환 이미지도 다시 생성합니다.",
+        )
+
+    def handle(self, *args, **options):
+        product_qs = Product.objects.exclude(photo="")
+        if not options["all"]:
+            product_qs = product_qs.filter(status=Product.Status.ACTIVE)
+        pk_list = list(product_qs.order_by("pk").values_list("pk", flat=True))
+
+        chunk_size = options["chunk_size"]
+        chunk_list = [
+            pk_list[i : i + chunk_size] for i in range(0, len(pk_list), chunk_size)
+        ]
+
+        # fork 시에 부모 프로세스의 DB 연결이 자식 프로세스로 공유되지 않도록 미리 닫습니다.
+        connections.close_all()
+
+        started = time.perf_counter()
+        count = 0
+        with ProcessPoolExecutor(
+            max_workers=options["processes"], initializer=init_worker
+        ) as executor:
+            future_list = [
+                executor.submit(
+                    warm_product_thumbnails, chunk, options["force_variants"]
+                )
+                for chunk in chunk_list
+            ]
+            for i, future in enumerate(as_completed(future_list), 1):
+                count += future.result()
+                self.stdout.write(f"\r{i}/{len(chunk_list)}", ending="")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(pk_list)}개 상품의 썸네일 {count}개를 확인/생성했습니다. "
+                f"({elapsed:.1f}s, processes={options['processes']})"
+            )
+        )
@@ -0,0 +1,35 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryCountHeaderMiddleware:
+    """
+    MALL_QUERY_COUNT_HEADER 설정이 켜져 있으면, 요청 처리 중에 실행한 DB 쿼리 수를
+    X-Query-Count 응답 헤더로 알려줍니다. DEBUG 설정과 무관하게 동작하므로 부하 테스트에서 사용합니다.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MALL_QUERY_COUNT_HEADER:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response["X-Query-Count"] = str(counter.count)
+        return response
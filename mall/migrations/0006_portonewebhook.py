@@ -0,0 +1,122 @@
+# Generated by Django 4.1.7 on 2026-10-17 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0005_orderpayment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortoneWebhook",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "merchant_uid",
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name="쇼핑몰 결제식별자"
+                    ),
+                ),
+                (
+                    "imp_uid",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="포트원 결제식별자"
+                    ),
+                ),
+                (
+                    "payment_status",
+                    models.CharField(blank=True, max_length=20, verbose_name="알림 결제상태"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "처리대기"),
+                            ("processing", "처리중"),
+                            ("done", "처리완료"),
+                            ("failed", "처리실패"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="처리상태",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="처리시도 횟수"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="오류 내용")),
+                (
+                    "claim_token",
+                    models.UUIDField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "포트원 웹훅",
+                "verbose_name_plural": "포트원 웹훅",
+                "ordering": ["pk"],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="order",
+            options={
+                "ordering": ["-pk"],
+                "verbose_name": "주문",
+                "verbose_name_plural": "주문",
+            },
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("requested", "주문요청"),
+                    ("failed_payment", "결제실패"),
+                    ("paid", "결제완료"),
+                    ("prepared_product", "상품준비중"),
+                    ("shipped", "배송중"),
+                    ("delivered", "배송완료"),
+                    ("cancelled", "주문취소"),
+                ],
+                db_index=True,
+                default="requested",
+                max_length=20,
+                verbose_name="진행상태",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="orderpayment",
+            name="pay_status",
+            field=models.CharField(
+                choices=[
+                    ("ready", "결제 준비"),
+                    ("paid", "결제 완료"),
+                    ("cancelled", "결제 취소"),
+                    ("failed", "결제 실패"),
+                ],
+                default="ready",
+                max_length=20,
+                verbose_name="결제상태",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="portonewebhook",
+            index=models.Index(fields=["status", "id"], name="mall_webhook_status_idx"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-17 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0006_portonewebhook"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderpayment",
+            name="verified_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="포트원 확인시각"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.7 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0007_orderpayment_verified_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "-id"], name="mall_product_status_pk_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "price", "id"], name="mall_product_status_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="mall_product_status_new_idx",
+            ),
+        ),
+    ]
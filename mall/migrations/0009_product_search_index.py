@@ -0,0 +1,80 @@
+# Generated by Django 4.1.7 on 2026-10-17 18:53
+
+from django.db import migrations
+
+# 마이그레이션은 이후에 바뀔 수 있는 애플리케이션 코드(mall.search)에 의존하지 않도록,
+# 검색 인덱스 테이블 생성/채우기 SQL을 직접 포함합니다.
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mall_product_fts "
+    "USING fts5(name, description, category, tokenize='trigram')",
+    "INSERT OR REPLACE INTO mall_product_fts (rowid, name, description, category) "
+    "SELECT p.id, p.name, p.description, COALESCE(c.name, '') "
+    "FROM mall_product p LEFT JOIN mall_category c ON c.id = p.category_id",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS mall_product_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE TABLE IF NOT EXISTS mall_product_search ("
+    "product_id bigint PRIMARY KEY, "
+    "document text NOT NULL, "
+    "vector tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS mall_product_search_vector_idx "
+    "ON mall_product_search USING gin (vector)",
+    "CREATE INDEX IF NOT EXISTS mall_product_search_document_trgm_idx "
+    "ON mall_product_search USING gin (document gin_trgm_ops)",
+    """
+    INSERT INTO mall_product_search (product_id, document, vector)
+    SELECT
+        p.id,
+        concat_ws(' ', p.name, COALESCE(c.name, ''), p.description),
+        setweight(to_tsvector('simple', p.name), 'A')
+        || setweight(to_tsvector('simple', COALESCE(c.name, '')), 'B')
+        || setweight(to_tsvector('simple', p.description), 'C')
+    FROM mall_product p LEFT JOIN mall_category c ON c.id = p.category_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET document = EXCLUDED.document, vector = EXCLUDED.vector
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP TABLE IF EXISTS mall_product_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        sql_list = SQLITE_FORWARD
+    elif vendor == "postgresql":
+        sql_list = POSTGRESQL_FORWARD
+    else:
+        return
+    for sql in sql_list:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        sql_list = SQLITE_BACKWARD
+    elif vendor == "postgresql":
+        sql_list = POSTGRESQL_BACKWARD
+    else:
+        return
+    for sql in sql_list:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0008_product_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
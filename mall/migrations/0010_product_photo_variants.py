@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0009_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="photo_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
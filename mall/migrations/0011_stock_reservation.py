@@ -0,0 +1,80 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0010_product_photo_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="stock",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="비워두면 재고를 관리하지 않습니다. 주문 시에 차감되며, 0이 되면 품절 상태로 변경됩니다.",
+                null=True,
+                verbose_name="재고",
+            ),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField(verbose_name="수량")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("reserved", "예약"),
+                            ("confirmed", "확정"),
+                            ("released", "해제"),
+                        ],
+                        default="reserved",
+                        max_length=20,
+                        verbose_name="예약상태",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="예약 만료시각")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.order",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "재고 예약",
+                "verbose_name_plural": "재고 예약",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="stockreservation",
+            index=models.Index(
+                fields=["status", "expires_at"], name="mall_stock_reservation_idx"
+            ),
+        ),
+    ]
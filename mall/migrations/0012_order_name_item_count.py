@@ -0,0 +1,67 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:08
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_order_name(apps, schema_editor):
+    # 기존의 Order.name 속성과 같은 주문명을 저장합니다. 기존 속성은 product_set.first()로
+    # Product.Meta.ordering(-pk)에 따라 상품 pk가 가장 큰 상품의 현재 상품명을 사용했습니다.
+    # (Order.make_name과 같은 형식)
+    Order = apps.get_model("mall", "Order")
+    OrderedProduct = apps.get_model("mall", "OrderedProduct")
+    Product = apps.get_model("mall", "Product")
+
+    last_pk = 0
+    while True:
+        order_list = list(Order.objects.filter(pk__gt=last_pk).order_by("pk")[:500])
+        if not order_list:
+            break
+
+        stat_dict = {
+            row["order"]: row
+            for row in OrderedProduct.objects.filter(
+                order__in=[order.pk for order in order_list]
+            )
+            .values("order")
+            .annotate(item_count=Count("pk"), first_product=Max("product"))
+        }
+        product_name_dict = dict(
+            Product.objects.filter(
+                pk__in=[row["first_product"] for row in stat_dict.values()]
+            ).values_list("pk", "name")
+        )
+
+        for order in order_list:
+            stat = stat_dict.get(order.pk, {})
+            order.item_count = stat.get("item_count", 0)
+            first_name = product_name_dict.get(stat.get("first_product"))
+            if first_name is None:
+                order.name = "등록된 상품이 없습니다."
+            elif order.item_count < 2:
+                order.name = first_name
+            else:
+                order.name = f"{first_name} 외 {order.item_count - 1}건"
+
+        Order.objects.bulk_update(order_list, ["name", "item_count"])
+        last_pk = order_list[-1].pk
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0011_stock_reservation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="주문상품 수"),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="name",
+            field=models.CharField(blank=True, max_length=200, verbose_name="주문명"),
+        ),
+        migrations.RunPython(backfill_order_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0012_order_name_item_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "status", "-id"], name="mall_order_user_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0014_order_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedorderpayment",
+            name="created_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderpayment",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="orderpayment",
+            index=models.Index(
+                fields=["pay_status", "created_at"], name="mall_payment_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:18
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0015_order_payment_created_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="archivedorderpayment",
+            name="uid",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                unique=True,
+                verbose_name="쇼핑몰 결제식별자",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="orderpayment",
+            name="uid",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                unique=True,
+                verbose_name="쇼핑몰 결제식별자",
+            ),
+        ),
+    ]
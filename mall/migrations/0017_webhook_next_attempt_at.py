@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0016_payment_uid_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="portonewebhook",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="다음 처리시각"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mall", "0017_webhook_next_attempt_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["status", "updated_at"], name="mall_order_status_updated_idx"
+            ),
+        ),
+    ]
@@ -1,21 +1,41 @@
 import logging
-from typing import List
-from uuid import uuid4
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint, QuerySet
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Q,
+    Sum,
+    UniqueConstraint,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.urls import reverse
-from django.utils.functional import cached_property
+from django.utils import timezone
 from iamport import Iamport
 
 from accounts.models import User
+from mall.caches import cart_summary_cache, product_list_cache
+from mall.portone import PortoneClient, get_portone_client
 
 
 logger = logging.getLogger(__name__)
 
+# 결제 건별 update 직렬화에 사용하는 프로세스 내 락 (결제 pk로 분산)
+_payment_locks = [threading.RLock() for __ in range(64)]
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -27,6 +47,79 @@ class Category(models.Model):
         verbose_name = verbose_name_plural = "상품 분류"
 
 
+def invalidate_product_caches():
+    # queryset.update는 signal을 발생시키지 않으므로, 상품 상태가 바뀌었다면 직접 갱신합니다.
+    from mall.autocomplete import ProductNameIndex
+
+    ProductNameIndex.invalidate()
+    product_list_cache.invalidate()
+    cart_summary_cache.invalidate_all()
+
+
+class ProductQuerySet(QuerySet):
+    def decrease_stock(self, quantity_dict: Dict[int, int]) -> int:
+        """
+        {상품 pk: 수량}만큼의 재고를 1번의 UPDATE 쿼리로 차감하고, 차감된 상품 수를 반환합니다.
+
+        WHERE 절에서 재고가 충분한 상품만 차감하므로 (stock >= 수량), 잠금 없이도
+        동시 주문에서 재고가 음수가 되지 않습니다. 재고가 0이 되는 상품은 같은 쿼리에서 품절 처리합니다.
+        반환값이 상품 수보다 작다면 재고가 부족한 상품이 있으므로, 트랜잭션을 롤백해야 합니다.
+        """
+
+        if not quantity_dict:
+            return 0
+
+        condition = Q()
+        for product_id, quantity in quantity_dict.items():
+            condition |= Q(pk=product_id, stock__gte=quantity)
+
+        # UPDATE의 SET 절은 변경 전의 값을 참조합니다. (MySQL은 앞선 SET 결과를 참조하므로 status를 먼저 지정합니다.)
+        return self.filter(condition).update(
+            status=Case(
+                *[
+                    When(
+                        pk=product_id,
+                        stock=quantity,
+                        then=Value(Product.Status.SOLD_OUT),
+                    )
+                    for product_id, quantity in quantity_dict.items()
+                ],
+                default=F("status"),
+                output_field=models.CharField(),
+            ),
+            stock=Case(
+                *[
+                    When(pk=product_id, then=F("stock") - quantity)
+                    for product_id, quantity in quantity_dict.items()
+                ],
+                default=F("stock"),
+                output_field=models.PositiveIntegerField(),
+            ),
+        )
+
+    def increase_stock(self, quantity_dict: Dict[int, int]) -> int:
+        """재고를 되돌리고, 품절 상태였던 상품은 판매중 상태로 변경합니다."""
+
+        if not quantity_dict:
+            return 0
+
+        return self.filter(pk__in=list(quantity_dict), stock__isnull=False).update(
+            status=Case(
+                When(status=Product.Status.SOLD_OUT, then=Value(Product.Status.ACTIVE)),
+                default=F("status"),
+                output_field=models.CharField(),
+            ),
+            stock=Case(
+                *[
+                    When(pk=product_id, then=F("stock") + quantity)
+                    for product_id, quantity in quantity_dict.items()
+                ],
+                default=F("stock"),
+                output_field=models.PositiveIntegerField(),
+            ),
+        )
+
+
 class Product(models.Model):
     class Status(models.TextChoices):
         ACTIVE = "a", "정상"
@@ -48,15 +141,139 @@ class Product(models.Model):
     photo = models.ImageField(
         upload_to="mall/product/photo/%Y/%m/%d",
     )
+    stock = models.PositiveIntegerField(
+        "재고",
+        null=True,
+        blank=True,
+        help_text="비워두면 재고를 관리하지 않습니다. 주문 시에 차감되며, 0이 되면 품절 상태로 변경됩니다.",
+    )
+    # 상품 사진의 포맷/너비별 변환 이미지 목록 (mall.thumbnails.generate_photo_variants)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     def __str__(self):
         return f"<{self.pk}> {self.name}"
 
+    def get_photo_sources(self) -> List[dict]:
+        """<picture> 태그의 <source> 목록. 현재 사진의 변환 이미지가 아직 없다면 빈 목록입니다."""
+
+        if not self.photo or self.photo_variants.get("source") != self.photo.name:
+            return []
+
+        storage = self.photo.storage
+        return [
+            {
+                "type": mime_type,
+                "srcset": ", ".join(
+                    f"{storage.url(name)} {width}w" for width, name in variant_list
+                ),
+            }
+            for mime_type, variant_list in self.photo_variants["formats"].items()
+            if variant_list
+        ]
+
     class Meta:
         verbose_name = verbose_name_plural = "상품"
         ordering = ["-pk"]
+        # ProductListView의 정렬 기준별 keyset pagination 인덱스
+        indexes = [
+            models.Index(fields=["status", "-id"], name="mall_product_status_pk_idx"),
+            models.Index(
+                fields=["status", "price", "id"], name="mall_product_status_price_idx"
+            ),
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="mall_product_status_new_idx",
+            ),
+        ]
+
+
+class CartProductQuerySet(QuerySet):
+    def add_quantities(
+        self, user: User, quantity_dict: Dict[int, int]
+    ) -> Dict[int, int]:
+        """
+        장바구니에 {상품 pk: 수량}만큼 더하고, 상품별 최종 수량을 반환합니다.
+
+        unique_user_product 제약조건을 활용한 INSERT ... ON CONFLICT DO UPDATE 쿼리 1번으로
+        처리하므로, 동시에 같은 상품을 담더라도 수량이 누락되지 않습니다.
+        """
+
+        if not quantity_dict:
+            return {}
+
+        connection = connections[self.db]
+        if connection.vendor in ("sqlite", "postgresql"):
+            cart_quantity_dict = self._upsert_quantities(
+                connection, user, quantity_dict
+            )
+        else:
+            cart_quantity_dict = self._update_or_create_quantities(user, quantity_dict)
+        cart_summary_cache.invalidate(user.pk)
+        return cart_quantity_dict
+
+    def summary(self) -> Dict[str, int]:
+        """상품 수, 총 수량, 총 금액을 1번의 집계 쿼리로 계산합니다."""
+
+        return self.aggregate(
+            item_count=Count("pk"),
+            quantity=Coalesce(Sum("quantity"), 0),
+            total_amount=Coalesce(Sum(F("product__price") * F("quantity")), 0),
+        )
+
+    def _upsert_quantities(self, connection, user, quantity_dict) -> Dict[int, int]:
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        user_column = qn(opts.get_field("user").column)
+        product_column = qn(opts.get_field("product").column)
+        quantity_column = qn(opts.get_field("quantity").column)
+
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(quantity_dict))
+        params = []
+        for product_id, quantity in quantity_dict.items():
+            params.extend([user.pk, product_id, quantity])
+
+        sql = (
+            f"INSERT INTO {table} ({user_column}, {product_column}, {quantity_column}) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT ({user_column}, {product_column}) DO UPDATE "
+            f"SET {quantity_column} = {table}.{quantity_column} + excluded.{quantity_column}"
+        )
+        with connection.cursor() as cursor:
+            if connection.features.can_return_rows_from_bulk_insert:
+                cursor.execute(
+                    f"{sql} RETURNING {product_column}, {quantity_column}", params
+                )
+                return dict(cursor.fetchall())
+            cursor.execute(sql, params)
+        return self._get_quantities(user, quantity_dict)
+
+    def _update_or_create_quantities(self, user, quantity_dict) -> Dict[int, int]:
+        # upsert 문법을 지원하지 않는 데이터베이스 : F() 표현식으로 DB에서 수량을 더합니다.
+        with transaction.atomic(using=self.db):
+            for product_id, quantity in quantity_dict.items():
+                qs = self.model.objects.using(self.db).filter(
+                    user=user, product_id=product_id
+                )
+                if qs.update(quantity=F("quantity") + quantity):
+                    continue
+                try:
+                    with transaction.atomic(using=self.db):
+                        qs.create(user=user, product_id=product_id, quantity=quantity)
+                except IntegrityError:
+                    # 그 사이에 다른 요청에서 먼저 추가한 경우
+                    qs.update(quantity=F("quantity") + quantity)
+            return self._get_quantities(user, quantity_dict)
+
+    def _get_quantities(self, user, quantity_dict) -> Dict[int, int]:
+        qs = self.model.objects.using(self.db).filter(
+            user=user, product_id__in=list(quantity_dict)
+        )
+        return dict(qs.values_list("product_id", "quantity"))
 
 
 class CartProduct(models.Model):
@@ -78,6 +295,8 @@ class CartProduct(models.Model):
         ],
     )
 
+    objects = CartProductQuerySet.as_manager()
+
     def __str__(self):
         return f"<{self.pk}> {self.product.name} - {self.quantity}"
 
@@ -92,6 +311,14 @@ class CartProduct(models.Model):
         ]
 
 
+class EmptyCartError(ValueError):
+    pass
+
+
+class OutOfStockError(ValueError):
+    pass
+
+
 class Order(models.Model):
     class Status(models.TextChoices):
         REQUESTED = "requested", "주문요청"
@@ -108,6 +335,9 @@ class Order(models.Model):
         on_delete=models.CASCADE,
         db_constraint=False,
     )
+    # 주문목록 등에서 주문상품을 조회하지 않도록, 주문 생성 시에 저장합니다.
+    name = models.CharField("주문명", max_length=200, blank=True)
+    item_count = models.PositiveIntegerField("주문상품 수", default=0)
     total_amount = models.PositiveIntegerField("결제금액")
     status = models.CharField(
         "진행상태",
@@ -134,48 +364,107 @@ class Order(models.Model):
         for payment in self.orderpayment_set.all():
             payment.cancel(reason=reason)
 
-    def update(self):
+    def update(self, force=False):
         for payment in self.orderpayment_set.all():
-            payment.update()
+            payment.update(force=force)
 
-    @property
-    def name(self) -> str:
-        first_product = self.product_set.first()
-        if first_product is None:
+    @staticmethod
+    def make_name(first_product_name: Optional[str], item_count: int) -> str:
+        if first_product_name is None:
             return "등록된 상품이 없습니다."
-        size = self.product_set.all().count()
-        if size < 2:
-            return first_product.name
-        return f"{first_product.name} 외 {size - 1}건"
+        if item_count < 2:
+            return first_product_name
+        return f"{first_product_name} 외 {item_count - 1}건"
 
     @classmethod
     def create_from_cart(
         cls, user: User, cart_product_qs: QuerySet[CartProduct]
     ) -> "Order":
-        cart_product_list: List[CartProduct] = list(cart_product_qs)
+        """
+        장바구니 상품들로 주문을 생성하고 장바구니를 비웁니다.
 
-        total_amount = sum(cart_product.amount for cart_product in cart_product_list)
-        order = cls.objects.create(user=user, total_amount=total_amount)
+        장바구니 상품 수와 무관하게 일정한 수의 쿼리로 처리하며, 장바구니 레코드에 잠금을
+        걸어두므로 같은 장바구니로 동시에 주문하더라도 1건만 생성됩니다.
+        나머지 요청에서는 빈 장바구니가 되어 EmptyCartError 예외가 발생합니다.
+        재고를 관리하는 상품의 재고가 부족하면 OutOfStockError 예외가 발생합니다.
+        """
 
-        ordered_product_list = []
-        for cart_product in cart_product_list:
-            product = cart_product.product
-            ordered_product = OrderedProduct(
-                order=order,
-                product=product,
-                name=product.name,
-                price=product.price,
-                quantity=cart_product.quantity,
+        db = cart_product_qs.db
+        connection = connections[db]
+        if connection.features.has_select_for_update_of:
+            # 상품 레코드에는 잠금을 걸지 않습니다.
+            cart_product_qs = cart_product_qs.select_for_update(of=("self",))
+        else:
+            cart_product_qs = cart_product_qs.select_for_update()
+
+        with transaction.atomic(using=db):
+            cart_product_list: List[CartProduct] = list(
+                cart_product_qs.select_related("product").order_by("pk")
+            )
+            if not cart_product_list:
+                raise EmptyCartError("장바구니가 비어있습니다.")
+
+            total_amount = sum(
+                cart_product.amount for cart_product in cart_product_list
+            )
+            # 주문명의 대표 상품은 기존 주문명(Product.Meta.ordering에 따른 product_set.first())과
+            # 같이 상품 pk가 가장 큰 상품입니다. (0012 마이그레이션의 기존 주문 채우기와 같습니다.)
+            first_product = max(
+                (cart_product.product for cart_product in cart_product_list),
+                key=lambda product: product.pk,
             )
-            ordered_product_list.append(ordered_product)
+            order = cls.objects.using(db).create(
+                user=user,
+                name=cls.make_name(first_product.name, len(cart_product_list)),
+                item_count=len(cart_product_list),
+                total_amount=total_amount,
+            )
+
+            ordered_product_list = []
+            for cart_product in cart_product_list:
+                product = cart_product.product
+                ordered_product = OrderedProduct(
+                    order=order,
+                    product=product,
+                    name=product.name,
+                    price=product.price,
+                    quantity=cart_product.quantity,
+                )
+                ordered_product_list.append(ordered_product)
 
-        OrderedProduct.objects.bulk_create(ordered_product_list)
+            OrderedProduct.objects.using(db).bulk_create(ordered_product_list)
+
+            # 재고를 관리하는 상품들의 재고를 예약합니다. 재고가 부족하면 주문 생성을 롤백합니다.
+            StockReservation.objects.using(db).reserve(
+                order,
+                {
+                    cart_product.product_id: cart_product.quantity
+                    for cart_product in cart_product_list
+                    if cart_product.product.stock is not None
+                },
+            )
+
+            CartProduct.objects.using(db).filter(
+                pk__in=[cart_product.pk for cart_product in cart_product_list]
+            ).delete()
+
+        cart_summary_cache.invalidate(user.pk)
 
         return order
 
     class Meta:
         ordering = ["-pk"]
         verbose_name_plural = verbose_name = "주문"
+        # 주문목록 (사용자별, 상태별 최신순) keyset pagination 인덱스
+        indexes = [
+            models.Index(
+                fields=["user", "status", "-id"], name="mall_order_user_status_idx"
+            ),
+            # archive_orders 명령의 보관 대상 조회 (status__in + updated_at__lt)
+            models.Index(
+                fields=["status", "updated_at"], name="mall_order_status_updated_idx"
+            ),
+        ]
 
 
 class OrderedProduct(models.Model):
@@ -196,6 +485,141 @@ class OrderedProduct(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class StockReservationQuerySet(QuerySet):
+    @staticmethod
+    def _sum_quantities(reservation_list) -> Dict[int, int]:
+        quantity_dict = defaultdict(int)
+        for reservation in reservation_list:
+            quantity_dict[reservation.product_id] += reservation.quantity
+        return quantity_dict
+
+    @staticmethod
+    def _get_expires_at():
+        return timezone.now() + timedelta(
+            seconds=settings.MALL_STOCK_RESERVATION_TIMEOUT
+        )
+
+    def _on_stock_decreased(self, quantity_dict: Dict[int, int]):
+        # 차감 전 재고는 수량 이상이었으므로, 재고가 0인 상품은 이번에 품절 처리된 상품입니다.
+        if (
+            Product.objects.using(self.db)
+            .filter(pk__in=list(quantity_dict), stock=0)
+            .exists()
+        ):
+            transaction.on_commit(invalidate_product_caches, using=self.db)
+
+    def reserve(self, order: "Order", quantity_dict: Dict[int, int]):
+        """트랜잭션 내에서 호출해야 합니다. 재고가 부족하면 OutOfStockError 예외가 발생합니다."""
+
+        if not quantity_dict:
+            return
+
+        product_qs = Product.objects.using(self.db)
+        if product_qs.decrease_stock(quantity_dict) < len(quantity_dict):
+            raise OutOfStockError("재고가 부족한 상품이 있습니다.")
+
+        expires_at = self._get_expires_at()
+        self.bulk_create(
+            [
+                StockReservation(
+                    order=order,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, quantity in quantity_dict.items()
+            ]
+        )
+        self._on_stock_decreased(quantity_dict)
+
+    def reserve_released(self):
+        """해제된 예약의 재고를 다시 차감합니다. (결제 재시도 등) 재고가 부족하면 OutOfStockError 예외가 발생합니다."""
+
+        with transaction.atomic(using=self.db):
+            reservation_list = list(
+                self.filter(status=StockReservation.Status.RELEASED).select_for_update()
+            )
+            if not reservation_list:
+                return
+
+            quantity_dict = self._sum_quantities(reservation_list)
+            product_qs = Product.objects.using(self.db)
+            if product_qs.decrease_stock(quantity_dict) < len(quantity_dict):
+                raise OutOfStockError("재고가 부족한 상품이 있습니다.")
+
+            self.filter(pk__in=[r.pk for r in reservation_list]).update(
+                status=StockReservation.Status.RESERVED,
+                expires_at=self._get_expires_at(),
+            )
+            self._on_stock_decreased(quantity_dict)
+
+    def confirm(self) -> int:
+        """결제 완료 시에 호출합니다. 결제 전에 만료되어 해제된 예약은 다시 차감을 시도합니다."""
+
+        try:
+            self.reserve_released()
+        except OutOfStockError:
+            logger.error(
+                "결제 완료된 주문의 재고가 부족합니다. (초과판매) : %s",
+                list(self.filter(status=StockReservation.Status.RELEASED)),
+            )
+        return self.filter(status=StockReservation.Status.RESERVED).update(
+            status=StockReservation.Status.CONFIRMED
+        )
+
+    def release(self) -> int:
+        """결제 실패/취소, 예약 만료 시에 예약(확정)된 재고를 되돌리고, 해제한 예약 수를 반환합니다."""
+
+        with transaction.atomic(using=self.db):
+            reservation_list = list(
+                self.exclude(
+                    status=StockReservation.Status.RELEASED
+                ).select_for_update()
+            )
+            if not reservation_list:
+                return 0
+
+            self.model.objects.using(self.db).filter(
+                pk__in=[r.pk for r in reservation_list]
+            ).update(status=StockReservation.Status.RELEASED)
+            Product.objects.using(self.db).increase_stock(
+                self._sum_quantities(reservation_list)
+            )
+            transaction.on_commit(invalidate_product_caches, using=self.db)
+
+        return len(reservation_list)
+
+
+class StockReservation(models.Model):
+    class Status(models.TextChoices):
+        RESERVED = "reserved", "예약"
+        CONFIRMED = "confirmed", "확정"
+        RELEASED = "released", "해제"
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, db_constraint=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
+    quantity = models.PositiveIntegerField("수량")
+    status = models.CharField(
+        "예약상태", max_length=20, choices=Status.choices, default=Status.RESERVED
+    )
+    expires_at = models.DateTimeField("예약 만료시각")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StockReservationQuerySet.as_manager()
+
+    def __str__(self):
+        return f"<{self.pk}> {self.product_id} - {self.quantity} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "재고 예약"
+        indexes = [
+            models.Index(
+                fields=["status", "expires_at"], name="mall_stock_reservation_idx"
+            ),
+        ]
+
+
 class AbstractPortonePayment(models.Model):
     class PayMethod(models.TextChoices):
         CARD = "card", "신용카드"
@@ -207,7 +631,7 @@ class AbstractPortonePayment(models.Model):
         FAILED = "failed", "결제 실패"
 
     meta = models.JSONField("포트원 결제내역", default=dict, editable=False)
-    uid = models.UUIDField("쇼핑몰 결제식별자", default=uuid4, editable=False)
+    uid = models.UUIDField("쇼핑몰 결제식별자", default=uuid4, editable=False, unique=True)
     name = models.CharField("결제명", max_length=200)
     desired_amount = models.PositiveIntegerField("결제금액", editable=False)
     buyer_name = models.CharField("구매자 이름", max_length=100, editable=False)
@@ -221,40 +645,185 @@ class AbstractPortonePayment(models.Model):
     is_paid_ok = models.BooleanField(
         "결제성공 여부", default=False, db_index=True, editable=False
     )
+    verified_at = models.DateTimeField(
+        "포트원 확인시각", null=True, blank=True, editable=False
+    )
+
+    # lock()에서 다시 읽어오는 결제상태 필드
+    VERIFIED_FIELDS = ["meta", "pay_status", "is_paid_ok", "verified_at"]
 
     @property
     def merchant_uid(self) -> str:
         return str(self.uid)
 
-    @cached_property
-    def api(self):
-        return Iamport(
-            imp_key=settings.PORTONE_API_KEY, imp_secret=settings.PORTONE_API_SECRET
+    @property
+    def api(self) -> PortoneClient:
+        return get_portone_client()
+
+    @contextmanager
+    def lock(self):
+        """
+        결제 레코드에 SELECT ... FOR UPDATE 행 잠금을 걸고 최신 결제상태를 다시 읽어옵니다.
+        (SQLite는 행 잠금 대신 트랜잭션으로 직렬화됩니다.) 잠금을 오래 잡고 있지 않도록,
+        포트원 API 호출 등 네트워크 요청은 잠금 밖에서 수행해야 합니다.
+        """
+
+        with transaction.atomic():
+            latest = type(self).objects.select_for_update().get(pk=self.pk)
+            for field_name in self.VERIFIED_FIELDS:
+                setattr(self, field_name, getattr(latest, field_name))
+            yield
+
+    def is_recently_verified(self, notified_status: str = "") -> bool:
+        """
+        포트원 조회 없이 저장된 결제상태를 그대로 사용할 수 있는 지 여부.
+        결제준비 상태는 곧 바뀔 수 있으므로 항상 다시 확인하고, 결제완료/취소/실패 상태는
+        PORTONE_REVERIFY_INTERVALS에 지정한 시간 동안 다시 확인하지 않습니다.
+        웹훅으로 알려온 결제상태가 저장된 결제상태와 다르다면 바로 다시 확인합니다.
+        """
+
+        if self.verified_at is None or self.pay_status == self.PayStatus.READY:
+            return False
+        if notified_status and notified_status != self.pay_status:
+            return False
+
+        seconds = settings.PORTONE_REVERIFY_INTERVALS.get(
+            self.pay_status, settings.PORTONE_COALESCE_SECONDS
         )
+        if seconds is None:
+            return True
+        return seconds > 0 and self.verified_at >= timezone.now() - timedelta(
+            seconds=seconds
+        )
+
+    def update(self, response=None, force=False, notified_status: str = "") -> bool:
+        """
+        포트원 결제내역을 반영합니다. 이미 확인한 결제라면 (중복 웹훅, 결제확인 페이지 재요청 등)
+        포트원 API 호출 없이 False를 반환합니다. force=True이면 항상 포트원에서 조회합니다.
+        결제상태가 바뀐 경우에만 on_pay_status_changed를 호출합니다.
+        """
+
+        # 잠금을 얻기 전에 먼저 확인하여, 종료 상태 결제에 대한 재요청은 쿼리 없이 처리합니다.
+        if (
+            response is None
+            and not force
+            and self.is_recently_verified(notified_status)
+        ):
+            return False
+
+        # 같은 프로세스의 동시 요청은 쓰레드 락으로 직렬화하여, 먼저 조회한 결과를 재사용합니다.
+        with _payment_locks[self.pk % len(_payment_locks)]:
+            fetched_at = timezone.now()
+            if response is None:
+                if not force:
+                    self.refresh_from_db(fields=self.VERIFIED_FIELDS)
+                    if self.is_recently_verified(notified_status):
+                        return False
+
+                # 트랜잭션 밖에서 조회하여, 네트워크 응답을 기다리는 동안 DB 잠금을 잡지 않습니다.
+                try:
+                    meta = self.api.find(merchant_uid=self.merchant_uid)
+                except (Iamport.ResponseError, Iamport.HttpError) as e:
+                    logger.error(str(e), exc_info=e)
+                    raise Http404("포트원에서 결제내역을 찾을 수 없습니다.")
+            else:
+                meta = response
+
+            with self.lock():
+                # 조회하는 동안 다른 프로세스에서 더 나중에 조회한 결과를 저장했다면 그대로 둡니다.
+                if self.verified_at is not None and self.verified_at >= fetched_at:
+                    return False
 
-    def update(self, response=None):
-        if response is None:
+                previous = (self.pay_status, self.is_paid_ok)
+                update_fields = ["verified_at"]
+                if meta != self.meta:
+                    self.meta = meta
+                    update_fields.append("meta")
+                if meta["status"] != self.pay_status:
+                    self.pay_status = meta["status"]
+                    update_fields.append("pay_status")
+                is_paid_ok = self.api.is_paid(self.desired_amount, response=meta)
+                if is_paid_ok != self.is_paid_ok:
+                    self.is_paid_ok = is_paid_ok
+                    update_fields.append("is_paid_ok")
+                self.verified_at = fetched_at
+
+                # TODO: 결제는 되었는 데, 결제금액이 맞지 않는 경우, -> 의심된다 플래그를 지정한다든지.
+
+                self.save(update_fields=update_fields)
+
+                if (self.pay_status, self.is_paid_ok) != previous:
+                    self.on_pay_status_changed([self])
+
+        return True
+
+    @classmethod
+    def on_pay_status_changed(cls, payment_list: List["AbstractPortonePayment"]):
+        """결제상태가 바뀌었을 때, 결제 레코드 잠금 안에서 호출됩니다."""
+
+    @classmethod
+    def reconcile(
+        cls, meta_list: List[dict], fetched_at: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """
+        포트원 결제내역 목록을 쇼핑몰 결제들에 한번에 반영하고, (일치한 결제 수, 변경된 결제 수)를
+        반환합니다. 결제 수와 무관하게 일정한 수의 쿼리로 처리합니다.
+        fetched_at에는 결제내역 목록을 조회하기 직전의 시각을 지정하며, update()와 같이
+        그 이후에 확인한 결제는 (더 나중의 결제내역이므로) 그대로 둡니다.
+        """
+
+        meta_dict = {}
+        for meta in meta_list:
             try:
-                self.meta = self.api.find(merchant_uid=self.merchant_uid)
-            except (Iamport.ResponseError, Iamport.HttpError) as e:
-                logger.error(str(e), exc_info=e)
-                raise Http404("포트원에서 결제내역을 찾을 수 없습니다.")
-        else:
-            self.meta = response
+                meta_dict[UUID(meta["merchant_uid"])] = meta
+            except (KeyError, TypeError, ValueError):
+                # 다른 쇼핑몰/테스트 결제 등 쇼핑몰 결제식별자 형식이 아닌 결제
+                continue
+        if not meta_dict:
+            return 0, 0
 
-        self.pay_status = self.meta["status"]
-        self.is_paid_ok = self.api.is_paid(self.desired_amount, response=self.meta)
+        api = get_portone_client()
+        with transaction.atomic():
+            payment_dict = cls.objects.select_for_update().in_bulk(
+                list(meta_dict), field_name="uid"
+            )
+            if fetched_at is None:
+                fetched_at = timezone.now()
+            changed_list = []
+            for uid, payment in payment_dict.items():
+                if (
+                    payment.verified_at is not None
+                    and payment.verified_at >= fetched_at
+                ):
+                    continue
+                meta = meta_dict[uid]
+                is_paid_ok = api.is_paid(payment.desired_amount, response=meta)
+                if (
+                    meta == payment.meta
+                    and meta["status"] == payment.pay_status
+                    and is_paid_ok == payment.is_paid_ok
+                ):
+                    continue
+                payment.meta = meta
+                payment.pay_status = meta["status"]
+                payment.is_paid_ok = is_paid_ok
+                payment.verified_at = fetched_at
+                changed_list.append(payment)
 
-        # TODO: 결제는 되었는 데, 결제금액이 맞지 않는 경우, -> 의심된다 플래그를 지정한다든지.
+            if changed_list:
+                cls.objects.bulk_update(
+                    changed_list, ["meta", "pay_status", "is_paid_ok", "verified_at"]
+                )
+                cls.on_pay_status_changed(changed_list)
 
-        self.save()
+        return len(payment_dict), len(changed_list)
 
     def cancel(self, reason=""):
         try:
             response = self.api.cancel(reason, merchant_uid=self.merchant_uid)
             self.update(response)
         except Iamport.ResponseError:
-            self.update()
+            self.update(force=True)
 
     class Meta:
         abstract = True
@@ -262,23 +831,50 @@ class AbstractPortonePayment(models.Model):
 
 class OrderPayment(AbstractPortonePayment):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, db_constraint=False)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-    def update(self, response=None):
-        super().update(response)
+    @classmethod
+    def on_pay_status_changed(cls, payment_list: List["OrderPayment"]):
+        # 주문 레코드를 읽어오지 않고, 결제상태별로 주문상태가 바뀌어야 할 주문만 조건부로 갱신합니다.
+        paid_list = [payment for payment in payment_list if payment.is_paid_ok]
+        failed_list = [
+            payment
+            for payment in payment_list
+            if not payment.is_paid_ok and payment.pay_status == cls.PayStatus.FAILED
+        ]
+        cancelled_list = [
+            payment
+            for payment in payment_list
+            if not payment.is_paid_ok and payment.pay_status == cls.PayStatus.CANCELLED
+        ]
+        now = timezone.now()
 
-        if self.is_paid_ok:
-            self.order.status = Order.Status.PAID
-            self.order.save()
+        if paid_list:
+            order_pk_list = [payment.order_id for payment in paid_list]
+            # 배송중 등 이후 단계로 진행된 주문은 되돌리지 않습니다.
+            Order.objects.filter(
+                pk__in=order_pk_list,
+                status__in=(Order.Status.REQUESTED, Order.Status.FAILED_PAYMENT),
+            ).update(status=Order.Status.PAID, updated_at=now)
             # 다수의 결제시도
-            self.order.orderpayment_set.exclude(pk=self.pk).delete()
+            cls.objects.filter(order__in=order_pk_list).exclude(
+                pk__in=[payment.pk for payment in paid_list]
+            ).delete()
+            StockReservation.objects.filter(order__in=order_pk_list).confirm()
 
-        elif self.pay_status == self.PayStatus.FAILED:
-            self.order.status = Order.Status.FAILED_PAYMENT
-            self.order.save()
+        if failed_list:
+            order_pk_list = [payment.order_id for payment in failed_list]
+            Order.objects.filter(
+                pk__in=order_pk_list, status=Order.Status.REQUESTED
+            ).update(status=Order.Status.FAILED_PAYMENT, updated_at=now)
+            StockReservation.objects.filter(order__in=order_pk_list).release()
 
-        elif self.pay_status == self.PayStatus.CANCELLED:
-            self.order.status = Order.Status.CANCELLED
-            self.order.save()
+        if cancelled_list:
+            order_pk_list = [payment.order_id for payment in cancelled_list]
+            Order.objects.filter(pk__in=order_pk_list).exclude(
+                status=Order.Status.CANCELLED
+            ).update(status=Order.Status.CANCELLED, updated_at=now)
+            StockReservation.objects.filter(order__in=order_pk_list).release()
 
     @classmethod
     def create_by_order(cls, order: Order) -> "OrderPayment":
@@ -289,3 +885,205 @@ class OrderPayment(AbstractPortonePayment):
             buyer_name=order.user.get_full_name() or order.user.username,
             buyer_email=order.user.email,
         )
+
+    @classmethod
+    def get_or_create_by_order(cls, order: Order) -> "OrderPayment":
+        """
+        결제 페이지 새로고침/뒤로가기마다 결제 레코드가 늘어나지 않도록,
+        아직 포트원에서 확인한 적 없는 최근의 결제준비 건이 있다면 재사용합니다.
+        결제금액이 달라졌다면 새로 생성합니다.
+        """
+
+        payment = (
+            cls.objects.filter(
+                order=order,
+                desired_amount=order.total_amount,
+                pay_status=cls.PayStatus.READY,
+                verified_at__isnull=True,
+                created_at__gte=timezone.now()
+                - timedelta(seconds=settings.MALL_PAYMENT_REUSE_TIMEOUT),
+            )
+            .order_by("-pk")
+            .first()
+        )
+        if payment is None:
+            payment = cls.create_by_order(order)
+        return payment
+
+    class Meta:
+        indexes = [
+            # 방치된 결제준비 건 정리 (prune_ready_payments 명령)
+            models.Index(
+                fields=["pay_status", "created_at"], name="mall_payment_status_idx"
+            ),
+        ]
+
+
+class PortoneWebhook(models.Model):
+    """비동기 처리를 위해 저장해둔 포트원 웹훅 알림"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "처리대기"
+        PROCESSING = "processing", "처리중"
+        DONE = "done", "처리완료"
+        FAILED = "failed", "처리실패"
+
+    merchant_uid = models.CharField("쇼핑몰 결제식별자", max_length=100, db_index=True)
+    imp_uid = models.CharField("포트원 결제식별자", max_length=100, blank=True)
+    payment_status = models.CharField("알림 결제상태", max_length=20, blank=True)
+    status = models.CharField(
+        "처리상태", max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField("처리시도 횟수", default=0)
+    error = models.TextField("오류 내용", blank=True)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # 처리에 실패하여 재시도할 알림은 이 시각 이후에 다시 처리합니다.
+    next_attempt_at = models.DateTimeField(
+        "다음 처리시각", null=True, blank=True, editable=False
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.merchant_uid} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "포트원 웹훅"
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["status", "id"], name="mall_webhook_status_idx"),
+        ]
+
+
+def _copy_to(model, obj):
+    # 같은 이름의 필드 값들을 그대로 (pk 포함) 복사한 보관 모델 인스턴스를 만듭니다.
+    return model(
+        **{
+            field.attname: getattr(obj, field.attname)
+            for field in model._meta.concrete_fields
+            if hasattr(obj, field.attname)
+        }
+    )
+
+
+class ArchivedOrder(models.Model):
+    """
+    배송완료/주문취소 후 오래된 주문의 보관 테이블. 원본 주문의 pk를 그대로 사용하므로
+    주문 상세 URL 등을 그대로 사용할 수 있습니다.
+    """
+
+    ARCHIVABLE_STATUSES = (Order.Status.DELIVERED, Order.Status.CANCELLED)
+
+    id = models.BigIntegerField(primary_key=True)
+    uid = models.UUIDField(editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+    )
+    name = models.CharField("주문명", max_length=200, blank=True)
+    item_count = models.PositiveIntegerField("주문상품 수", default=0)
+    total_amount = models.PositiveIntegerField("결제금액")
+    status = models.CharField("진행상태", max_length=20, choices=Order.Status.choices)
+    # 원본 주문의 생성/수정 시각을 그대로 저장합니다.
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField("보관시각", auto_now_add=True)
+
+    def get_absolute_url(self) -> str:
+        return reverse("order_detail", args=[self.pk])
+
+    @classmethod
+    def archive(cls, order_pk_list: List[int]) -> int:
+        """
+        지정 주문들을 주문상품, 결제내역과 함께 한 트랜잭션에서 보관 테이블로 옮기고,
+        옮긴 주문 수를 반환합니다. 보관 대상 상태가 아닌 주문은 옮기지 않습니다.
+        """
+
+        with transaction.atomic():
+            order_list = list(
+                Order.objects.select_for_update().filter(
+                    pk__in=order_pk_list, status__in=cls.ARCHIVABLE_STATUSES
+                )
+            )
+            if not order_list:
+                return 0
+            pk_list = [order.pk for order in order_list]
+
+            cls.objects.bulk_create([_copy_to(cls, order) for order in order_list])
+            ArchivedOrderedProduct.objects.bulk_create(
+                [
+                    _copy_to(ArchivedOrderedProduct, ordered_product)
+                    for ordered_product in OrderedProduct.objects.filter(
+                        order__in=pk_list
+                    )
+                ]
+            )
+            ArchivedOrderPayment.objects.bulk_create(
+                [
+                    _copy_to(ArchivedOrderPayment, payment)
+                    for payment in OrderPayment.objects.filter(order__in=pk_list)
+                ]
+            )
+
+            # 재고 예약은 보관하지 않습니다. 배송완료 주문의 예약은 확정되어 주문상품 수량과 같고,
+            # 취소된 주문에 남은 예약은 재고를 되돌린 후에 삭제합니다.
+            StockReservation.objects.filter(
+                order__in=[
+                    order.pk
+                    for order in order_list
+                    if order.status == Order.Status.CANCELLED
+                ]
+            ).release()
+
+            # 주문상품, 결제내역, 재고 예약은 CASCADE로 함께 삭제됩니다.
+            Order.objects.filter(pk__in=pk_list).delete()
+
+        return len(order_list)
+
+    class Meta:
+        ordering = ["-pk"]
+        verbose_name_plural = verbose_name = "보관된 주문"
+        indexes = [
+            models.Index(fields=["user", "-id"], name="mall_archived_order_user_idx"),
+        ]
+
+
+class ArchivedOrderedProduct(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        # 주문 상세 템플릿을 그대로 사용할 수 있도록 Order와 같은 이름을 사용합니다.
+        related_name="orderedproduct_set",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    name = models.CharField("상품명", max_length=100)
+    price = models.PositiveIntegerField("상품가격")
+    quantity = models.PositiveIntegerField("수량")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = verbose_name = "보관된 주문상품"
+
+
+class ArchivedOrderPayment(AbstractPortonePayment):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="orderpayment_set",
+    )
+    # created_at 필드 추가 전에 보관된 결제내역은 값이 없습니다.
+    created_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = verbose_name = "보관된 주문결제"
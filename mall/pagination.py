@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder는 밀리초 단위로 절삭하므로, 커서 값이 어긋나지 않도록 그대로 직렬화합니다.
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+@dataclass
+class KeysetPage:
+    object_list: List[Any]
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    approximate_count: Optional[int] = None
+    per_page: int = 0
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    OFFSET/COUNT 없이, 직전 페이지의 마지막 레코드 값을 기준으로 다음 페이지를 조회합니다.
+
+    ordering의 마지막 필드는 pk와 같이 유일한 값이어야 하며, 정렬 기준 필드들로 구성된
+    복합 인덱스가 있어야 페이지 깊이와 무관하게 일정한 비용으로 조회할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        ordering: Sequence[str],
+        count_func: Optional[Callable[[], Optional[int]]] = None,
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.count_func = count_func
+
+    @staticmethod
+    def _field_name(order: str) -> str:
+        return order.lstrip("-")
+
+    @staticmethod
+    def _reverse(order: str) -> str:
+        return order[1:] if order.startswith("-") else f"-{order}"
+
+    def encode_cursor(self, obj, direction: str) -> str:
+        values = [getattr(obj, self._field_name(order)) for order in self.ordering]
+        data = json.dumps({"d": direction, "v": values}, cls=CursorJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = data["d"], data["v"]
+        except (binascii.Error, ValueError, TypeError, KeyError) as e:
+            raise InvalidCursor(str(e)) from e
+
+        if direction not in ("next", "prev") or len(raw_values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+
+        model = self.queryset.model
+        values = []
+        for order, raw_value in zip(self.ordering, raw_values):
+            name = self._field_name(order)
+            try:
+                model_field = (
+                    model._meta.pk if name == "pk" else model._meta.get_field(name)
+                )
+            except FieldDoesNotExist:
+                # annotate로 추가된 값 (ex: 검색 순위)
+                values.append(raw_value)
+                continue
+            try:
+                values.append(model_field.to_python(raw_value))
+            except Exception as e:  # noqa
+                raise InvalidCursor(str(e)) from e
+        return direction, values
+
+    def _after(self, ordering: Sequence[str], values: Sequence) -> Q:
+        # (a, b, c) 다음 레코드 : a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+        q = Q()
+        for i, order in enumerate(ordering):
+            condition = Q(
+                **{self._field_name(o): v for o, v in zip(ordering[:i], values[:i])}
+            )
+            lookup = "lt" if order.startswith("-") else "gt"
+            condition &= Q(**{f"{self._field_name(order)}__{lookup}": values[i]})
+            q |= condition
+        return q
+
+    def get_page(self, cursor: Optional[str] = None) -> KeysetPage:
+        direction, values = ("next", None) if not cursor else self.decode_cursor(cursor)
+
+        ordering = self.ordering
+        if direction == "prev":
+            ordering = [self._reverse(order) for order in ordering]
+
+        qs = self.queryset.order_by(*ordering)
+        if values is not None:
+            qs = qs.filter(self._after(ordering, values))
+
+        # 다음 페이지 존재여부 확인을 위해 1개를 더 조회합니다.
+        object_list = list(qs[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+
+        if direction == "prev":
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        page = KeysetPage(object_list=object_list, per_page=self.per_page)
+        if object_list:
+            if has_next:
+                page.next_cursor = self.encode_cursor(object_list[-1], "next")
+            if has_previous:
+                page.previous_cursor = self.encode_cursor(object_list[0], "prev")
+        if self.count_func is not None:
+            page.approximate_count = self.count_func()
+        return page
@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from iamport import Iamport
+from iamport.client import IAMPORT_API_URL
+
+
+logger = logging.getLogger("portone")
+
+
+class PortoneClient(Iamport):
+    """
+    프로세스 전역에서 공유하는 포트원 REST API 클라이언트
+
+    - HTTP 커넥션 풀을 유지하여, 요청마다 TCP/TLS 연결을 새로 맺지 않습니다.
+    - access token을 만료 직전까지 캐싱하고, 여러 쓰레드에서 동시에 만료되더라도
+      토큰 발급 요청은 1회만 수행합니다.
+    """
+
+    def __init__(
+        self,
+        imp_key,
+        imp_secret,
+        imp_url=IAMPORT_API_URL,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        timeout: Optional[float] = 10,
+        token_refresh_margin: int = 60,
+    ):
+        super().__init__(imp_key=imp_key, imp_secret=imp_secret, imp_url=imp_url)
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        self.requests_session.mount("https://", adapter)
+        self.requests_session.mount("http://", adapter)
+        self.adapter = adapter
+        self.timeout = timeout
+        self.token_refresh_margin = token_refresh_margin
+
+        self._token: Optional[str] = None
+        self._token_expired_at: float = 0
+        self._token_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._request_count = 0
+        self._token_fetch_count = 0
+        self._token_hit_count = 0
+
+    def _is_token_valid(self) -> bool:
+        return (
+            self._token is not None
+            and time.time() < self._token_expired_at - self.token_refresh_margin
+        )
+
+    def _incr(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _fetch_token(self):
+        url = f"{self.imp_url}users/getToken"
+        payload = {"imp_key": self.imp_key, "imp_secret": self.imp_secret}
+        self._incr("_request_count")
+        try:
+            response = self.requests_session.post(
+                url, json=payload, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise Iamport.HttpError(None, str(e)) from e
+        result = self.get_response(response)
+        self._incr("_token_fetch_count")
+
+        # 포트원 응답의 expired_at은 unix timestamp (초) 입니다.
+        # 서버와 시계가 어긋나 있을 수 있으므로, 서버 기준 남은 시간을 로컬 시각에 더합니다.
+        remaining = result["expired_at"] - result.get("now", time.time())
+        return result["access_token"], time.time() + remaining
+
+    def _get_token(self):
+        if self._is_token_valid():
+            self._incr("_token_hit_count")
+            return self._token
+
+        with self._token_lock:
+            # 락을 기다리는 동안 다른 쓰레드가 이미 갱신했을 수 있습니다.
+            if self._is_token_valid():
+                self._incr("_token_hit_count")
+                return self._token
+
+            self._token, self._token_expired_at = self._fetch_token()
+            return self._token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expired_at = 0
+
+    def _send(self, method, url, **kwargs):
+        self._incr("_request_count")
+        try:
+            return self.requests_session.request(
+                method, url, headers=self.get_headers(), timeout=self.timeout, **kwargs
+            )
+        except requests.RequestException as e:
+            # 연결 오류/타임아웃도 호출 측에서 HttpError로 일관되게 처리할 수 있도록 합니다.
+            raise Iamport.HttpError(None, str(e)) from e
+
+    def _request(self, method, url, **kwargs):
+        response = self._send(method, url, **kwargs)
+        if response.status_code == 401:
+            # 만료 전에 토큰이 폐기된 경우, 1회에 한해 재발급받아 재시도합니다.
+            self.invalidate_token()
+            response = self._send(method, url, **kwargs)
+        return self.get_response(response)
+
+    def _get(self, url, payload=None):
+        return self._request("GET", url, params=payload)
+
+    def _post(self, url, payload=None):
+        return self._request("POST", url, json=payload)
+
+    def _delete(self, url):
+        return self._request("DELETE", url)
+
+    def find_all_by_status(
+        self,
+        status: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+    ) -> Iterator[List[dict]]:
+        """
+        결제상태별 결제내역 목록을 페이지 단위로 조회합니다. since/until은 unix timestamp 입니다.
+        (Iamport.find_by_status는 _get에 지원하지 않는 인자를 넘기므로 사용하지 않습니다.)
+        """
+
+        url = f"{self.imp_url}payments/status/{status}"
+        page = 1
+        while True:
+            # 조회 중에 생성된 결제로 페이지가 밀리지 않도록, 오래된 순으로 조회합니다.
+            payload = {"page": page, "limit": limit, "sorting": "started"}
+            if since is not None:
+                payload["from"] = int(since)
+            if until is not None:
+                payload["to"] = int(until)
+            result = self._get(url, payload)
+            yield result["list"]
+            if not result.get("next"):
+                break
+            page = result["next"]
+
+    def get_stats(self) -> dict:
+        # urllib3 커넥션 풀은 새로 맺은 연결의 개수를 num_connections에 기록합니다.
+        pools = self.adapter.poolmanager.pools
+        connection_count = sum(pools[key].num_connections for key in pools.keys())
+        return {
+            "requests": self._request_count,
+            "connections": connection_count,
+            "connections_saved": max(self._request_count - connection_count, 0),
+            "token_fetches": self._token_fetch_count,
+            "token_fetches_saved": self._token_hit_count,
+        }
+
+
+_client: Optional[PortoneClient] = None
+_client_lock = threading.Lock()
+
+
+def get_portone_client() -> PortoneClient:
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PortoneClient(
+                    imp_key=settings.PORTONE_API_KEY,
+                    imp_secret=settings.PORTONE_API_SECRET,
+                    imp_url=settings.PORTONE_API_URL,
+                    pool_maxsize=settings.PORTONE_HTTP_POOL_MAXSIZE,
+                    timeout=settings.PORTONE_HTTP_TIMEOUT,
+                    token_refresh_margin=settings.PORTONE_TOKEN_REFRESH_MARGIN,
+                )
+    return _client
+
+
+def reset_portone_client():
+    """설정 변경 시(테스트 등) 다음 호출에서 클라이언트를 새로 생성하도록 합니다."""
+    global _client
+
+    with _client_lock:
+        _client = None
+
+
+@receiver(setting_changed)
+def on_portone_setting_changed(sender, setting, **kwargs):
+    if setting.startswith("PORTONE_"):
+        reset_portone_client()
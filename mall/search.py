@@ -0,0 +1,238 @@
+import logging
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+
+logger = logging.getLogger(__name__)
+
+
+class BaseSearchBackend:
+    """
+    상품명/상품설명/분류명에 대한 검색 인덱스
+
+    인덱스는 상품 저장/삭제 시에 signals를 통해 1건씩 갱신되며, 전체 재생성은
+    "python manage.py rebuild_search_index" 명령으로 수행합니다.
+    검색 결과에는 search_rank 필드가 추가되며, 값이 클수록 검색어와 관련도가 높습니다.
+    인덱스 테이블은 mall 앱의 마이그레이션에서 생성합니다.
+    """
+
+    table_name = "mall_product_search"
+    # 인덱스를 사용할 수 없는 검색어는 이 필드들에서 icontains로 찾습니다.
+    search_fields = ["name", "description", "category__name"]
+
+    def index(self, products: Iterable, using: str = DEFAULT_DB_ALIAS):
+        pass
+
+    def remove(self, pk_list: List[int], using: str = DEFAULT_DB_ALIAS):
+        pass
+
+    def clear(self, using: str = DEFAULT_DB_ALIAS):
+        pass
+
+    def filter_terms(self, queryset: QuerySet, terms: List[str]) -> QuerySet:
+        """검색어의 단어들이 모두 (상품명/상품설명/분류명 중 하나에) 포함된 상품을 찾습니다."""
+
+        for term in terms:
+            condition = Q()
+            for field_name in self.search_fields:
+                condition |= Q(**{f"{field_name}__icontains": term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return self.filter_terms(queryset, query.split()).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def rebuild(self, queryset: QuerySet, batch_size: int = 500) -> int:
+        using = queryset.db
+        self.clear(using=using)
+        count = 0
+        queryset = queryset.select_related("category").order_by("pk")
+        last_pk = 0
+        while True:
+            product_list = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not product_list:
+                break
+            self.index(product_list, using=using)
+            count += len(product_list)
+            last_pk = product_list[-1].pk
+        return count
+
+    @staticmethod
+    def get_row(product) -> tuple:
+        return (
+            product.pk,
+            product.name,
+            product.description,
+            product.category.name if product.category_id else "",
+        )
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """별도의 검색 인덱스를 지원하지 않는 데이터베이스에서 사용합니다."""
+
+
+class SqliteFTS5SearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 가상 테이블 (trigram tokenizer)
+
+    trigram tokenizer는 형태소 분석 없이도 한글 부분일치 검색을 지원하지만,
+    3글자 미만의 단어는 인덱스를 사용할 수 없어 icontains 검색으로 대체합니다.
+    """
+
+    table_name = "mall_product_fts"
+    # bm25 컬럼별 가중치 : 상품명, 상품설명, 분류명
+    weights = (10.0, 1.0, 3.0)
+    min_term_length = 3
+
+    def index(self, products: Iterable, using: str = DEFAULT_DB_ALIAS):
+        rows = [self.get_row(product) for product in products]
+        if rows:
+            with connections[using].cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {self.table_name} "
+                    f"(rowid, name, description, category) VALUES (%s, %s, %s, %s)",
+                    rows,
+                )
+
+    def remove(self, pk_list: List[int], using: str = DEFAULT_DB_ALIAS):
+        if pk_list:
+            with connections[using].cursor() as cursor:
+                placeholders = ", ".join(["%s"] * len(pk_list))
+                cursor.execute(
+                    f"DELETE FROM {self.table_name} WHERE rowid IN ({placeholders})",
+                    list(pk_list),
+                )
+
+    def clear(self, using: str = DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table_name}")
+
+    @staticmethod
+    def get_match_expression(terms: List[str]) -> Optional[str]:
+        """모든 단어가 포함된 상품을 찾는 MATCH 표현식"""
+
+        if not terms:
+            return None
+        return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        # 3글자 이상의 단어는 인덱스로 찾고 순위를 매기며, 나머지 단어는 icontains로 거릅니다.
+        terms = query.split()
+        index_terms = [term for term in terms if len(term) >= self.min_term_length]
+        expression = self.get_match_expression(index_terms)
+        if expression is None:
+            return super().search(queryset, query)
+
+        queryset = self.filter_terms(
+            queryset, [term for term in terms if term not in index_terms]
+        )
+        db_table = queryset.model._meta.db_table
+        weights = ", ".join(str(weight) for weight in self.weights)
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {self.table_name} WHERE {self.table_name} MATCH %s",
+                [expression],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({self.table_name}, {weights}) FROM {self.table_name} "
+                f"WHERE {self.table_name} MATCH %s AND rowid = {db_table}.id",
+                [expression],
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL tsvector + pg_trgm
+
+    - tsvector : 상품명(A), 분류명(B), 상품설명(C) 가중치로 단어 단위 검색 및 순위
+    - pg_trgm : 형태소 분석기가 없는 한글의 부분일치 검색 (ILIKE를 GIN 인덱스로 처리)
+    """
+
+    config = "simple"
+
+    def index(self, products: Iterable, using: str = DEFAULT_DB_ALIAS):
+        rows = [self.get_row(product) for product in products]
+        if not rows:
+            return
+
+        config = self.config
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {self.table_name} (product_id, document, vector)
+                VALUES (
+                    %(pk)s,
+                    concat_ws(' ', %(name)s, %(category)s, %(description)s),
+                    setweight(to_tsvector('{config}', %(name)s), 'A')
+                    || setweight(to_tsvector('{config}', %(category)s), 'B')
+                    || setweight(to_tsvector('{config}', %(description)s), 'C')
+                )
+                ON CONFLICT (product_id) DO UPDATE
+                SET document = EXCLUDED.document, vector = EXCLUDED.vector
+                """,
+                [
+                    {"pk": pk, "name": name, "description": desc, "category": category}
+                    for pk, name, desc, category in rows
+                ],
+            )
+
+    def remove(self, pk_list: List[int], using: str = DEFAULT_DB_ALIAS):
+        if pk_list:
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {self.table_name} WHERE product_id = ANY(%s)",
+                    [list(pk_list)],
+                )
+
+    def clear(self, using: str = DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table_name}")
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        query = query.strip()
+        if not query:
+            return super().search(queryset, query)
+
+        like = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        like += "%"
+        db_table = queryset.model._meta.db_table
+        config = self.config
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT product_id FROM {self.table_name} "
+                f"WHERE vector @@ plainto_tsquery('{config}', %s) OR document ILIKE %s",
+                [query, like],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(vector, plainto_tsquery('{config}', %s)) "
+                f"+ similarity(document, %s) "
+                f"FROM {self.table_name} WHERE product_id = {db_table}.id",
+                [query, query],
+                output_field=FloatField(),
+            )
+        )
+
+
+BACKENDS = {
+    "sqlite": SqliteFTS5SearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def _get_backend(vendor: str) -> BaseSearchBackend:
+    return BACKENDS.get(vendor, IContainsSearchBackend)()
+
+
+def get_search_backend(using: str = DEFAULT_DB_ALIAS) -> BaseSearchBackend:
+    return _get_backend(connections[using].vendor)
@@ -0,0 +1,59 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mall.autocomplete import ProductNameIndex
+from mall.caches import cart_summary_cache, product_list_cache
+from mall.carts import SessionCart
+from mall.models import Category, Product
+from mall.search import get_search_backend
+from mall.thumbnails import schedule_thumbnails
+
+
+@receiver(post_save, sender=Product)
+def on_product_saved(
+    sender, instance: Product, using, raw=False, update_fields=None, **kwargs
+):
+    if not raw:
+        get_search_backend(using).index([instance], using=using)
+        # 첫 방문자가 썸네일 생성 비용을 치르지 않도록 미리 생성합니다.
+        if instance.photo and (update_fields is None or "photo" in update_fields):
+            schedule_thumbnails([instance.pk])
+    ProductNameIndex.invalidate()
+    product_list_cache.invalidate()
+    # 장바구니 요약의 금액/판매중 여부가 바뀔 수 있습니다.
+    cart_summary_cache.invalidate_all()
+
+
+@receiver(post_delete, sender=Product)
+def on_product_deleted(sender, instance: Product, using, **kwargs):
+    get_search_backend(using).remove([instance.pk], using=using)
+    ProductNameIndex.invalidate()
+    product_list_cache.invalidate()
+    # 장바구니에 담긴 상품(CartProduct)도 함께 삭제됩니다.
+    cart_summary_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Category)
+def on_category_saved(
+    sender, instance: Category, using, created=False, raw=False, **kwargs
+):
+    # 분류명도 검색 대상이므로, 분류에 속한 상품들을 다시 색인합니다.
+    if not raw and not created:
+        product_list = list(instance.product_set.using(using))
+        for product in product_list:
+            product.category = instance
+        get_search_backend(using).index(product_list, using=using)
+    product_list_cache.invalidate()
+
+
+@receiver(post_delete, sender=Category)
+def on_category_deleted(sender, instance: Category, **kwargs):
+    product_list_cache.invalidate()
+
+
+@receiver(user_logged_in)
+def on_user_logged_in(sender, request, user, **kwargs):
+    # 로그인 전에 담은 세션 장바구니를 사용자의 장바구니에 합칩니다.
+    if request is not None and hasattr(request, "session"):
+        SessionCart(request.session).merge(user)
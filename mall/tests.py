@@ -1,3 +1,2017 @@
-from django.test import TestCase
+import base64
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from uuid import uuid4
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    LiveServerTestCase,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from iamport import Iamport
+from PIL import Image
+from sorl.thumbnail import default
+
+from accounts.models import User
+from mall import carts
+from mall.autocomplete import ProductNameIndex, decompose
+from mall.caches import product_list_cache
+from mall.carts import SessionCart
+from mall.fake_portone import FakePortoneServer
+from mall.models import (
+    ArchivedOrder,
+    ArchivedOrderPayment,
+    CartProduct,
+    Category,
+    EmptyCartError,
+    Order,
+    OrderedProduct,
+    OrderPayment,
+    OutOfStockError,
+    PortoneWebhook,
+    Product,
+    StockReservation,
+)
+from mall.pagination import KeysetPaginator
+from mall.portone import PortoneClient
+from mall.search import get_search_backend
+from mall.thumbnails import warm_product_thumbnails
+from mall.views import ProductListView
+from mall.webhooks import WebhookWorker, enqueue_webhook
+
+
+def create_products(size: int):
+    category = Category.objects.create(name="분류")
+    return Product.objects.bulk_create(
+        [
+            Product(
+                category=category,
+                name=f"상품 {i}",
+                price=1000 * (i + 1),
+                status=Product.Status.ACTIVE,
+            )
+            for i in range(size)
+        ]
+    )
+
+
+def fill_cart(user, product_list, quantity: int = 1):
+    CartProduct.objects.bulk_create(
+        [
+            CartProduct(user=user, product=product, quantity=quantity)
+            for product in product_list
+        ]
+    )
+
+
+class ProductSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.drink = Category.objects.create(name="과일 음료")
+        cls.snack = Category.objects.create(name="간식")
+        cls.juice = Product.objects.create(
+            category=cls.drink, name="사과주스 1리터", price=3000
+        )
+        cls.orange = Product.objects.create(
+            category=cls.drink,
+            name="오렌지 에이드",
+            description="사과주스 맛이 살짝 나는 에이드",
+            price=2000,
+        )
+        cls.grape = Product.objects.create(
+            category=cls.snack, name="포도", description="달콤한 포도", price=1000
+        )
+
+    def search(self, query):
+        qs = get_search_backend().search(Product.objects.all(), query)
+        return list(qs.order_by("-search_rank", "-pk"))
+
+    def test_ranking(self):
+        # 상품명에 검색어가 포함된 상품이 상품설명에만 포함된 상품보다 앞에 옵니다.
+        self.assertEqual(self.search("사과주스"), [self.juice, self.orange])
+        self.assertEqual(self.search("에이드 사과주스"), [self.orange])
+
+    def test_short_terms(self):
+        # 2글자 검색어도 상품명뿐 아니라 상품설명, 분류명에서 찾습니다.
+        self.assertEqual(self.search("포도"), [self.grape])
+        self.assertEqual(self.search("달콤"), [self.grape])
+        self.assertEqual(self.search("음료"), [self.orange, self.juice])
+        self.assertEqual(self.search("사과주스 1리터"), [self.juice])
+        self.assertEqual(self.search("음료 에이드"), [self.orange])
+
+    def test_index_on_save_and_delete(self):
+        self.grape.name = "청포도 젤리"
+        self.grape.save()
+        self.assertEqual(self.search("청포도"), [self.grape])
+        self.assertEqual(self.search("포도 젤리"), [self.grape])
+
+        self.snack.name = "디저트류"
+        self.snack.save()
+        self.assertEqual(self.search("디저트"), [self.grape])
+
+        self.grape.delete()
+        self.assertEqual(self.search("청포도"), [])
+        self.assertEqual(self.search("디저트"), [])
+
+
+class AutocompleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="분류")
+        cls.juice, cls.grape_juice, cls.pie, cls.jam = [
+            Product.objects.create(
+                category=category, name=name, price=1000, status=status
+            )
+            for name, status in (
+                ("사과 주스", Product.Status.ACTIVE),
+                ("청포도 주스", Product.Status.ACTIVE),
+                ("Apple Pie", Product.Status.ACTIVE),
+                ("사과 잼", Product.Status.INACTIVE),
+            )
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.index = ProductNameIndex()
+
+    def lookup(self, prefix):
+        return [pk for pk, __ in self.index.lookup(prefix)]
+
+    def test_decompose(self):
+        self.assertEqual(decompose("값"), "ㄱㅏㅂㅅ")
+        self.assertEqual(decompose("과일"), "ㄱㅗㅏㅇㅣㄹ")
+        self.assertEqual(decompose("Apple 잼"), "apple ㅈㅐㅁ")
+        # 입력 중인 음절도 접두어로 매칭됩니다.
+        self.assertTrue(decompose("값").startswith(decompose("갑")))
+        self.assertTrue(decompose("사과").startswith(decompose("삭")))
+
+    def test_lookup(self):
+        self.assertEqual(self.lookup("삭"), [self.juice.pk])
+        self.assertEqual(self.lookup("사과 주"), [self.juice.pk])
+        # 단어 중간부터의 검색, 대소문자 무시
+        self.assertEqual(
+            sorted(self.lookup("주스")), [self.juice.pk, self.grape_juice.pk]
+        )
+        self.assertEqual(self.lookup("PIE"), [self.pie.pk])
+        # 판매중이 아닌 상품, 단어 시작이 아닌 위치는 찾지 않습니다.
+        self.assertEqual(self.lookup("잼"), [])
+        self.assertEqual(self.lookup("포도"), [])
+        self.assertEqual(self.lookup(" "), [])
+
+    def test_rebuild_on_product_change(self):
+        self.assertEqual(self.lookup("오렌"), [])
+        orange = Product.objects.create(
+            category=self.juice.category,
+            name="오렌지 주스",
+            price=1000,
+            status=Product.Status.ACTIVE,
+        )
+        self.assertEqual(self.lookup("오렌"), [orange.pk])
+
+        orange.name = "한라봉 주스"
+        orange.save()
+        self.assertEqual(self.lookup("오렌"), [])
+        self.assertEqual(self.lookup("한라"), [orange.pk])
+
+    def test_rebuild_on_change_from_other_process(self):
+        self.assertEqual(self.lookup("청포"), [self.grape_juice.pk])
+
+        # 캐시 버전을 올리지 않는 변경 (캐시를 공유하지 않는 다른 프로세스에서의 변경)
+        Product.objects.filter(pk=self.grape_juice.pk).update(
+            status=Product.Status.INACTIVE
+        )
+        Product.objects.filter(pk=self.jam.pk).update(status=Product.Status.ACTIVE)
+
+        self.assertEqual(self.lookup("청포"), [self.grape_juice.pk])
+        with override_settings(MALL_AUTOCOMPLETE_CHECK_INTERVAL=0):
+            self.assertEqual(self.lookup("청포"), [])
+            self.assertEqual(self.lookup("사과 잼"), [self.jam.pk])
+
+
+@override_settings(
+    MALL_PRODUCT_LIST_CACHE_TIMEOUT=0, MALL_PRODUCT_COUNT_CACHE_TIMEOUT=0
+)
+class ProductListThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        buffer = BytesIO()
+        Image.new("RGB", (100, 100), "red").save(buffer, "PNG")
+        product_list = create_products(8)
+        for product in product_list:
+            product.photo = default_storage.save(
+                f"mall/product/photo/{product.pk}.png", ContentFile(buffer.getvalue())
+            )
+        Product.objects.bulk_update(product_list, ["photo"])
+        warm_product_thumbnails([product.pk for product in product_list])
+
+    def test_query_count(self):
+        # 상품 페이지 조회, 썸네일 key-value store 일괄 조회 (상품 수와 무관)
+        for size in (1, 4, 8):
+            with self.subTest(size=size):
+                cache.clear()
+                default.kvstore.local.clear()
+                with mock.patch.object(ProductListView, "paginate_by", size):
+                    with self.assertNumQueries(2):
+                        response = self.client.get(reverse("product_list"))
+                self.assertEqual(response.content.count(b"<img "), size)
+
+
+def has_avif_support() -> bool:
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+@override_settings(
+    MALL_THUMBNAIL_ASYNC=False, MALL_PHOTO_VARIANT_WIDTHS=[320, 480, 960]
+)
+class PhotoVariantTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        (self.product,) = create_products(1)
+
+    def save_photo(self, name: str, size=(700, 600)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "red").save(buffer, "PNG")
+        self.product.photo.save(name, ContentFile(buffer.getvalue()), save=False)
+        # 사진 저장 시에 트랜잭션 커밋 후 썸네일과 변환 이미지를 생성합니다.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.product.refresh_from_db()
+
+    def test_variants(self):
+        self.save_photo("variant.png")
+        photo_variants = self.product.photo_variants
+        self.assertEqual(photo_variants["source"], self.product.photo.name)
+
+        expected_formats = {"image/webp": "WEBP"}
+        if has_avif_support():
+            expected_formats["image/avif"] = "AVIF"
+        self.assertEqual(set(photo_variants["formats"]), set(expected_formats))
+
+        for mime_type, pil_format in expected_formats.items():
+            # 원본(600px)보다 큰 너비는 생성하지 않습니다.
+            variant_list = photo_variants["formats"][mime_type]
+            self.assertEqual([width for width, __ in variant_list], [320, 480])
+            for width, name in variant_list:
+                with default_storage.open(name) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, pil_format)
+                    self.assertEqual(image.size, (width, width))
+
+        response = self.client.get(reverse("product_list"))
+        for source in self.product.get_photo_sources():
+            self.assertIn(source["type"], expected_formats)
+            self.assertContains(
+                response, f'<source type="{source["type"]}" srcset="{source["srcset"]}"'
+            )
+        self.assertContains(response, "<source ", count=len(expected_formats))
+        webp_url_list = [
+            default_storage.url(name)
+            for __, name in photo_variants["formats"]["image/webp"]
+        ]
+        self.assertContains(
+            response, f"{webp_url_list[0]} 320w, {webp_url_list[1]} 480w"
+        )
+
+    @skipUnless(has_avif_support(), "Pillow가 AVIF 인코딩을 지원하지 않습니다.")
+    def test_avif_first(self):
+        # 브라우저는 먼저 나열된 지원 포맷을 사용하므로, AVIF가 WebP보다 앞에 옵니다.
+        self.save_photo("avif.png")
+        self.assertEqual(
+            [source["type"] for source in self.product.get_photo_sources()],
+            ["image/avif", "image/webp"],
+        )
+
+    def test_photo_changed(self):
+        self.save_photo("old.png")
+        old_name_list = [
+            name
+            for variant_list in self.product.photo_variants["formats"].values()
+            for __, name in variant_list
+        ]
+
+        # 변환 이미지가 생성되기 전에는 <source> 없이 원본 썸네일만 사용합니다.
+        self.product.photo = "mall/product/photo/other.png"
+        self.assertEqual(self.product.get_photo_sources(), [])
+
+        self.save_photo("new.png", size=(400, 400))
+        self.assertEqual(
+            [
+                width
+                for width, __ in self.product.photo_variants["formats"]["image/webp"]
+            ],
+            [320],
+        )
+        for name in old_name_list:
+            self.assertFalse(default_storage.exists(name))
+
+
+@override_settings(MALL_PRODUCT_LIST_CACHE_TIMEOUT=0)
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # 가격과 등록시각이 같은 상품들이 페이지 경계에 걸치도록 합니다.
+        cls.product_list = create_products(8)
+        now = timezone.now()
+        for i, product in enumerate(cls.product_list):
+            product.price = [1000, 2000, 2000, 2000, 3000, 3000, 4000, 4000][i]
+            product.created_at = now - timedelta(days=[3, 3, 3, 2, 2, 1, 1, 0][i])
+        Product.objects.bulk_update(cls.product_list, ["price", "created_at"])
+
+    def setUp(self):
+        cache.clear()
+
+    def get_pages(self, ordering, per_page: int = 3) -> list:
+        paginator = KeysetPaginator(Product.objects.all(), per_page, ordering)
+        page_list = [paginator.get_page()]
+        while page_list[-1].has_next():
+            page_list.append(paginator.get_page(page_list[-1].next_cursor))
+        return page_list
+
+    def test_cursors(self):
+        for sort, (__, ordering) in ProductListView.sort_choices.items():
+            with self.subTest(sort=sort):
+                expected = list(
+                    Product.objects.order_by(*ordering).values_list("pk", flat=True)
+                )
+                page_list = self.get_pages(ordering)
+                self.assertEqual(
+                    [product.pk for page in page_list for product in page], expected
+                )
+                self.assertEqual([len(page) for page in page_list], [3, 3, 2])
+                self.assertFalse(page_list[0].has_previous())
+
+                # 이전 페이지 커서로 되돌아가면 같은 페이지가 조회됩니다.
+                paginator = KeysetPaginator(Product.objects.all(), 3, ordering)
+                for i in range(len(page_list) - 1, 0, -1):
+                    page = paginator.get_page(page_list[i].previous_cursor)
+                    self.assertEqual(page.object_list, page_list[i - 1].object_list)
+                    self.assertEqual(page.has_previous(), i > 1)
+                    self.assertTrue(page.has_next())
+
+    def test_view(self):
+        for sort in ProductListView.sort_choices:
+            with self.subTest(sort=sort):
+                url = reverse("product_list")
+                params = {"sort": sort} if sort else {}
+                response = self.client.get(url, params)
+                first_page = list(response.context["page_obj"])
+                next_url = response.context["next_page_url"]
+                self.assertIn("cursor=", next_url)
+                self.assertEqual(response.context["previous_page_url"], "")
+
+                response = self.client.get(next_url)
+                self.assertNotEqual(list(response.context["page_obj"]), first_page)
+                response = self.client.get(response.context["previous_page_url"])
+                self.assertEqual(list(response.context["page_obj"]), first_page)
+
+    def test_invalid_cursor(self):
+        def encode(data) -> str:
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+        for cursor in [
+            "garbage!",
+            encode([1, 2]),
+            encode({"d": "next"}),
+            encode({"d": "up", "v": [1]}),
+            encode({"d": "next", "v": [1, 2, 3]}),
+            encode({"d": "next", "v": ["abc", 1]}),
+            encode({"d": "next", "v": ["2023-13-45", 1]}),
+        ]:
+            for sort in ("price", "newest"):
+                with self.subTest(cursor=cursor, sort=sort):
+                    response = self.client.get(
+                        reverse("product_list"), {"sort": sort, "cursor": cursor}
+                    )
+                    self.assertEqual(response.status_code, 404)
+
+    def test_approximate_count(self):
+        response = self.client.get(reverse("product_list"))
+        self.assertEqual(response.context["page_obj"].approximate_count, 8)
+        self.assertContains(response, "약 8개의 상품")
+
+        # 시그널이 발생하지 않는 변경은 캐시가 만료될 때까지 반영되지 않으며,
+        # 다음 페이지에서는 COUNT 쿼리를 수행하지 않습니다.
+        Product.objects.bulk_create(
+            [
+                Product(
+                    category=self.product_list[0].category,
+                    name="새 상품",
+                    price=1000,
+                    status=Product.Status.ACTIVE,
+                )
+            ]
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(response.context["next_page_url"])
+        self.assertEqual(response.context["page_obj"].approximate_count, 8)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context.captured_queries)
+        )
+
+        with override_settings(MALL_PRODUCT_COUNT_CACHE_TIMEOUT=0):
+            response = self.client.get(reverse("product_list"))
+        self.assertIsNone(response.context["page_obj"].approximate_count)
+        self.assertNotContains(response, "개의 상품")
+
+
+class ProductListCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="password")
+        cls.product_list = create_products(3)
+
+    def setUp(self):
+        cache.clear()
+        product_list_cache.stats.reset()
+
+    def get_product_list(self):
+        response = self.client.get(reverse("product_list"))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_cached(self):
+        stats = product_list_cache.stats.get()
+        with self.assertNumQueries(0):
+            self.get_product_list()
+        self.assertEqual(product_list_cache.stats.get()["hits"], stats["hits"] + 1)
+        self.assertEqual(product_list_cache.stats.get()["misses"], stats["misses"])
+
+    def assert_invalidated(self):
+        stats = product_list_cache.stats.get()
+        self.get_product_list()
+        self.assertEqual(product_list_cache.stats.get()["misses"], stats["misses"] + 1)
+        self.assert_cached()
+
+    def test_hit(self):
+        self.assertContains(self.get_product_list(), self.product_list[0].name)
+        self.assertEqual(
+            product_list_cache.stats.get(), {"hits": 0, "misses": 1, "hit_ratio": 0.0}
+        )
+        self.assert_cached()
+        self.assertEqual(product_list_cache.stats.get()["hit_ratio"], 0.5)
+
+    def test_invalidate_on_product_saved(self):
+        self.get_product_list()
+        product = self.product_list[0]
+        product.name = "새 상품명"
+        product.save()
+        self.assert_invalidated()
+        self.assertContains(self.get_product_list(), "새 상품명")
+
+        product.delete()
+        self.assert_invalidated()
+
+    def test_invalidate_on_category_saved(self):
+        self.get_product_list()
+        category = self.product_list[0].category
+        category.name = "새 분류명"
+        category.save()
+        self.assert_invalidated()
+        self.assertContains(self.get_product_list(), "새 분류명")
+
+    def test_invalidate_on_make_active(self):
+        product = self.product_list[0]
+        Product.objects.filter(pk=product.pk).update(status=Product.Status.INACTIVE)
+        # 판매중이 아닌 상품도 담겨 있는 세션 장바구니
+        session_cart = SessionCart(self.client.session)
+        session_cart.add_quantities({product.pk: 1})
+        self.assertEqual(session_cart.get_summary()["item_count"], 0)
+        self.assertNotContains(self.get_product_list(), product.name)
+
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:mall_product_changelist"),
+            {"action": "make_active", "_selected_action": [product.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        self.assert_invalidated()
+        self.assertContains(self.get_product_list(), product.name)
+        self.assertEqual(session_cart.get_summary()["item_count"], 1)
+
+
+class CartAddQuantitiesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.other_user = User.objects.create_user(username="other")
+        cls.product_list = create_products(3)
+
+    def get_quantities(self, user) -> dict:
+        return dict(
+            CartProduct.objects.filter(user=user).values_list("product", "quantity")
+        )
+
+    def check_add_quantities(self, add_quantities):
+        p0, p1, p2 = [product.pk for product in self.product_list]
+        CartProduct.objects.create(user=self.user, product_id=p0, quantity=2)
+        CartProduct.objects.create(user=self.other_user, product_id=p1, quantity=7)
+
+        # 기존 상품 수량 증가 + 새 상품 추가
+        self.assertEqual(add_quantities(self.user, {p0: 3, p1: 1}), {p0: 5, p1: 1})
+        self.assertEqual(add_quantities(self.user, {p1: 2, p2: 4}), {p1: 3, p2: 4})
+        self.assertEqual(add_quantities(self.user, {}), {})
+
+        self.assertEqual(self.get_quantities(self.user), {p0: 5, p1: 3, p2: 4})
+        self.assertEqual(self.get_quantities(self.other_user), {p1: 7})
+
+    def test_upsert(self):
+        p0 = self.product_list[0].pk
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                CartProduct.objects.add_quantities(self.user, {p0: 1}), {p0: 1}
+            )
+        CartProduct.objects.all().delete()
+
+        self.check_add_quantities(CartProduct.objects.add_quantities)
+
+    def test_upsert_without_returning(self):
+        # SQLite 3.35 미만 : RETURNING 절을 지원하지 않습니다.
+        with mock.patch.object(
+            connection.features, "can_return_columns_from_insert", False
+        ):
+            self.check_add_quantities(CartProduct.objects.add_quantities)
+
+    def test_update_or_create(self):
+        # upsert 문법을 지원하지 않는 데이터베이스에서 사용하는 F() 표현식 방식
+        self.check_add_quantities(
+            CartProduct.objects.all()._update_or_create_quantities
+        )
+
+
+class AddToCartBulkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(3)
+        cls.inactive = cls.product_list[2]
+        Product.objects.filter(pk=cls.inactive.pk).update(
+            status=Product.Status.INACTIVE
+        )
+
+    def post(self, data, **kwargs):
+        return self.client.post(
+            reverse("add_to_cart_bulk"),
+            data if isinstance(data, str) else json.dumps(data),
+            content_type="application/json",
+            **kwargs,
+        )
+
+    def get_quantities(self) -> dict:
+        return dict(
+            CartProduct.objects.filter(user=self.user).values_list(
+                "product", "quantity"
+            )
+        )
+
+    def test_add(self):
+        p0, p1 = [product.pk for product in self.product_list[:2]]
+        self.client.force_login(self.user)
+        CartProduct.objects.create(user=self.user, product_id=p0, quantity=2)
+
+        response = self.post(
+            {"items": [{"product": p0, "quantity": 3}, {"product": p1}]}
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {"product": p0, "quantity": 3, "ok": True, "cart_quantity": 5},
+                    {"product": p1, "quantity": 1, "ok": True, "cart_quantity": 1},
+                ]
+            },
+        )
+        self.assertEqual(self.get_quantities(), {p0: 5, p1: 1})
+
+    def test_invalid_items(self):
+        p0 = self.product_list[0].pk
+        self.client.force_login(self.user)
+
+        response = self.post(
+            {
+                "items": [
+                    {"product": p0, "quantity": 2},
+                    {"product": True},
+                    {"product": str(p0)},
+                    {"product": p0, "quantity": True},
+                    {"product": p0, "quantity": 0},
+                    {"product": p0, "quantity": 101},
+                    {"product": p0, "quantity": 1.5},
+                    {"product": self.inactive.pk},
+                    {"product": 999999},
+                    "item",
+                ]
+            }
+        )
+        result_list = response.json()["results"]
+        self.assertEqual([result["ok"] for result in result_list], [True] + [False] * 9)
+        self.assertEqual(result_list[1]["error"], "상품 pk가 필요합니다.")
+        self.assertEqual(result_list[5]["error"], "수량은 1 이상 100 이하여야 합니다.")
+        self.assertEqual(result_list[7]["error"], "판매중인 상품이 아닙니다.")
+        self.assertEqual(self.get_quantities(), {p0: 2})
+
+    def test_bad_request(self):
+        self.client.force_login(self.user)
+        items = [{"product": self.product_list[0].pk}]
+        for data in ["{", "[]", {"item": items}, {"items": {"product": 1}}]:
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+
+        with override_settings(MALL_CART_BULK_MAX_ITEMS=2):
+            self.assertEqual(self.post({"items": items * 3}).status_code, 400)
+            self.assertEqual(self.post({"items": items * 2}).status_code, 200)
+        self.assertEqual(self.get_quantities(), {self.product_list[0].pk: 2})
+
+    def test_session_cart(self):
+        p0, p1 = [product.pk for product in self.product_list[:2]]
+        response = self.post(
+            {
+                "items": [
+                    {"product": p0, "quantity": 2},
+                    {"product": p0, "quantity": 1},
+                    {"product": p1},
+                    {"product": self.inactive.pk},
+                ]
+            }
+        )
+        self.assertEqual(
+            [result.get("cart_quantity") for result in response.json()["results"]],
+            [3, 3, 1, None],
+        )
+        self.assertEqual(SessionCart(self.client.session).get_items(), {p0: 3, p1: 1})
+        self.assertFalse(CartProduct.objects.exists())
+
+
+class SessionCartTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(3)
+
+    def test_add_quantities(self):
+        p0, p1, p2 = [product.pk for product in self.product_list]
+        cart = SessionCart(self.client.session)
+        self.assertEqual(cart.add_quantities({p0: 3, p1: 1}), {p0: 3, p1: 1})
+        self.assertEqual(cart.add_quantities({p1: 2, p2: 4}), {p1: 3, p2: 4})
+        self.assertEqual(cart.add_quantities({}), {})
+        self.assertEqual(cart.get_items(), {p0: 3, p1: 3, p2: 4})
+
+        cart.clear()
+        self.assertIsNone(cart.get_cart_id())
+        self.assertEqual(cart.get_items(), {})
+
+    def test_concurrent_add_quantities(self):
+        # 같은 세션의 동시 요청에서도 수량이 유실되지 않아야 합니다.
+        p0, p1 = [product.pk for product in self.product_list[:2]]
+        session = self.client.session
+        SessionCart(session).get_cart_id(create=True)
+        barrier = threading.Barrier(8)
+        cache_get = LocMemCache.get
+
+        def slow_get(self, *args, **kwargs):
+            # 캐시를 읽은 뒤에 다른 요청이 끼어들 수 있도록 잠시 지연합니다.
+            value = cache_get(self, *args, **kwargs)
+            time.sleep(0.001)
+            return value
+
+        def add():
+            barrier.wait()
+            for _ in range(20):
+                SessionCart(session).add_quantities({p0: 1, p1: 2})
+
+        thread_list = [threading.Thread(target=add) for _ in range(8)]
+        with mock.patch.object(LocMemCache, "get", autospec=True, side_effect=slow_get):
+            for thread in thread_list:
+                thread.start()
+            for thread in thread_list:
+                thread.join()
+
+        self.assertEqual(SessionCart(session).get_items(), {p0: 160, p1: 320})
+
+    def test_summary_excludes_inactive(self):
+        p0, p1, p2 = self.product_list
+        cart = SessionCart(self.client.session)
+        cart.add_quantities({p0.pk: 1, p1.pk: 2, p2.pk: 3})
+        Product.objects.filter(pk=p1.pk).update(status=Product.Status.INACTIVE)
+
+        self.assertEqual(
+            cart.get_summary(),
+            {
+                "item_count": 2,
+                "quantity": 4,
+                "total_amount": p0.price * 1 + p2.price * 3,
+            },
+        )
+
+    def test_merge(self):
+        p0, p1, p2 = self.product_list
+        CartProduct.objects.create(user=self.user, product=p0, quantity=2)
+        Product.objects.filter(pk=p2.pk).update(status=Product.Status.INACTIVE)
+
+        cart = SessionCart(self.client.session)
+        cart.add_quantities({p0.pk: 1, p1.pk: 2, p2.pk: 3})
+        self.assertEqual(cart.merge(self.user), {p0.pk: 3, p1.pk: 2})
+
+        self.assertEqual(
+            dict(
+                CartProduct.objects.filter(user=self.user).values_list(
+                    "product", "quantity"
+                )
+            ),
+            {p0.pk: 3, p1.pk: 2},
+        )
+        self.assertIsNone(cart.get_cart_id())
+        self.assertEqual(cart.get_items(), {})
+
+    def test_merge_on_login(self):
+        p0, p1 = self.product_list[:2]
+        for product, quantity in [(p0, 2), (p1, 1), (p0, 1)]:
+            url = reverse("add_to_cart", args=[product.pk])
+            response = self.client.post(f"{url}?quantity={quantity}")
+            self.assertEqual(response.status_code, 200)
+        self.assertFalse(CartProduct.objects.filter(user=self.user).exists())
+
+        # user_logged_in 시그널에서 세션 장바구니를 합칩니다.
+        self.client.login(username="tester", password="password")
+
+        self.assertEqual(
+            dict(
+                CartProduct.objects.filter(user=self.user).values_list(
+                    "product", "quantity"
+                )
+            ),
+            {p0.pk: 3, p1.pk: 1},
+        )
+        self.assertNotIn(SessionCart.session_key, self.client.session)
+
+
+class CartSummaryCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(2)
+
+    def setUp(self):
+        # 다른 테스트에서 같은 사용자 pk로 캐싱된 요약을 지웁니다.
+        cache.clear()
+        fill_cart(self.user, self.product_list, quantity=2)
+        self.user_request = RequestFactory().get("/")
+        self.user_request.user = self.user
+        self.session_request = RequestFactory().get("/")
+        self.session_request.user = AnonymousUser()
+        self.session_request.session = self.client.session
+        carts.add_quantities(
+            self.session_request, {product.pk: 2 for product in self.product_list}
+        )
+
+    def get_summary_list(self) -> list:
+        return [
+            carts.get_cart_summary(self.user_request),
+            carts.get_cart_summary(self.session_request),
+        ]
+
+    def test_cached(self):
+        summary_list = self.get_summary_list()
+        self.assertEqual(
+            summary_list[0], {"item_count": 2, "quantity": 4, "total_amount": 6000}
+        )
+        self.assertEqual(summary_list[1], summary_list[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_summary_list(), summary_list)
+
+    def test_price_changed(self):
+        self.get_summary_list()
+        product = self.product_list[0]
+        product.price = 5000
+        product.save()
+
+        for summary in self.get_summary_list():
+            self.assertEqual(summary["total_amount"], 14000)
+
+    def test_deactivated(self):
+        self.get_summary_list()
+        product = self.product_list[0]
+        product.status = Product.Status.INACTIVE
+        product.save()
+
+        # 세션 장바구니는 판매중인 상품만 합칩니다.
+        self.assertEqual(
+            carts.get_cart_summary(self.session_request),
+            {"item_count": 1, "quantity": 2, "total_amount": 4000},
+        )
+
+    def test_deleted(self):
+        self.get_summary_list()
+        self.product_list[0].delete()
+
+        for summary in self.get_summary_list():
+            self.assertEqual(
+                summary, {"item_count": 1, "quantity": 2, "total_amount": 4000}
+            )
+
+
+class CartDetailTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(20)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def make_post_data(self, cart_product_list, delete_size: int) -> dict:
+        data = {
+            "form-TOTAL_FORMS": len(cart_product_list),
+            "form-INITIAL_FORMS": len(cart_product_list),
+        }
+        for i, cart_product in enumerate(cart_product_list):
+            data[f"form-{i}-id"] = cart_product.pk
+            data[f"form-{i}-quantity"] = cart_product.quantity + 1
+            if i < delete_size:
+                data[f"form-{i}-DELETE"] = "on"
+        return data
+
+    def test_update_query_count(self):
+        # 세션, 사용자, 장바구니 조회 + SAVEPOINT, DELETE, UPDATE, RELEASE
+        for size in (2, 5, 20):
+            with self.subTest(size=size):
+                CartProduct.objects.filter(user=self.user).delete()
+                fill_cart(self.user, self.product_list[:size])
+                cart_product_list = list(
+                    CartProduct.objects.filter(user=self.user).order_by("product__name")
+                )
+                data = self.make_post_data(cart_product_list, delete_size=1)
+
+                with self.assertNumQueries(7):
+                    response = self.client.post(reverse("cart_detail"), data)
+                self.assertRedirects(response, reverse("cart_detail"))
+
+                quantity_dict = dict(
+                    CartProduct.objects.filter(user=self.user).values_list(
+                        "pk", "quantity"
+                    )
+                )
+                self.assertEqual(
+                    quantity_dict,
+                    {
+                        cart_product.pk: cart_product.quantity + 1
+                        for cart_product in cart_product_list[1:]
+                    },
+                )
+
+    def test_invalid_id(self):
+        cart_product = CartProduct.objects.create(
+            user=self.user, product=self.product_list[0], quantity=1
+        )
+        other_user = User.objects.create_user(username="other")
+        other_cart_product = CartProduct.objects.create(
+            user=other_user, product=self.product_list[0], quantity=1
+        )
+
+        data = self.make_post_data([cart_product], delete_size=0)
+        data["form-0-id"] = other_cart_product.pk
+        response = self.client.post(reverse("cart_detail"), data)
+
+        self.assertEqual(response.status_code, 200)
+        other_cart_product.refresh_from_db()
+        self.assertEqual(other_cart_product.quantity, 1)
+
+
+class CreateOrderFromCartTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(20)
+
+    def test_query_count(self):
+        # SAVEPOINT, 장바구니+상품 조회, 주문 INSERT, 주문상품 INSERT, 장바구니 DELETE, RELEASE
+        for size in (1, 5, 20):
+            with self.subTest(size=size):
+                fill_cart(self.user, self.product_list[:size], quantity=2)
+                cart_product_qs = CartProduct.objects.filter(user=self.user)
+
+                with self.assertNumQueries(6):
+                    order = Order.create_from_cart(self.user, cart_product_qs)
+
+                self.assertEqual(
+                    order.total_amount,
+                    sum(product.price * 2 for product in self.product_list[:size]),
+                )
+                self.assertEqual(order.orderedproduct_set.count(), size)
+                self.assertEqual(order.item_count, size)
+                self.assertFalse(cart_product_qs.exists())
+
+    def test_name(self):
+        # 담은 순서와 무관하게, 기존 주문명과 같이 상품 pk가 가장 큰 상품이 대표 상품입니다.
+        fill_cart(self.user, self.product_list[:3])
+        order = Order.create_from_cart(
+            self.user, CartProduct.objects.filter(user=self.user)
+        )
+        self.assertEqual(order.name, f"{self.product_list[2].name} 외 2건")
+
+    def test_empty_cart(self):
+        with self.assertRaises(EmptyCartError):
+            Order.create_from_cart(
+                self.user, CartProduct.objects.filter(user=self.user)
+            )
+        self.assertFalse(Order.objects.exists())
+
+    def test_double_submit(self):
+        fill_cart(self.user, self.product_list[:3])
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("order_new"))
+        order = Order.objects.get(user=self.user)
+        self.assertRedirects(
+            response,
+            reverse("order_pay", args=[order.pk]),
+            fetch_redirect_response=False,
+        )
+
+        response = self.client.get(reverse("order_new"))
+        self.assertRedirects(response, reverse("cart_detail"))
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_double_submit_serialized(self):
+        # ConcurrentCreateOrderFromCartTest의 불변식을 순차 실행으로 확인합니다.
+        # (SQLite는 SELECT ... FOR UPDATE를 지원하지 않아 동시 실행 테스트를 건너뜁니다.)
+        fill_cart(self.user, self.product_list[:5])
+        first_qs = CartProduct.objects.filter(user=self.user)
+        second_qs = CartProduct.objects.filter(user=self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            Order.create_from_cart(self.user, first_qs)
+
+        # 장바구니 조회부터 장바구니 삭제까지 하나의 트랜잭션에서 처리해야,
+        # 먼저 잠금을 얻은 요청이 커밋한 뒤에 다른 요청이 빈 장바구니를 조회합니다.
+        sql_list = [query["sql"] for query in context.captured_queries]
+        self.assertTrue(sql_list[0].startswith("SAVEPOINT"))
+        self.assertTrue(sql_list[1].startswith("SELECT"))
+        self.assertIn('"mall_cartproduct"', sql_list[1])
+        if connection.features.has_select_for_update:
+            self.assertIn("FOR UPDATE", sql_list[1])
+        self.assertTrue(sql_list[-2].startswith("DELETE"))
+        self.assertTrue(sql_list[-1].startswith("RELEASE SAVEPOINT"))
+
+        with self.assertRaises(EmptyCartError):
+            Order.create_from_cart(self.user, second_qs)
+
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(OrderedProduct.objects.count(), 5)
+        self.assertFalse(CartProduct.objects.filter(user=self.user).exists())
+
+
+class OrderNameMigrationTest(TransactionTestCase):
+    migrate_from = [("mall", "0011_stock_reservation")]
+    migrate_to = [("mall", "0012_order_name_item_count")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_backfill(self):
+        # 기존 Order.name 속성 : product_set.first() (상품 pk 역순)의 현재 상품명
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model("accounts", "User")
+        Category = apps.get_model("mall", "Category")
+        Product = apps.get_model("mall", "Product")
+        Order = apps.get_model("mall", "Order")
+        OrderedProduct = apps.get_model("mall", "OrderedProduct")
+
+        user = User.objects.create(username="tester")
+        category = Category.objects.create(name="분류")
+        apple, grape = [
+            Product.objects.create(category=category, name=name, price=1000)
+            for name in ("사과", "포도")
+        ]
+        order = Order.objects.create(user=user, total_amount=2000)
+        # 주문 후에 상품명이 바뀐 상품을 먼저 주문했습니다.
+        for product in (grape, apple):
+            OrderedProduct.objects.create(
+                order=order,
+                product=product,
+                name=f"옛 {product.name}",
+                price=1000,
+                quantity=1,
+            )
+        Product.objects.filter(pk=grape.pk).update(name="청포도")
+        single_order = Order.objects.create(user=user, total_amount=1000)
+        OrderedProduct.objects.create(
+            order=single_order, product=apple, name="사과", price=1000, quantity=1
+        )
+        empty_order = Order.objects.create(user=user, total_amount=0)
+
+        apps = self.migrate(self.migrate_to)
+        Order = apps.get_model("mall", "Order")
+
+        self.assertEqual(
+            dict(Order.objects.values_list("pk", "name")),
+            {
+                order.pk: "청포도 외 1건",
+                single_order.pk: "사과",
+                empty_order.pk: "등록된 상품이 없습니다.",
+            },
+        )
+        self.assertEqual(
+            dict(Order.objects.values_list("pk", "item_count")),
+            {order.pk: 2, single_order.pk: 1, empty_order.pk: 0},
+        )
+
+
+class OrderViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(5)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_orders(self, size: int, item_count: int):
+        order_list = Order.objects.bulk_create(
+            [
+                Order(user=self.user, total_amount=1000, status=Order.Status.PAID)
+                for __ in range(size)
+            ]
+        )
+        OrderedProduct.objects.bulk_create(
+            [
+                OrderedProduct(
+                    order=order,
+                    product=product,
+                    name=product.name,
+                    price=product.price,
+                    quantity=1,
+                )
+                for order in order_list
+                for product in self.product_list[:item_count]
+            ]
+        )
+        return order_list
+
+    def get(self, url, data=None):
+        # 장바구니 요약 캐시 적중여부에 따라 쿼리 수가 달라지지 않도록 합니다.
+        cache.clear()
+        return self.client.get(url, data)
+
+    def test_order_list_query_count(self):
+        # 세션, 사용자, 주문 페이지, 주문상품, 장바구니 요약
+        for size, item_count in ((3, 1), (25, 5)):
+            with self.subTest(size=size, item_count=item_count):
+                Order.objects.filter(user=self.user).delete()
+                self.create_orders(size, item_count)
+
+                with self.assertNumQueries(5):
+                    response = self.get(reverse("order_list"))
+                page = response.context["page_obj"]
+                self.assertEqual(len(page.object_list), min(size, 20))
+
+                if page.has_next():
+                    with self.assertNumQueries(5):
+                        response = self.get(
+                            reverse("order_list"), {"cursor": page.next_cursor}
+                        )
+                    self.assertEqual(len(response.context["page_obj"]), size - 20)
+
+    def test_query_count_header(self):
+        self.create_orders(1, 1)
+        with override_settings(MALL_QUERY_COUNT_HEADER=True):
+            response = self.get(reverse("order_list"))
+        self.assertEqual(response["X-Query-Count"], "5")
+
+        response = self.get(reverse("order_list"))
+        self.assertFalse(response.has_header("X-Query-Count"))
+
+    def test_order_detail_query_count(self):
+        # 세션, 사용자, 주문, 주문상품, 장바구니 요약
+        for item_count in (1, 5):
+            with self.subTest(item_count=item_count):
+                order = self.create_orders(1, item_count)[0]
+                with self.assertNumQueries(5):
+                    response = self.get(reverse("order_detail", args=[order.pk]))
+                self.assertContains(response, self.product_list[0].name)
+
+
+class ArchiveOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(3)
+
+    def create_order(self, status):
+        fill_cart(self.user, self.product_list)
+        order = Order.create_from_cart(
+            self.user, CartProduct.objects.filter(user=self.user)
+        )
+        OrderPayment.create_by_order(order)
+        Order.objects.filter(pk=order.pk).update(status=status)
+        return order
+
+    def test_archive(self):
+        delivered = self.create_order(Order.Status.DELIVERED)
+        paid = self.create_order(Order.Status.PAID)
+
+        self.assertEqual(ArchivedOrder.archive([delivered.pk, paid.pk]), 1)
+
+        self.assertEqual(list(Order.objects.values_list("pk", flat=True)), [paid.pk])
+        self.assertFalse(OrderedProduct.objects.filter(order=delivered.pk).exists())
+        self.assertFalse(OrderPayment.objects.filter(order=delivered.pk).exists())
+
+        archived_order = ArchivedOrder.objects.get(pk=delivered.pk)
+        self.assertEqual(archived_order.uid, delivered.uid)
+        self.assertEqual(archived_order.created_at, delivered.created_at)
+        self.assertEqual(archived_order.orderedproduct_set.count(), 3)
+        self.assertTrue(
+            ArchivedOrderPayment.objects.filter(order=archived_order).exists()
+        )
+
+    def test_stock_reservations(self):
+        # 재고 예약은 보관하지 않으며, 취소된 주문에 남은 예약의 재고는 되돌립니다.
+        Product.objects.filter(pk=self.product_list[0].pk).update(stock=10)
+        delivered = self.create_order(Order.Status.DELIVERED)
+        delivered.stockreservation_set.confirm()
+        cancelled = self.create_order(Order.Status.CANCELLED)
+
+        self.assertEqual(ArchivedOrder.archive([delivered.pk, cancelled.pk]), 2)
+
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.product_list[0].pk).stock, 9)
+
+    def test_order_detail(self):
+        order = self.create_order(Order.Status.CANCELLED)
+        ArchivedOrder.archive([order.pk])
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("order_detail", args=[order.pk]))
+        self.assertContains(response, self.product_list[0].name)
+
+        other_user = User.objects.create_user(username="other")
+        self.client.force_login(other_user)
+        response = self.client.get(reverse("order_detail", args=[order.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderPayTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        fill_cart(cls.user, create_products(2))
+        cls.order = Order.create_from_cart(
+            cls.user, CartProduct.objects.filter(user=cls.user)
+        )
+
+    def test_reuse_ready_payment(self):
+        self.client.force_login(self.user)
+        url = reverse("order_pay", args=[self.order.pk])
+        for __ in range(3):
+            self.client.get(url)
+        self.assertEqual(self.order.orderpayment_set.count(), 1)
+
+        # 결제를 시도한 결제건은 재사용하지 않습니다.
+        self.order.orderpayment_set.update(verified_at=timezone.now())
+        self.client.get(url)
+        self.assertEqual(self.order.orderpayment_set.count(), 2)
+
+
+class StockReservationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(3)
+        # 재고를 관리하는 상품 2개와 재고를 관리하지 않는 상품 1개
+        Product.objects.filter(pk=cls.product_list[0].pk).update(stock=3)
+        Product.objects.filter(pk=cls.product_list[1].pk).update(stock=5)
+
+    def get_stocks(self) -> list:
+        return list(
+            Product.objects.filter(pk__in=[product.pk for product in self.product_list])
+            .order_by("pk")
+            .values_list("stock", "status")
+        )
+
+    def create_order(self, quantity: int = 1) -> Order:
+        fill_cart(self.user, self.product_list, quantity=quantity)
+        return Order.create_from_cart(
+            self.user, CartProduct.objects.filter(user=self.user)
+        )
+
+    def get_statuses(self, order: Order) -> list:
+        return sorted(order.stockreservation_set.values_list("status", flat=True))
+
+    def test_reserve(self):
+        order = self.create_order(quantity=3)
+        self.assertEqual(
+            self.get_stocks(),
+            [
+                (0, Product.Status.SOLD_OUT),
+                (2, Product.Status.ACTIVE),
+                (None, Product.Status.ACTIVE),
+            ],
+        )
+        self.assertEqual(
+            dict(order.stockreservation_set.values_list("product", "quantity")),
+            {self.product_list[0].pk: 3, self.product_list[1].pk: 3},
+        )
+
+    def test_oversell(self):
+        # 1개 상품의 재고가 부족하면 주문 전체를 롤백합니다.
+        stock_list = self.get_stocks()
+        with self.assertRaises(OutOfStockError):
+            self.create_order(quantity=4)
+
+        self.assertEqual(self.get_stocks(), stock_list)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderedProduct.objects.exists())
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(CartProduct.objects.filter(user=self.user).count(), 3)
+
+    def test_release_on_pay_status_changed(self):
+        stock_list = self.get_stocks()
+        for pay_status, order_status in [
+            (OrderPayment.PayStatus.FAILED, Order.Status.FAILED_PAYMENT),
+            (OrderPayment.PayStatus.CANCELLED, Order.Status.CANCELLED),
+        ]:
+            with self.subTest(pay_status=pay_status):
+                order = self.create_order(quantity=2)
+                self.assertNotEqual(self.get_stocks(), stock_list)
+
+                payment = OrderPayment.create_by_order(order)
+                payment.pay_status = pay_status
+                payment.is_paid_ok = False
+                OrderPayment.on_pay_status_changed([payment])
+
+                order.refresh_from_db()
+                self.assertEqual(order.status, order_status)
+                self.assertEqual(self.get_stocks(), stock_list)
+                self.assertEqual(
+                    self.get_statuses(order), [StockReservation.Status.RELEASED] * 2
+                )
+
+    def test_release_after_paid(self):
+        # 결제 완료(재고 확정) 후에 취소되면 확정된 재고를 되돌립니다.
+        stock_list = self.get_stocks()
+        order = self.create_order(quantity=2)
+        payment = OrderPayment.create_by_order(order)
+        payment.pay_status = OrderPayment.PayStatus.PAID
+        payment.is_paid_ok = True
+        OrderPayment.on_pay_status_changed([payment])
+        self.assertEqual(
+            self.get_statuses(order), [StockReservation.Status.CONFIRMED] * 2
+        )
+
+        payment.pay_status = OrderPayment.PayStatus.CANCELLED
+        payment.is_paid_ok = False
+        OrderPayment.on_pay_status_changed([payment])
+        self.assertEqual(self.get_stocks(), stock_list)
+        self.assertEqual(
+            self.get_statuses(order), [StockReservation.Status.RELEASED] * 2
+        )
+
+    def test_release_expired(self):
+        stock_list = self.get_stocks()
+        expired_order = self.create_order()
+        expired_order.stockreservation_set.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        order = self.create_order()
+
+        call_command("release_stock_reservations", stdout=StringIO())
+
+        self.assertEqual(
+            self.get_statuses(expired_order), [StockReservation.Status.RELEASED] * 2
+        )
+        self.assertEqual(
+            self.get_statuses(order), [StockReservation.Status.RESERVED] * 2
+        )
+        self.assertEqual(self.get_stocks()[0][0], stock_list[0][0] - 1)
+        self.assertEqual(self.get_stocks()[1][0], stock_list[1][0] - 1)
+
+    def test_order_pay_reserves_again(self):
+        order = self.create_order(quantity=2)
+        reserved_stock_list = self.get_stocks()
+        reservation_qs = order.stockreservation_set.all()
+        self.assertEqual(reservation_qs.release(), 2)
+        Order.objects.filter(pk=order.pk).update(status=Order.Status.FAILED_PAYMENT)
+
+        # 결제를 다시 시도하면 해제된 재고를 다시 예약합니다.
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("order_pay", args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_stocks(), reserved_stock_list)
+        self.assertEqual(
+            self.get_statuses(order), [StockReservation.Status.RESERVED] * 2
+        )
+
+        # 이미 예약된 상태에서는 다시 차감하지 않습니다.
+        self.client.get(reverse("order_pay", args=[order.pk]))
+        self.assertEqual(self.get_stocks(), reserved_stock_list)
+
+        # 확정/해제를 반복해도 재고는 1번만 반영됩니다.
+        self.assertEqual(reservation_qs.confirm(), 2)
+        self.assertEqual(reservation_qs.confirm(), 0)
+        self.assertEqual(self.get_stocks(), reserved_stock_list)
+        self.assertEqual(reservation_qs.release(), 2)
+        self.assertEqual(reservation_qs.release(), 0)
+        self.assertEqual(
+            self.get_stocks()[:2],
+            [(3, Product.Status.ACTIVE), (5, Product.Status.ACTIVE)],
+        )
+
+    def test_order_pay_out_of_stock(self):
+        order = self.create_order(quantity=2)
+        order.stockreservation_set.release()
+        Order.objects.filter(pk=order.pk).update(status=Order.Status.FAILED_PAYMENT)
+        # 그 사이에 다른 주문이 재고를 가져갔습니다.
+        Product.objects.filter(pk=self.product_list[0].pk).update(stock=1)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("order_pay", args=[order.pk]))
+        self.assertRedirects(
+            response, order.get_absolute_url(), fetch_redirect_response=False
+        )
+        self.assertEqual(
+            self.get_stocks()[:2],
+            [(1, Product.Status.ACTIVE), (5, Product.Status.ACTIVE)],
+        )
+        self.assertEqual(
+            self.get_statuses(order), [StockReservation.Status.RELEASED] * 2
+        )
+
+
+class ReconcilePaymentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        cls.product_list = create_products(1)
+
+    def create_payments(self, size: int):
+        payment_list = []
+        for __ in range(size):
+            fill_cart(self.user, self.product_list)
+            order = Order.create_from_cart(
+                self.user, CartProduct.objects.filter(user=self.user)
+            )
+            payment_list.append(OrderPayment.create_by_order(order))
+        return payment_list
+
+    def make_meta(self, payment, status="paid"):
+        return {
+            "merchant_uid": payment.merchant_uid,
+            "status": status,
+            "amount": payment.desired_amount,
+        }
+
+    def test_reconcile(self):
+        for size in (1, 10):
+            with self.subTest(size=size):
+                payment_list = self.create_payments(size)
+                meta_list = [self.make_meta(payment) for payment in payment_list]
+                meta_list.append({"merchant_uid": "merchant_1234567890"})
+
+                # SAVEPOINT, 결제 조회, 결제 UPDATE, 주문 UPDATE, 다른 결제시도 DELETE,
+                # 재고 예약 확정 (SAVEPOINT, 해제된 예약 조회, RELEASE, UPDATE), RELEASE
+                with self.assertNumQueries(10):
+                    self.assertEqual(OrderPayment.reconcile(meta_list), (size, size))
+
+                order_pk_list = [payment.order_id for payment in payment_list]
+                self.assertEqual(
+                    set(
+                        Order.objects.filter(pk__in=order_pk_list).values_list(
+                            "status", flat=True
+                        )
+                    ),
+                    {Order.Status.PAID},
+                )
+                self.assertEqual(OrderPayment.reconcile(meta_list), (size, 0))
+
+    def test_newer_verification_is_kept(self):
+        (payment,) = self.create_payments(1)
+        fetched_at = timezone.now()
+        # 결제내역 목록을 조회하는 동안 update()에서 더 나중의 결제내역을 반영한 경우
+        OrderPayment.objects.filter(pk=payment.pk).update(
+            pay_status=OrderPayment.PayStatus.CANCELLED,
+            verified_at=fetched_at + timedelta(seconds=1),
+        )
+
+        self.assertEqual(
+            OrderPayment.reconcile([self.make_meta(payment)], fetched_at), (1, 0)
+        )
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+        self.assertFalse(payment.is_paid_ok)
+
+
+class ReconcilePaymentsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.enterClassContext(override_settings(PORTONE_API_URL=cls.server.url))
+        cls.addClassCleanup(cls.server.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+
+    def create_payment(self, status: str) -> OrderPayment:
+        order = Order.objects.create(user=self.user, name="상품", total_amount=1000)
+        payment = OrderPayment.create_by_order(order)
+        self.server.pay(payment.merchant_uid, payment.desired_amount, status=status)
+        return payment
+
+    def test_reconcile(self):
+        paid_list = [self.create_payment("paid") for __ in range(5)]
+        failed = self.create_payment("failed")
+        cancelled = self.create_payment("paid")
+        self.server.cancel(cancelled.merchant_uid)
+        # 조회 기간 이전의 결제
+        old = self.create_payment("paid")
+        with self.server._lock:
+            self.server._payments[old.merchant_uid]["started_at"] -= 60 * 60 * 2
+        # 다른 쇼핑몰의 결제
+        self.server.pay("merchant_1234567890", 1000)
+
+        stdout = StringIO()
+        call_command(
+            "reconcile_payments", "--since", "3600", "--limit", "2", stdout=stdout
+        )
+        output = stdout.getvalue()
+
+        self.assertIn("paid: pages=3 fetched=6 matched=5 updated=5", output)
+        self.assertIn("cancelled: pages=1 fetched=1 matched=1 updated=1", output)
+        self.assertIn("failed: pages=1 fetched=1 matched=1 updated=1", output)
+        self.assertIn("7개의 결제를 갱신했습니다.", output)
+        self.assertIn("payments/s", output)
+
+        status_dict = dict(OrderPayment.objects.values_list("pk", "pay_status"))
+        for payment in paid_list:
+            self.assertEqual(status_dict[payment.pk], OrderPayment.PayStatus.PAID)
+        self.assertEqual(status_dict[failed.pk], OrderPayment.PayStatus.FAILED)
+        self.assertEqual(status_dict[cancelled.pk], OrderPayment.PayStatus.CANCELLED)
+        self.assertEqual(status_dict[old.pk], OrderPayment.PayStatus.READY)
+
+        # 다시 실행하면 갱신할 결제가 없습니다.
+        stdout = StringIO()
+        call_command("reconcile_payments", "--since", "3600", stdout=stdout)
+        self.assertIn("0개의 결제를 갱신했습니다.", stdout.getvalue())
+
+
+class PruneReadyPaymentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.enterClassContext(override_settings(PORTONE_API_URL=cls.server.url))
+        cls.addClassCleanup(cls.server.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+
+    def setUp(self):
+        self.server.stats.clear()
+
+    def create_payment(self, days: int = 7) -> OrderPayment:
+        order = Order.objects.create(user=self.user, name="상품", total_amount=1000)
+        payment = OrderPayment.create_by_order(order)
+        OrderPayment.objects.filter(pk=payment.pk).update(
+            created_at=timezone.now() - timedelta(days=days)
+        )
+        return payment
+
+    def prune(self, *args) -> str:
+        stdout = StringIO()
+        call_command("prune_ready_payments", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_dry_run(self):
+        payment_list = [self.create_payment() for __ in range(3)]
+
+        self.assertIn("3개", self.prune("--dry-run"))
+        self.assertEqual(
+            OrderPayment.objects.filter(
+                pk__in=[payment.pk for payment in payment_list]
+            ).count(),
+            3,
+        )
+        self.assertEqual(self.server.stats["find"], 0)
+
+    def test_prune(self):
+        unknown_list = [self.create_payment() for __ in range(4)]
+        ready = self.create_payment()
+        self.server.pay(ready.merchant_uid, ready.desired_amount, status="ready")
+        # 결제확인 요청과 웹훅이 모두 유실된 결제
+        paid = self.create_payment()
+        self.server.pay(paid.merchant_uid, paid.desired_amount)
+        recent = self.create_payment(days=0)
+        verified = self.create_payment()
+        OrderPayment.objects.filter(pk=verified.pk).update(verified_at=timezone.now())
+
+        output = self.prune("--batch-size", "2")
+
+        self.assertIn("5개의 결제준비 건을 삭제했습니다.", output)
+        self.assertEqual(self.server.stats["find"], 6)
+        self.assertEqual(
+            set(OrderPayment.objects.values_list("pk", flat=True)),
+            {paid.pk, recent.pk, verified.pk},
+        )
+        self.assertFalse(
+            OrderPayment.objects.filter(
+                pk__in=[payment.pk for payment in unknown_list + [ready]]
+            ).exists()
+        )
+
+        paid.refresh_from_db()
+        self.assertEqual(paid.pay_status, OrderPayment.PayStatus.PAID)
+        self.assertTrue(paid.is_paid_ok)
+        self.assertEqual(paid.order.status, Order.Status.PAID)
+
+    def test_keep_on_error(self):
+        payment = self.create_payment()
+        self.server.error_rate = 1
+        try:
+            self.assertIn("조회 실패 1건", self.prune())
+        finally:
+            self.server.error_rate = 0
+        self.assertTrue(OrderPayment.objects.filter(pk=payment.pk).exists())
+
+
+class ConcurrentCreateOrderFromCartTest(TransactionTestCase):
+    # SQLite에서는 CreateOrderFromCartTest.test_double_submit_serialized로 확인합니다.
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_concurrent_double_submit(self):
+        user = User.objects.create_user(username="tester", password="password")
+        fill_cart(user, create_products(5))
+
+        barrier = threading.Barrier(2)
+        result_list = []
+
+        def submit():
+            try:
+                barrier.wait()
+                Order.create_from_cart(user, CartProduct.objects.filter(user=user))
+                result_list.append("created")
+            except EmptyCartError:
+                result_list.append("empty")
+            finally:
+                connection.close()
+
+        thread_list = [threading.Thread(target=submit) for __ in range(2)]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        self.assertEqual(sorted(result_list), ["created", "empty"])
+        self.assertEqual(Order.objects.filter(user=user).count(), 1)
+        self.assertEqual(OrderedProduct.objects.count(), 5)
+        self.assertFalse(CartProduct.objects.filter(user=user).exists())
+
+
+class ConcurrentPaymentUpdateTest(TransactionTestCase):
+    def test_concurrent_update(self):
+        user = User.objects.create_user(username="tester", password="password")
+        fill_cart(user, create_products(1))
+        order = Order.create_from_cart(user, CartProduct.objects.filter(user=user))
+        payment = OrderPayment.create_by_order(order)
+
+        barrier = threading.Barrier(4)
+        result_list = []
+
+        def update():
+            try:
+                barrier.wait()
+                result_list.append(OrderPayment.objects.get(pk=payment.pk).update())
+            finally:
+                connection.close()
+
+        with FakePortoneServer(latency=0.2) as server:
+            with override_settings(PORTONE_API_URL=server.url):
+                server.pay(payment.merchant_uid, payment.desired_amount)
+                thread_list = [threading.Thread(target=update) for __ in range(4)]
+                for thread in thread_list:
+                    thread.start()
+                for thread in thread_list:
+                    thread.join()
+
+        # 동시 요청은 직렬화되어, 포트원 조회와 결제상태 반영은 1번만 수행합니다.
+        self.assertEqual(server.stats["find"], 1)
+        self.assertEqual(sorted(result_list), [False, False, False, True])
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.PAID)
+
+
+class PortoneClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.merchant_uid = uuid4().hex
+        cls.server.pay(cls.merchant_uid, 1000)
+
+    def setUp(self):
+        self.server.stats.clear()
+        self.client = PortoneClient("key", "secret", imp_url=self.server.url)
+
+    def find(self):
+        return self.client.find(merchant_uid=self.merchant_uid)
+
+    def test_token_cached(self):
+        for __ in range(5):
+            self.assertEqual(self.find()["status"], "paid")
+
+        self.assertEqual(self.server.stats["get_token"], 1)
+        self.assertEqual(self.server.stats["find"], 5)
+        self.assertEqual(
+            self.client.get_stats(),
+            {
+                "requests": 6,
+                "connections": 1,
+                "connections_saved": 5,
+                "token_fetches": 1,
+                "token_fetches_saved": 4,
+            },
+        )
+
+    def test_concurrent_token_fetch(self):
+        # 여러 쓰레드에서 동시에 토큰이 필요하더라도 1번만 발급받습니다.
+        barrier = threading.Barrier(8)
+        result_list = []
+
+        def find():
+            barrier.wait()
+            result_list.append(self.find()["status"])
+
+        thread_list = [threading.Thread(target=find) for __ in range(8)]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        self.assertEqual(result_list, ["paid"] * 8)
+        self.assertEqual(self.server.stats["get_token"], 1)
+
+    def test_retry_after_revoke(self):
+        self.find()
+        # 만료 전에 폐기된 토큰은 401 응답 후 1번 재발급받아 재시도합니다.
+        self.server.revoke_tokens()
+        self.assertEqual(self.find()["status"], "paid")
+        self.assertEqual(self.server.stats["get_token"], 2)
+        self.assertEqual(self.server.stats["find"], 3)
+
+        self.find()
+        self.assertEqual(self.server.stats["get_token"], 2)
+
+    def test_retry_once(self):
+        self.find()
+        with mock.patch.object(self.server, "is_valid_token", return_value=False):
+            with self.assertRaises(Iamport.HttpError) as context:
+                self.find()
+        self.assertEqual(context.exception.code, 401)
+        self.assertEqual(self.server.stats["get_token"], 2)
+        self.assertEqual(self.server.stats["find"], 3)
+
+    def test_refresh_before_expiry(self):
+        # 만료까지 token_refresh_margin보다 적게 남은 토큰은 미리 재발급받습니다.
+        self.client.token_refresh_margin = self.server.token_lifetime + 1
+        self.find()
+        self.find()
+        self.assertEqual(self.server.stats["get_token"], 2)
+
+
+class FakePortoneTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.enterClassContext(override_settings(PORTONE_API_URL=cls.server.url))
+        cls.addClassCleanup(cls.server.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        fill_cart(cls.user, create_products(2))
+        cls.order = Order.create_from_cart(
+            cls.user, CartProduct.objects.filter(user=cls.user)
+        )
+        cls.payment = OrderPayment.create_by_order(cls.order)
+
+    def test_pay_and_cancel(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        self.assertTrue(self.payment.update())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.PAID)
+
+        # 만료 전에 폐기된 토큰은 재발급받아 재시도합니다.
+        self.server.revoke_tokens()
+        self.order.cancel("테스트 취소")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.CANCELLED)
+        self.assertEqual(self.server.stats["get_token"], 2)
+
+    def test_amount_mismatch(self):
+        self.server.pay(self.payment.merchant_uid, 1)
+        self.payment.update()
+        self.assertFalse(self.payment.is_paid_ok)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.REQUESTED)
+
+
+class PaymentUpdateTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.enterClassContext(override_settings(PORTONE_API_URL=cls.server.url))
+        cls.addClassCleanup(cls.server.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        fill_cart(cls.user, create_products(1))
+        cls.order = Order.create_from_cart(
+            cls.user, CartProduct.objects.filter(user=cls.user)
+        )
+
+    def setUp(self):
+        # 대역 서버의 결제내역은 테스트 간에 유지되므로, 테스트마다 새 결제를 생성합니다.
+        self.payment = OrderPayment.create_by_order(self.order)
+        self.server.stats.clear()
+
+    def test_find_outside_transaction(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        depth = len(connection.atomic_blocks)
+        depth_list = []
+        find = PortoneClient.find
+
+        def find_outside_transaction(client, **kwargs):
+            depth_list.append(len(connection.atomic_blocks))
+            return find(client, **kwargs)
+
+        with mock.patch.object(
+            PortoneClient,
+            "find",
+            autospec=True,
+            side_effect=find_outside_transaction,
+        ):
+            self.assertTrue(self.payment.update())
+
+        # 포트원 조회 중에는 트랜잭션(행 잠금)을 열어두지 않습니다.
+        self.assertEqual(depth_list, [depth])
+        self.assertEqual(self.payment.pay_status, OrderPayment.PayStatus.PAID)
+
+    def test_newer_result_is_kept(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        find = PortoneClient.find
+
+        def find_and_update_elsewhere(client, **kwargs):
+            meta = find(client, **kwargs)
+            # 조회하는 동안 다른 프로세스에서 더 나중에 조회한 결과를 저장한 경우
+            OrderPayment.objects.filter(pk=self.payment.pk).update(
+                pay_status=OrderPayment.PayStatus.CANCELLED,
+                verified_at=timezone.now(),
+            )
+            return meta
+
+        with mock.patch.object(
+            PortoneClient, "find", autospec=True, side_effect=find_and_update_elsewhere
+        ):
+            self.assertFalse(self.payment.update())
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+
+    def test_skip_recently_verified(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        self.assertTrue(self.payment.update())
+        self.assertEqual(self.server.stats["find"], 1)
+
+        # 결제확인 페이지 재요청, 중복 웹훅 등은 포트원 조회와 쿼리 없이 처리합니다.
+        with self.assertNumQueries(0):
+            self.assertFalse(self.payment.update())
+            self.assertFalse(
+                self.payment.update(notified_status=OrderPayment.PayStatus.PAID)
+            )
+        # 다른 요청에서 읽어온 결제도 저장된 확인시각으로 판단합니다.
+        self.assertFalse(OrderPayment.objects.get(pk=self.payment.pk).update())
+        self.assertEqual(self.server.stats["find"], 1)
+
+    def test_notified_status_forces_fetch(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        self.assertTrue(self.payment.update())
+        self.server.cancel(self.payment.merchant_uid)
+
+        # 웹훅으로 알려온 결제상태가 저장된 결제상태와 다르면 바로 다시 조회합니다.
+        self.assertTrue(
+            self.payment.update(notified_status=OrderPayment.PayStatus.CANCELLED)
+        )
+        self.assertEqual(self.server.stats["find"], 2)
+        self.assertEqual(self.payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+
+    def test_force(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        self.assertTrue(self.payment.update())
+
+        # 관리자 페이지의 갱신 등은 최근에 확인한 결제도 다시 조회합니다.
+        for __ in range(2):
+            self.assertTrue(self.payment.update(force=True))
+        self.assertEqual(self.server.stats["find"], 3)
+
+
+class WebhookWorkerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakePortoneServer().start()
+        cls.enterClassContext(override_settings(PORTONE_API_URL=cls.server.url))
+        cls.addClassCleanup(cls.server.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="password")
+        fill_cart(cls.user, create_products(1))
+        cls.order = Order.create_from_cart(
+            cls.user, CartProduct.objects.filter(user=cls.user)
+        )
+
+    def setUp(self):
+        # 대역 서버의 결제내역은 테스트 간에 유지되므로, 테스트마다 새 결제를 생성합니다.
+        self.payment = OrderPayment.create_by_order(self.order)
+        self.server.stats.clear()
+        self.worker = WebhookWorker(workers=1, max_attempts=2, retry_delay=60)
+        self.addCleanup(self.worker.shutdown)
+
+    def enqueue(self, merchant_uid=None, payment_status="paid") -> PortoneWebhook:
+        return PortoneWebhook.objects.create(
+            merchant_uid=merchant_uid or self.payment.merchant_uid,
+            payment_status=payment_status,
+        )
+
+    def test_enqueue_coalesce(self):
+        merchant_uid = self.payment.merchant_uid
+        self.assertIsNotNone(enqueue_webhook(merchant_uid, payment_status="paid"))
+        self.assertIsNone(enqueue_webhook(merchant_uid, payment_status="paid"))
+        self.assertIsNotNone(enqueue_webhook(merchant_uid, payment_status="cancelled"))
+        self.assertEqual(PortoneWebhook.objects.count(), 2)
+
+    def test_claim(self):
+        webhook_list = [self.enqueue() for __ in range(2)]
+        PortoneWebhook.objects.create(
+            merchant_uid=self.payment.merchant_uid,
+            next_attempt_at=timezone.now() + timedelta(minutes=1),
+        )
+
+        claimed_list = self.worker.claim()
+        self.assertEqual(
+            [webhook.pk for webhook in claimed_list],
+            [webhook.pk for webhook in webhook_list],
+        )
+        self.assertEqual(len({webhook.claim_token for webhook in claimed_list}), 1)
+        for webhook in claimed_list:
+            self.assertEqual(webhook.status, PortoneWebhook.Status.PROCESSING)
+            self.assertEqual(webhook.attempts, 1)
+
+        # 처리중인 알림과 재시도 대기 중인 알림은 다시 선점하지 않습니다.
+        self.assertEqual(self.worker.claim(), [])
+
+    def test_process_coalesced(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        for __ in range(3):
+            self.enqueue()
+
+        self.assertTrue(self.worker.process(self.worker.claim()))
+
+        self.assertEqual(self.server.stats["find"], 1)
+        self.assertEqual(
+            set(PortoneWebhook.objects.values_list("status", flat=True)),
+            {PortoneWebhook.Status.DONE},
+        )
+        self.assertEqual(self.worker.processed_count, 3)
+        self.assertEqual(self.worker.coalesced_count, 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.PAID)
+
+    def test_retry_then_failed(self):
+        # 포트원에 결제내역이 아직 없으므로 조회에 실패합니다.
+        webhook = self.enqueue()
+
+        self.assertFalse(self.worker.process(self.worker.claim()))
+        webhook.refresh_from_db()
+        self.assertEqual(webhook.status, PortoneWebhook.Status.PENDING)
+        self.assertEqual(webhook.attempts, 1)
+        self.assertGreater(
+            webhook.next_attempt_at, timezone.now() + timedelta(seconds=50)
+        )
+        # 재시도 대기시간 전에는 다시 선점하지 않습니다.
+        self.assertEqual(self.worker.claim(), [])
+
+        PortoneWebhook.objects.update(next_attempt_at=timezone.now())
+        self.assertFalse(self.worker.process(self.worker.claim()))
+        webhook.refresh_from_db()
+        self.assertEqual(webhook.status, PortoneWebhook.Status.FAILED)
+        self.assertEqual(webhook.attempts, 2)
+        self.assertEqual(self.worker.retried_count, 1)
+        self.assertEqual(self.worker.failed_count, 1)
+        self.assertEqual(self.worker.claim(), [])
+
+    def test_unknown_merchant_uid(self):
+        for merchant_uid in (str(uuid4()), "invalid-merchant-uid"):
+            with self.subTest(merchant_uid=merchant_uid):
+                webhook = self.enqueue(merchant_uid)
+                with self.assertLogs("portone", "WARNING"):
+                    self.assertFalse(self.worker.process(self.worker.claim()))
+                webhook.refresh_from_db()
+                self.assertEqual(webhook.status, PortoneWebhook.Status.FAILED)
+                self.assertEqual(webhook.attempts, 1)
+        self.assertEqual(self.server.stats["find"], 0)
+
+    def test_requeue_stale(self):
+        self.server.pay(self.payment.merchant_uid, self.payment.desired_amount)
+        webhook = self.enqueue()
+        stale_list = self.worker.claim()
+
+        self.assertEqual(self.worker.requeue_stale(), 0)
+        PortoneWebhook.objects.update(
+            claimed_at=timezone.now()
+            - timedelta(seconds=self.worker.visibility_timeout)
+        )
+        self.assertEqual(self.worker.requeue_stale(), 1)
+
+        other_worker = WebhookWorker(workers=1)
+        self.addCleanup(other_worker.shutdown)
+        claimed_list = other_worker.claim()
+        self.assertEqual([w.pk for w in claimed_list], [webhook.pk])
+
+        # 다른 워커에게 넘어간 알림은, 뒤늦게 처리를 마친 워커가 덮어쓰지 않습니다.
+        self.worker.process(stale_list)
+        webhook.refresh_from_db()
+        self.assertEqual(webhook.status, PortoneWebhook.Status.PROCESSING)
+        self.assertEqual(webhook.claim_token, claimed_list[0].claim_token)
+        self.assertEqual(self.worker.processed_count, 0)
+
+        self.assertTrue(other_worker.process(claimed_list))
+        webhook.refresh_from_db()
+        self.assertEqual(webhook.status, PortoneWebhook.Status.DONE)
+        self.assertEqual(webhook.attempts, 2)
+
+
+@override_settings(PORTONE_WEBHOOK_IPS=["127.0.0.1"], PORTONE_WEBHOOK_ASYNC=False)
+class FakePortoneWebhookTest(LiveServerTestCase):
+    def test_webhook(self):
+        user = User.objects.create_user(username="tester", password="password")
+        fill_cart(user, create_products(1))
+        order = Order.create_from_cart(user, CartProduct.objects.filter(user=user))
+        payment = OrderPayment.create_by_order(order)
+
+        webhook_url = self.live_server_url + reverse("webhook")
+        with FakePortoneServer(webhook_url=webhook_url) as server:
+            with override_settings(PORTONE_API_URL=server.url):
+                server.pay(payment.merchant_uid, payment.desired_amount)
+                server.join_webhooks()
+
+        self.assertEqual(server.stats["webhooks"], 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.PAID)
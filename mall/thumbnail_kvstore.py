@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings as django_settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+# DB에 없는 키도 캐싱하여, 반복 조회를 막습니다.
+EMPTY_VALUE = "__empty__"
+
+
+class LocalMemoryTier:
+    """프로세스 내 LRU 캐시. 다른 프로세스에서의 삭제를 반영하도록 짧은 만료시간을 둡니다."""
+
+    def __init__(self, max_size: int = 10000, timeout: float = 300):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class KVStore(KVStoreBase):
+    """
+    sorl-thumbnail key-value store : 프로세스 메모리 → 장고 캐시 → DB 순서로 조회합니다.
+
+    {% thumbnail %} 태그는 태그마다 key-value store를 조회하므로, 목록 페이지에서는
+    prefetch()로 페이지에 포함된 이미지들의 레코드를 한번에 조회해두면
+    태그 렌더링 시에는 프로세스 메모리에서 바로 찾을 수 있습니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = LocalMemoryTier(
+            max_size=django_settings.MALL_THUMBNAIL_KVSTORE_LOCAL_SIZE,
+            timeout=django_settings.MALL_THUMBNAIL_KVSTORE_LOCAL_TIMEOUT,
+        )
+
+    @property
+    def cache(self):
+        try:
+            return caches[settings.THUMBNAIL_CACHE]
+        except InvalidCacheBackendError:
+            return cache
+
+    def _to_value(self, value):
+        return None if value == EMPTY_VALUE else value
+
+    def _get_raw(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.cache.get(key)
+            if value is None:
+                try:
+                    value = KVStoreModel.objects.get(key=key).value
+                except KVStoreModel.DoesNotExist:
+                    value = EMPTY_VALUE
+                self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+            self.local.set(key, value)
+        return self._to_value(value)
+
+    def get_many_raw(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """여러 키를 계층별로 1번씩만 조회합니다. (메모리 → 캐시 1회 → DB 1회)"""
+
+        values = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+
+        if missing:
+            cached = self.cache.get_many(missing)
+            values.update(cached)
+            missing = [key for key in missing if key not in cached]
+
+        if missing:
+            found = dict(
+                KVStoreModel.objects.filter(key__in=missing).values_list("key", "value")
+            )
+            from_db = {key: found.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(from_db, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(from_db)
+
+        for key, value in values.items():
+            self.local.set(key, value)
+        return {key: self._to_value(value) for key, value in values.items()}
+
+    def _set_raw(self, key, value):
+        KVStoreModel.objects.update_or_create(key=key, defaults={"value": value})
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+        self.local.set(key, value)
+
+    def _delete_raw(self, *keys):
+        KVStoreModel.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+
+    def _find_keys_raw(self, prefix):
+        qs = KVStoreModel.objects.filter(key__startswith=prefix)
+        return qs.values_list("key", flat=True)
+
+    def clear(self, delete_thumbnails=False):
+        prefix = settings.THUMBNAIL_KEY_PREFIX
+        self.cache.delete_many(list(self._find_keys_raw(prefix)))
+        KVStoreModel.objects.filter(key__startswith=prefix).delete()
+        self.local.clear()
+        if delete_thumbnails:
+            self.delete_all_thumbnail_files()
+
+    @staticmethod
+    def get_thumbnail_key(file_, geometry_string: str, **options) -> str:
+        """sorl.thumbnail.base.ThumbnailBackend.get_thumbnail과 같은 방식으로 썸네일 키를 계산합니다."""
+
+        backend = default.backend
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", backend._get_format(source))
+        for key, value in backend.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in backend.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+
+        name = backend._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage).key
+
+    def prefetch(self, files: Iterable, geometry_list: List[tuple]):
+        keys = [
+            add_prefix(self.get_thumbnail_key(file_, geometry, **dict(options)))
+            for file_ in files
+            if file_
+            for geometry, options in geometry_list
+        ]
+        if keys:
+            self.get_many_raw(keys)
+
+
+def prefetch_thumbnails(files: Iterable, geometry_list: List[tuple]):
+    kvstore = default.kvstore
+    if isinstance(kvstore, KVStore):
+        kvstore.prefetch(files, geometry_list)
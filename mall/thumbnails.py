@@ -0,0 +1,166 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from mall.caches import product_list_cache
+
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.MALL_THUMBNAIL_WORKERS,
+                    thread_name_prefix="thumbnail",
+                )
+    return _executor
+
+
+def generate_thumbnails(photo) -> int:
+    """
+    MALL_THUMBNAIL_OPTIONS에 지정된 모든 크기의 썸네일을 생성합니다.
+    이미 생성된 썸네일은 sorl-thumbnail의 key-value store 조회만으로 건너뜁니다.
+    """
+
+    count = 0
+    if photo:
+        for geometry, options in settings.MALL_THUMBNAIL_OPTIONS:
+            get_thumbnail(photo, geometry, **options)
+            count += 1
+    return count
+
+
+# 브라우저가 지원하는 첫번째 포맷을 사용하므로, 압축률이 좋은 포맷부터 나열합니다.
+PHOTO_VARIANT_FORMATS = [
+    # (PIL 포맷, MIME 타입, 확장자, 저장 옵션)
+    ("AVIF", "image/avif", "avif", {"quality": 60}),
+    ("WEBP", "image/webp", "webp", {"quality": 80, "method": 6}),
+]
+
+
+def get_photo_variant_formats() -> List[Tuple[str, str, str, dict]]:
+    # AVIF는 Pillow 빌드에 따라 지원되지 않을 수 있습니다.
+    Image.init()
+    return [fmt for fmt in PHOTO_VARIANT_FORMATS if fmt[0] in Image.SAVE]
+
+
+def generate_photo_variants(photo) -> dict:
+    """
+    상품 사진을 MALL_PHOTO_VARIANT_WIDTHS 너비의 정사각형으로 잘라, 포맷별로 저장합니다.
+    원본보다 큰 너비는 생성하지 않으며, 저장된 이미지 목록을 Product.photo_variants 형식으로 반환합니다.
+    """
+
+    storage = photo.storage
+    with storage.open(photo.name, "rb") as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    side = min(image.size)
+    width_list = sorted(w for w in settings.MALL_PHOTO_VARIANT_WIDTHS if w <= side)
+    if not width_list:
+        width_list = [side]
+
+    dirname, basename = posixpath.split(photo.name)
+    prefix = posixpath.join(dirname, "variants", posixpath.splitext(basename)[0])
+
+    formats = {}
+    for width in width_list:
+        resized = ImageOps.fit(image, (width, width), Image.Resampling.LANCZOS)
+        for pil_format, mime_type, ext, save_options in get_photo_variant_formats():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **save_options)
+            name = f"{prefix}/{width}w.{ext}"
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            formats.setdefault(mime_type, []).append([width, name])
+
+    return {"source": photo.name, "formats": formats}
+
+
+def delete_photo_variants(storage, photo_variants: dict):
+    for variant_list in photo_variants.get("formats", {}).values():
+        for __, name in variant_list:
+            storage.delete(name)
+
+
+def update_photo_variants(product, force: bool = False) -> bool:
+    """현재 사진의 변환 이미지가 없다면 생성하고, 이전 사진의 변환 이미지는 삭제합니다."""
+
+    from mall.models import Product
+
+    photo_variants = product.photo_variants or {}
+    if not force and photo_variants.get("source") == product.photo.name:
+        return False
+
+    new_photo_variants = generate_photo_variants(product.photo)
+    # 생성 중에 사진이 변경되었다면 저장하지 않습니다.
+    updated = Product.objects.filter(pk=product.pk, photo=product.photo.name).update(
+        photo_variants=new_photo_variants
+    )
+    if updated:
+        if photo_variants.get("source") != product.photo.name:
+            delete_photo_variants(product.photo.storage, photo_variants)
+        product.photo_variants = new_photo_variants
+    else:
+        delete_photo_variants(product.photo.storage, new_photo_variants)
+    return bool(updated)
+
+
+def warm_product_thumbnails(
+    pk_list: Iterable[int], force_variants: bool = False
+) -> int:
+    from mall.models import Product
+
+    count = 0
+    variants_updated = False
+    close_old_connections()
+    try:
+        product_qs = Product.objects.filter(pk__in=list(pk_list)).only(
+            "photo", "photo_variants"
+        )
+        for product in product_qs:
+            if not product.photo:
+                continue
+            try:
+                count += generate_thumbnails(product.photo)
+                if update_photo_variants(product, force_variants):
+                    variants_updated = True
+            except Exception as e:  # noqa
+                logger.error("thumbnail %s : %s", product.pk, e, exc_info=e)
+        # 변환 이미지가 <picture> 태그에 반영되도록 렌더링된 상품목록을 무효화합니다.
+        if variants_updated:
+            product_list_cache.invalidate()
+    finally:
+        close_old_connections()
+    return count
+
+
+def schedule_thumbnails(pk_list: List[int]):
+    """트랜잭션 커밋 후에, 백그라운드 쓰레드에서 썸네일을 생성합니다."""
+
+    if not settings.MALL_THUMBNAIL_ASYNC:
+        transaction.on_commit(lambda: warm_product_thumbnails(pk_list))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(warm_product_thumbnails, pk_list)
+        )
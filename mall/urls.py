@@ -4,7 +4,9 @@ from . import views
 
 urlpatterns = [
     path("", views.product_list, name="product_list"),
+    path("autocomplete/", views.product_autocomplete, name="product_autocomplete"),
     path("cart/", views.cart_detail, name="cart_detail"),
+    path("cart/add/", views.add_to_cart_bulk, name="add_to_cart_bulk"),
     path("cart/<int:product_pk>/add/", views.add_to_cart, name="add_to_cart"),
     path("orders/", views.order_list, name="order_list"),
     path("orders/new/", views.order_new, name="order_new"),
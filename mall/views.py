@@ -1,19 +1,48 @@
 import json
+from typing import Optional
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import F, Prefetch
 from django.forms import modelformset_factory
-from django.http import HttpResponse
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    QueryDict,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.views.generic import ListView
 
+from mall import carts
+from mall.autocomplete import product_name_index
+from mall.caches import cart_summary_cache, product_list_cache
 from mall.decorators import deny_from_untrusted_hosts
-from mall.forms import CartProductForm
-from mall.models import Product, CartProduct, Order, OrderPayment
+from mall.forms import BulkModelFormSet, CartProductForm
+from mall.models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    Product,
+    CartProduct,
+    Order,
+    OrderPayment,
+    OrderedProduct,
+    EmptyCartError,
+    OutOfStockError,
+)
+from mall.pagination import InvalidCursor, KeysetPaginator
+from mall.search import get_search_backend
+from mall.thumbnail_kvstore import prefetch_thumbnails
+from mall.webhooks import enqueue_webhook
 
 
 class ProductListView(ListView):
@@ -22,20 +51,148 @@ class ProductListView(ListView):
         "category"
     )
     paginate_by = 4
+    # 정렬 기준별로 Product.Meta.indexes에 (status, ...) 복합 인덱스가 있습니다.
+    sort_choices = {
+        "": ("기본순", ["-pk"]),
+        "newest": ("최신순", ["-created_at", "-pk"]),
+        "price": ("낮은 가격순", ["price", "pk"]),
+        "-price": ("높은 가격순", ["-price", "-pk"]),
+    }
+    # 검색 시에만 사용하는 정렬 (search_rank는 검색 백엔드에서 추가합니다.)
+    search_sort_choices = {
+        "relevance": ("정확도순", ["-search_rank", "-pk"]),
+    }
+
+    def get_query(self) -> str:
+        return self.request.GET.get("query", "").strip()
 
     def get_queryset(self):
         qs = super().get_queryset()
 
-        query = self.request.GET.get("query", "")
+        query = self.get_query()
         if query:
-            qs = qs.filter(name__icontains=query)
+            qs = get_search_backend(qs.db).search(qs, query)
 
         return qs
 
+    def get_sort_choices(self) -> dict:
+        if self.get_query():
+            return {**self.search_sort_choices, **self.sort_choices}
+        return self.sort_choices
+
+    def get_sort(self) -> str:
+        sort_choices = self.get_sort_choices()
+        default = next(iter(sort_choices))
+        sort = self.request.GET.get("sort", default)
+        return sort if sort in sort_choices else default
+
+    def get(self, request, *args, **kwargs):
+        # 상품목록 영역의 렌더링 결과를 캐싱하며, 캐시 적중 시에는 DB 조회를 하지 않습니다.
+        timeout = settings.MALL_PRODUCT_LIST_CACHE_TIMEOUT
+        key = product_list_cache.make_key(
+            "page", self.get_query(), self.get_sort(), request.GET.get("cursor", "")
+        )
+
+        product_list_html = product_list_cache.get(key) if timeout else None
+        if product_list_html is None:
+            self.object_list = self.get_queryset()
+            context = self.get_context_data()
+            product_list_html = render_to_string(
+                "mall/_product_list.html", context, request
+            )
+            if timeout:
+                product_list_cache.set(key, product_list_html, timeout)
+
+        return render(
+            request,
+            "mall/product_list.html",
+            {
+                "product_list_html": mark_safe(product_list_html),
+            },
+        )
+
+    def get_url(self, **params) -> str:
+        # 캐싱된 결과에 다른 요청의 인자가 섞이지 않도록, 목록에 영향을 주는 인자만 유지합니다.
+        query_dict = QueryDict(mutable=True)
+        for key in ("query", "sort", "cursor"):
+            if key in self.request.GET:
+                query_dict[key] = self.request.GET[key]
+        for key, value in params.items():
+            if value is None:
+                query_dict.pop(key, None)
+            else:
+                query_dict[key] = value
+        return f"{self.request.path}?{query_dict.urlencode()}"
+
+    def get_approximate_count(self, queryset) -> Optional[int]:
+        # 매 페이지마다 COUNT(*)를 수행하지 않도록, 검색어별 상품 수를 캐싱하여 근사치로 사용합니다.
+        timeout = settings.MALL_PRODUCT_COUNT_CACHE_TIMEOUT
+        if not timeout:
+            return None
+        key = product_list_cache.make_key("count", self.get_query())
+        return cache.get_or_set(key, queryset.count, timeout)
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_sort_choices()[self.get_sort()][1]
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            ordering,
+            count_func=lambda: self.get_approximate_count(queryset),
+        )
+        try:
+            page = paginator.get_page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("잘못된 페이지 요청입니다.")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context["page_obj"]
+        sort = self.get_sort()
+        sort_choices = self.get_sort_choices()
+        default_sort = next(iter(sort_choices))
+        context["sort_list"] = [
+            {
+                "label": label,
+                "url": self.get_url(
+                    sort=None if value == default_sort else value, cursor=None
+                ),
+                "is_active": value == sort,
+            }
+            for value, (label, __) in sort_choices.items()
+        ]
+        context["previous_page_url"] = (
+            self.get_url(cursor=page.previous_cursor) if page.has_previous() else ""
+        )
+        context["next_page_url"] = (
+            self.get_url(cursor=page.next_cursor) if page.has_next() else ""
+        )
+        # {% thumbnail %} 태그마다 조회하지 않도록, 페이지의 썸네일 정보를 한번에 조회해둡니다.
+        prefetch_thumbnails(
+            [product.photo for product in page.object_list],
+            settings.MALL_THUMBNAIL_OPTIONS,
+        )
+        return context
+
 
 product_list = ProductListView.as_view()
 
 
+def product_autocomplete(request):
+    prefix = request.GET.get("q", "")[:50]
+    try:
+        limit = min(max(int(request.GET.get("limit", 10)), 1), 20)
+    except ValueError:
+        limit = 10
+
+    results = [
+        {"pk": pk, "name": name}
+        for pk, name in product_name_index.lookup(prefix, limit)
+    ]
+    return JsonResponse({"results": results})
+
+
 @login_required
 def cart_detail(request):
     cart_product_qs = (
@@ -49,6 +206,7 @@ def cart_detail(request):
     CartProductFormSet = modelformset_factory(
         model=CartProduct,
         form=CartProductForm,
+        formset=BulkModelFormSet,
         extra=0,
         can_delete=True,
     )
@@ -60,6 +218,7 @@ def cart_detail(request):
         )
         if formset.is_valid():
             formset.save()
+            cart_summary_cache.invalidate(request.user.pk)
             messages.success(request, "장바구니를 업데이트했습니다.")
             return redirect("cart_detail")
     else:
@@ -76,7 +235,6 @@ def cart_detail(request):
     )
 
 
-@login_required
 @require_POST
 def add_to_cart(request, product_pk):
     product_qs = Product.objects.filter(
@@ -85,15 +243,13 @@ def add_to_cart(request, product_pk):
     product = get_object_or_404(product_qs, pk=product_pk)
 
     quantity = int(request.GET.get("quantity", 1))
+    if not 1 <= quantity <= settings.MALL_CART_MAX_QUANTITY:
+        return HttpResponseBadRequest(
+            f"수량은 1 이상 {settings.MALL_CART_MAX_QUANTITY} 이하여야 합니다."
+        )
 
-    cart_product, is_created = CartProduct.objects.get_or_create(
-        user=request.user,
-        product=product,
-        defaults={"quantity": quantity},
-    )
-    if not is_created:
-        cart_product.quantity += quantity
-        cart_product.save()
+    # 로그인하지 않았다면 세션 장바구니에 담고, 로그인 시에 합칩니다.
+    carts.add_quantities(request, {product.pk: quantity})
 
     # messages.success(request, "장바구니에 추가했습니다.")
 
@@ -103,17 +259,112 @@ def add_to_cart(request, product_pk):
     return HttpResponse("ok")
 
 
+@require_POST
+def add_to_cart_bulk(request):
+    """
+    여러 상품을 한번에 장바구니에 담습니다.
+
+    요청 : {"items": [{"product": 상품 pk, "quantity": 수량}, ...]}
+    응답 : {"results": [{"product": 상품 pk, "quantity": 수량, "ok": true, "cart_quantity": 장바구니 수량}
+                       또는 {"product": 상품 pk, "quantity": 수량, "ok": false, "error": 오류 메시지}, ...]}
+    """
+
+    try:
+        item_list = json.loads(request.body)["items"]
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest("items 목록이 필요합니다.")
+    if not isinstance(item_list, list):
+        return HttpResponseBadRequest("items 목록이 필요합니다.")
+    if len(item_list) > settings.MALL_CART_BULK_MAX_ITEMS:
+        return HttpResponseBadRequest(
+            f"한번에 {settings.MALL_CART_BULK_MAX_ITEMS}개까지 담을 수 있습니다."
+        )
+
+    max_quantity = settings.MALL_CART_MAX_QUANTITY
+    result_list = []
+    for item in item_list:
+        item = item if isinstance(item, dict) else {}
+        result = {"product": item.get("product"), "quantity": item.get("quantity", 1)}
+        # bool은 int의 하위 클래스이므로 isinstance로 확인하지 않습니다.
+        if type(result["product"]) is not int:
+            result["error"] = "상품 pk가 필요합니다."
+        elif (
+            type(result["quantity"]) is not int
+            or not 1 <= result["quantity"] <= max_quantity
+        ):
+            result["error"] = f"수량은 1 이상 {max_quantity} 이하여야 합니다."
+        result_list.append(result)
+
+    # 판매중인 상품 여부를 한번에 확인합니다.
+    product_pk_set = set(
+        Product.objects.filter(
+            pk__in={
+                result["product"] for result in result_list if "error" not in result
+            },
+            status=Product.Status.ACTIVE,
+        ).values_list("pk", flat=True)
+    )
+
+    quantity_dict = {}
+    for result in result_list:
+        if "error" in result:
+            continue
+        if result["product"] not in product_pk_set:
+            result["error"] = "판매중인 상품이 아닙니다."
+            continue
+        quantity_dict[result["product"]] = (
+            quantity_dict.get(result["product"], 0) + result["quantity"]
+        )
+
+    cart_quantity_dict = carts.add_quantities(request, quantity_dict)
+
+    for result in result_list:
+        result["ok"] = "error" not in result
+        if result["ok"]:
+            result["cart_quantity"] = cart_quantity_dict.get(result["product"])
+
+    return JsonResponse({"results": result_list})
+
+
 # Pagination 처리가 필요하시다면 ListView를 사용하세요.
 
 
+def get_ordered_product_prefetch() -> Prefetch:
+    # 주문상품들을 주문 순서대로 1번의 쿼리로 조회합니다.
+    return Prefetch(
+        "orderedproduct_set", queryset=OrderedProduct.objects.order_by("pk")
+    )
+
+
 @login_required
 def order_list(request):
-    order_qs = Order.objects.all().filter(user=request.user, status=Order.Status.PAID)
+    order_qs = (
+        Order.objects.all()
+        .filter(user=request.user, status=Order.Status.PAID)
+        .prefetch_related(get_ordered_product_prefetch())
+    )
+
+    # Order.Meta.indexes의 (user, status, -id) 인덱스를 사용합니다.
+    paginator = KeysetPaginator(order_qs, 20, ["-pk"])
+    try:
+        page = paginator.get_page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("잘못된 페이지 요청입니다.")
+
     return render(
         request,
         "mall/order_list.html",
         {
-            "order_list": order_qs,
+            "order_list": page.object_list,
+            "page_obj": page,
+            "previous_page_url": (
+                "?" + urlencode({"cursor": page.previous_cursor})
+                if page.has_previous()
+                else ""
+            ),
+            "next_page_url": (
+                "?" + urlencode({"cursor": page.next_cursor}) if page.has_next() else ""
+            ),
         },
     )
 
@@ -122,8 +373,18 @@ def order_list(request):
 def order_new(request):
     cart_product_qs = CartProduct.objects.filter(user=request.user)
 
-    order = Order.create_from_cart(request.user, cart_product_qs)
-    cart_product_qs.delete()
+    try:
+        order = Order.create_from_cart(request.user, cart_product_qs)
+    except EmptyCartError:
+        # 장바구니가 비었거나, 다른 요청에서 이미 주문한 경우
+        messages.error(request, "장바구니가 비어있습니다.")
+        return redirect("cart_detail")
+    except OutOfStockError:
+        name_list = cart_product_qs.filter(
+            product__stock__lt=F("quantity")
+        ).values_list("product__name", flat=True)
+        messages.error(request, f"재고가 부족합니다. 수량을 확인해주세요. ({', '.join(name_list)})")
+        return redirect("cart_detail")
 
     return redirect("order_pay", order.pk)
 
@@ -136,7 +397,14 @@ def order_pay(request, pk):
         messages.error(request, "현재 결제를 할 수 없는 주문입니다.")
         return redirect(order)
 
-    payment = OrderPayment.create_by_order(order)
+    try:
+        # 결제 실패 등으로 해제된 재고 예약이 있다면 다시 예약합니다.
+        order.stockreservation_set.reserve_released()
+    except OutOfStockError:
+        messages.error(request, "재고가 부족하여 결제를 할 수 없습니다.")
+        return redirect(order)
+
+    payment = OrderPayment.get_or_create_by_order(order)
 
     check_url = reverse("order_check", args=[order.pk, payment.pk])
 
@@ -171,7 +439,18 @@ def order_check(request, order_pk, payment_pk):
 
 @login_required
 def order_detail(request, pk):
-    order = get_object_or_404(Order, pk=pk, user=request.user)
+    order_qs = Order.objects.prefetch_related(get_ordered_product_prefetch())
+    try:
+        order = order_qs.get(pk=pk, user=request.user)
+    except Order.DoesNotExist:
+        # 보관 테이블로 옮겨진 주문은 같은 pk로 보관 테이블에서 조회합니다.
+        archived_order_qs = ArchivedOrder.objects.prefetch_related(
+            Prefetch(
+                "orderedproduct_set",
+                queryset=ArchivedOrderedProduct.objects.order_by("pk"),
+            )
+        )
+        order = get_object_or_404(archived_order_qs, pk=pk, user=request.user)
     return render(
         request,
         "mall/order_detail.html",
@@ -183,20 +462,29 @@ def order_detail(request, pk):
 
 @require_POST
 @csrf_exempt
-@deny_from_untrusted_hosts(settings.PORTONE_WEBHOOK_IPS)
+@deny_from_untrusted_hosts(lambda: settings.PORTONE_WEBHOOK_IPS)
 def portone_webhook(request):
     if request.META["CONTENT_TYPE"] == "application/json":
         payload = json.loads(request.body)
-        merchant_uid = payload.get("merchant_uid")
     else:
-        merchant_uid = request.POST.get("merchant_uid")
+        payload = request.POST
+    merchant_uid = payload.get("merchant_uid")
 
     if not merchant_uid:
         return HttpResponse("merchant_uid 인자가 누락되었습니다.", status=400)
     elif merchant_uid == "merchant_1234567890":
         return HttpResponse("test ok")
 
+    if settings.PORTONE_WEBHOOK_ASYNC:
+        # 알림만 저장하고 바로 응답합니다. 결제내역 확인은 run_webhook_worker 명령에서 수행합니다.
+        enqueue_webhook(
+            merchant_uid,
+            imp_uid=payload.get("imp_uid", ""),
+            payment_status=payload.get("status", ""),
+        )
+        return HttpResponse("ok")
+
     payment = get_object_or_404(OrderPayment, uid=merchant_uid)
-    payment.update()
+    payment.update(notified_status=payload.get("status", ""))
 
     return HttpResponse("ok")
@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections
+from django.db.models import Count, F, Min, Q
+from django.http import Http404
+from django.utils import timezone
+
+from mall.models import OrderPayment, PortoneWebhook
+
+
+logger = logging.getLogger("portone")
+
+
+def enqueue_webhook(
+    merchant_uid: str, imp_uid: str = "", payment_status: str = ""
+) -> Optional[PortoneWebhook]:
+    """
+    웹훅 알림을 저장합니다. 같은 결제에 대해 같은 내용의 알림이 이미 처리대기 중이라면,
+    새로 저장하지 않고 None을 반환합니다.
+    """
+
+    seconds = settings.PORTONE_COALESCE_SECONDS
+    if seconds > 0:
+        is_duplicated = PortoneWebhook.objects.filter(
+            merchant_uid=merchant_uid,
+            payment_status=payment_status or "",
+            status=PortoneWebhook.Status.PENDING,
+            created_at__gte=timezone.now() - timedelta(seconds=seconds),
+        ).exists()
+        if is_duplicated:
+            return None
+
+    return PortoneWebhook.objects.create(
+        merchant_uid=merchant_uid,
+        imp_uid=imp_uid or "",
+        payment_status=payment_status or "",
+    )
+
+
+def get_backlog_stats() -> dict:
+    """웹훅 적체 현황 (backpressure 지표)"""
+
+    stats = {status: 0 for status in PortoneWebhook.Status.values}
+    for row in (
+        PortoneWebhook.objects.order_by().values("status").annotate(count=Count("pk"))
+    ):
+        stats[row["status"]] = row["count"]
+
+    oldest = PortoneWebhook.objects.filter(
+        status=PortoneWebhook.Status.PENDING
+    ).aggregate(oldest=Min("created_at"))["oldest"]
+    stats["oldest_pending_age"] = (
+        (timezone.now() - oldest).total_seconds() if oldest else 0
+    )
+    return stats
+
+
+class WebhookWorker:
+    """
+    저장된 웹훅 알림을 꺼내어, 쓰레드 풀에서 OrderPayment.update를 수행합니다.
+
+    여러 워커 프로세스가 동시에 실행되더라도 하나의 알림은 하나의 워커만 처리하도록,
+    claim_token을 지정하는 조건부 UPDATE로 알림을 선점합니다.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        batch_size: int = 50,
+        max_attempts: Optional[int] = None,
+        visibility_timeout: Optional[int] = None,
+        retry_delay: Optional[int] = None,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts or settings.PORTONE_WEBHOOK_MAX_ATTEMPTS
+        self.visibility_timeout = (
+            visibility_timeout or settings.PORTONE_WEBHOOK_VISIBILITY_TIMEOUT
+        )
+        self.retry_delay = (
+            settings.PORTONE_WEBHOOK_RETRY_DELAY if retry_delay is None else retry_delay
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="portone-webhook"
+        )
+        self._lock = threading.Lock()
+        self.processed_count = 0
+        self.failed_count = 0
+        self.retried_count = 0
+        self.coalesced_count = 0
+        self.started_at = time.monotonic()
+
+    def requeue_stale(self) -> int:
+        """처리 도중 워커가 종료되어 방치된 알림을 다시 처리대기 상태로 돌립니다."""
+        deadline = timezone.now() - timedelta(seconds=self.visibility_timeout)
+        return PortoneWebhook.objects.filter(
+            status=PortoneWebhook.Status.PROCESSING,
+            claimed_at__lt=deadline,
+        ).update(status=PortoneWebhook.Status.PENDING, claim_token=None)
+
+    def claim(self) -> List[PortoneWebhook]:
+        now = timezone.now()
+        # 재시도 대기 중인 알림은 next_attempt_at 이후에 처리합니다.
+        pending_qs = PortoneWebhook.objects.filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            status=PortoneWebhook.Status.PENDING,
+        )
+        pk_list = list(
+            pending_qs.order_by("pk").values_list("pk", flat=True)[: self.batch_size]
+        )
+        if not pk_list:
+            return []
+
+        claim_token = uuid4()
+        pending_qs.filter(pk__in=pk_list).update(
+            status=PortoneWebhook.Status.PROCESSING,
+            claim_token=claim_token,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+        return list(PortoneWebhook.objects.filter(claim_token=claim_token))
+
+    def process(self, webhook_list: List[PortoneWebhook]) -> bool:
+        """같은 결제에 대한 알림들을 1회의 OrderPayment.update로 처리합니다."""
+
+        merchant_uid = webhook_list[0].merchant_uid
+        pk_list = [webhook.pk for webhook in webhook_list]
+
+        close_old_connections()
+        try:
+            payment = OrderPayment.objects.get(uid=merchant_uid)
+            # 가장 최근 알림의 결제상태가 저장된 상태와 다르다면 바로 다시 확인합니다.
+            payment.update(notified_status=webhook_list[-1].payment_status)
+        except (OrderPayment.DoesNotExist, ValidationError) as e:
+            # 재시도해도 결과가 달라지지 않으므로 바로 실패처리합니다.
+            self._fail(webhook_list, e, permanent=True)
+            return False
+        except Exception as e:  # noqa
+            self._fail(webhook_list, e)
+            return False
+        else:
+            # 처리 도중 requeue_stale로 다른 워커에게 넘어간 알림은 갱신하지 않습니다.
+            count = PortoneWebhook.objects.filter(
+                pk__in=pk_list, claim_token=webhook_list[0].claim_token
+            ).update(
+                status=PortoneWebhook.Status.DONE,
+                processed_at=timezone.now(),
+                claim_token=None,
+                next_attempt_at=None,
+                error="",
+            )
+            with self._lock:
+                self.processed_count += count
+                self.coalesced_count += max(count - 1, 0)
+            return True
+        finally:
+            close_old_connections()
+
+    def _fail(self, webhook_list: List[PortoneWebhook], e: Exception, permanent=False):
+        merchant_uid = webhook_list[0].merchant_uid
+        if permanent or isinstance(e, Http404):
+            logger.warning("webhook %s : %s", merchant_uid, e)
+        else:
+            logger.error("webhook %s : %s", merchant_uid, e, exc_info=e)
+
+        now = timezone.now()
+        attempts = max(webhook.attempts for webhook in webhook_list)
+        if permanent or attempts >= self.max_attempts:
+            status = PortoneWebhook.Status.FAILED
+            next_attempt_at = None
+        else:
+            # 포트원 장애 시에 매 polling마다 다시 호출하지 않도록, 재시도 간격을 늘려갑니다.
+            status = PortoneWebhook.Status.PENDING
+            next_attempt_at = now + timedelta(
+                seconds=self.retry_delay * 2 ** (attempts - 1)
+            )
+
+        count = PortoneWebhook.objects.filter(
+            pk__in=[w.pk for w in webhook_list],
+            claim_token=webhook_list[0].claim_token,
+        ).update(
+            status=status,
+            processed_at=now,
+            claim_token=None,
+            next_attempt_at=next_attempt_at,
+            error=str(e) or e.__class__.__name__,
+        )
+        with self._lock:
+            if status == PortoneWebhook.Status.FAILED:
+                self.failed_count += count
+            else:
+                self.retried_count += count
+
+    def run_once(self) -> int:
+        """대기 중인 알림 1개 배치를 처리하고, 처리한 알림 개수를 반환합니다."""
+        self.requeue_stale()
+        webhook_list = self.claim()
+
+        grouped = defaultdict(list)
+        for webhook in webhook_list:
+            grouped[webhook.merchant_uid].append(webhook)
+        if grouped:
+            list(self.executor.map(self.process, grouped.values()))
+
+        return len(webhook_list)
+
+    def run_forever(self, interval: float = 1.0, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            if self.run_once() < self.batch_size:
+                # 적체된 알림이 없을 때에만 대기합니다.
+                stop_event.wait(interval)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def get_stats(self) -> dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            **get_backlog_stats(),
+            "worker_processed": self.processed_count,
+            "worker_failed": self.failed_count,
+            "worker_retried": self.retried_count,
+            "worker_coalesced": self.coalesced_count,
+            "worker_throughput": self.processed_count / elapsed,
+        }
@@ -1,12 +1,13 @@
 import logging
 from uuid import uuid4
 
-from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.http import Http404
 from iamport import Iamport
 
+from mall.portone import get_portone_client
+
 
 logger = logging.getLogger("portone")
 
@@ -39,9 +40,7 @@ class Payment(models.Model):
 
     # 포트원 REST API를 통해서 결제를 검증해야만 합니다.
     def portone_check(self, commit=True):
-        api = Iamport(
-            imp_key=settings.PORTONE_API_KEY, imp_secret=settings.PORTONE_API_SECRET
-        )
+        api = get_portone_client()
 
         try:
             meta = api.find(merchant_uid=self.merchant_uid)
@@ -69,6 +69,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "mall.middleware.QueryCountHeaderMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,6 +94,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "mall.context_processors.cart_summary",
             ],
         },
     },
@@ -168,6 +170,73 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 INTERNAL_IPS = env.list("INTERNAL_IPS", default=["127.0.0.1"])
 
 
+# 쇼핑몰
+
+# 상품목록에 표시할 근사 상품 수의 캐싱 시간 (초). 0이면 상품 수를 표시하지 않습니다.
+MALL_PRODUCT_COUNT_CACHE_TIMEOUT = env.int(
+    "MALL_PRODUCT_COUNT_CACHE_TIMEOUT", default=300
+)
+# 상품목록 렌더링 결과의 캐싱 시간 (초). 상품/분류 변경 시에는 즉시 무효화됩니다. 0이면 캐싱하지 않습니다.
+MALL_PRODUCT_LIST_CACHE_TIMEOUT = env.int(
+    "MALL_PRODUCT_LIST_CACHE_TIMEOUT", default=600
+)
+# 상품명 자동완성 인덱스가 다른 프로세스에서의 상품 변경을 DB에서 확인하는 간격 (초)
+MALL_AUTOCOMPLETE_CHECK_INTERVAL = env.int(
+    "MALL_AUTOCOMPLETE_CHECK_INTERVAL", default=10
+)
+
+# 장바구니 일괄 담기 API에서 한번에 담을 수 있는 최대 항목 수
+MALL_CART_BULK_MAX_ITEMS = env.int("MALL_CART_BULK_MAX_ITEMS", default=100)
+# 장바구니에 한번에 담을 수 있는 상품별 최대 수량
+MALL_CART_MAX_QUANTITY = env.int("MALL_CART_MAX_QUANTITY", default=100)
+# 장바구니 요약(상품 수, 총 수량, 총 금액)의 캐싱 시간 (초). 장바구니 변경 시에는 즉시 무효화됩니다.
+MALL_CART_SUMMARY_CACHE_TIMEOUT = env.int(
+    "MALL_CART_SUMMARY_CACHE_TIMEOUT", default=600
+)
+# 주문 생성 시에 예약한 재고를 결제 완료 전까지 유지할 시간 (초).
+# 만료된 예약은 "python manage.py release_stock_reservations" 명령으로 해제합니다.
+MALL_STOCK_RESERVATION_TIMEOUT = env.int(
+    "MALL_STOCK_RESERVATION_TIMEOUT", default=60 * 30
+)
+# 로그인하지 않은 사용자의 장바구니를 캐시에 보관할 시간 (초)
+MALL_SESSION_CART_TIMEOUT = env.int(
+    "MALL_SESSION_CART_TIMEOUT", default=60 * 60 * 24 * 14
+)
+# 배송완료/주문취소 후 지정 일수가 지난 주문을 보관 테이블로 옮깁니다.
+# "python manage.py archive_orders" 명령으로 수행합니다.
+MALL_ORDER_ARCHIVE_DAYS = env.int("MALL_ORDER_ARCHIVE_DAYS", default=180)
+# 결제 페이지에서 아직 시도하지 않은 결제준비 건을 재사용할 기간 (초)
+MALL_PAYMENT_REUSE_TIMEOUT = env.int("MALL_PAYMENT_REUSE_TIMEOUT", default=60 * 60)
+# 생성 후 이 시간(초)이 지나도록 시도하지 않은 결제준비 건은 방치된 것으로 보고
+# "python manage.py prune_ready_payments" 명령으로 삭제합니다.
+MALL_PAYMENT_PRUNE_AGE = env.int("MALL_PAYMENT_PRUNE_AGE", default=60 * 60 * 24 * 3)
+# 요청별 DB 쿼리 수를 X-Query-Count 응답 헤더로 알려줄 지 여부 (loadtest_checkout 명령 등 부하 테스트용)
+MALL_QUERY_COUNT_HEADER = env.bool("MALL_QUERY_COUNT_HEADER", default=False)
+
+# 미리 생성해둘 상품 사진 썸네일의 (geometry, options) 목록.
+# 템플릿의 {% thumbnail %} 태그와 같은 값을 지정해야 합니다.
+MALL_THUMBNAIL_OPTIONS = [
+    ("300x300", {"crop": "center"}),
+]
+# 상품 사진 저장 시 썸네일을 백그라운드 쓰레드에서 생성할 지 여부와 쓰레드 수
+MALL_THUMBNAIL_ASYNC = env.bool("MALL_THUMBNAIL_ASYNC", default=True)
+MALL_THUMBNAIL_WORKERS = env.int("MALL_THUMBNAIL_WORKERS", default=2)
+# 상품 카드의 srcset에 사용할 WebP/AVIF 변환 이미지의 너비 목록 (px)
+MALL_PHOTO_VARIANT_WIDTHS = env.list(
+    "MALL_PHOTO_VARIANT_WIDTHS", cast=int, default=[320, 480, 640, 960]
+)
+
+# sorl-thumbnail key-value store : 프로세스 메모리 → 캐시(THUMBNAIL_CACHE) → DB 순서로 조회합니다.
+THUMBNAIL_KVSTORE = "mall.thumbnail_kvstore.KVStore"
+# 프로세스 메모리에 보관할 최대 레코드 수와 보관 시간 (초)
+MALL_THUMBNAIL_KVSTORE_LOCAL_SIZE = env.int(
+    "MALL_THUMBNAIL_KVSTORE_LOCAL_SIZE", default=10000
+)
+MALL_THUMBNAIL_KVSTORE_LOCAL_TIMEOUT = env.int(
+    "MALL_THUMBNAIL_KVSTORE_LOCAL_TIMEOUT", default=300
+)
+
+
 # 포트원
 PORTONE_PG_PROVIDER = env.str("PORTONE_PG_PROVIDER", default="")
 PORTONE_SHOP_ID = env.str("PORTONE_SHOP_ID", default="")
@@ -177,7 +246,35 @@ PORTONE_SHOP_ID = env.str("PORTONE_SHOP_ID", default="")
 PORTONE_PG = PORTONE_PG_PROVIDER
 PORTONE_API_KEY = env.str("PORTONE_API_KEY", default="")
 PORTONE_API_SECRET = env.str("PORTONE_API_SECRET", default="")
+PORTONE_API_URL = env.str("PORTONE_API_URL", default="https://api.iamport.kr/")
+# 프로세스 전역 포트원 클라이언트의 HTTP 커넥션 풀 크기와 요청 타임아웃 (초)
+PORTONE_HTTP_POOL_MAXSIZE = env.int("PORTONE_HTTP_POOL_MAXSIZE", default=10)
+PORTONE_HTTP_TIMEOUT = env.float("PORTONE_HTTP_TIMEOUT", default=10)
+# access token 만료 몇 초 전에 미리 재발급받을 지
+PORTONE_TOKEN_REFRESH_MARGIN = env.int("PORTONE_TOKEN_REFRESH_MARGIN", default=60)
+
+# 같은 결제에 대한 중복 웹훅/결제확인 요청을 이 시간(초) 동안 1회의 포트원 조회로 합칩니다.
+PORTONE_COALESCE_SECONDS = env.int("PORTONE_COALESCE_SECONDS", default=5)
+# 결제완료/취소/실패 상태의 결제를 포트원에서 다시 확인하기까지의 시간 (초).
+# 그 전의 결제확인/웹훅 요청은 포트원 조회와 DB 저장 없이 처리합니다. None이면 다시 확인하지 않습니다.
+# 웹훅으로 알려온 결제상태가 다르거나, 관리자 페이지에서 갱신할 때는 항상 다시 확인합니다.
+PORTONE_REVERIFY_INTERVALS = {
+    "paid": env.int("PORTONE_REVERIFY_PAID_INTERVAL", default=60 * 10),
+    "failed": env.int("PORTONE_REVERIFY_FAILED_INTERVAL", default=60),
+    "cancelled": None,
+}
 
 PORTONE_WEBHOOK_IPS = env.list(
     "PORTONE_WEBHOOK_IPS", default=["52.78.100.19", "52.78.48.223", "52.78.5.241"]
 )
+
+# 웹훅을 비동기로 처리할 지 여부. True이면 웹훅 뷰는 알림을 저장만 하고 바로 응답하며,
+# "python manage.py run_webhook_worker" 명령으로 저장된 알림을 처리합니다.
+PORTONE_WEBHOOK_ASYNC = env.bool("PORTONE_WEBHOOK_ASYNC", default=False)
+PORTONE_WEBHOOK_MAX_ATTEMPTS = env.int("PORTONE_WEBHOOK_MAX_ATTEMPTS", default=3)
+# 처리에 실패한 알림의 재시도 대기시간 (초). 재시도할 때마다 2배씩 늘어납니다.
+PORTONE_WEBHOOK_RETRY_DELAY = env.int("PORTONE_WEBHOOK_RETRY_DELAY", default=30)
+# 처리중 상태로 이 시간(초)이 지난 알림은 워커가 비정상 종료된 것으로 보고 재처리합니다.
+PORTONE_WEBHOOK_VISIBILITY_TIMEOUT = env.int(
+    "PORTONE_WEBHOOK_VISIBILITY_TIMEOUT", default=300
+)
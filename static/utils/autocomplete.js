@@ -0,0 +1,31 @@
+(function() {
+    const input = document.querySelector("input[data-autocomplete-url]");
+    if (!input) return;
+
+    const datalist = document.getElementById(input.getAttribute("list"));
+    const url = input.dataset.autocompleteUrl;
+    let timer = null;
+
+    input.addEventListener("input", function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            const q = input.value.trim();
+            if (!q) {
+                datalist.replaceChildren();
+                return;
+            }
+
+            fetch(`${url}?q=${encodeURIComponent(q)}`)
+                .then(function(response) {
+                    return response.json();
+                })
+                .then(function(data) {
+                    datalist.replaceChildren(...data.results.map(function(result) {
+                        const option = document.createElement("option");
+                        option.value = result.name;
+                        return option;
+                    }));
+                });
+        }, 100);
+    });
+})();